@@ -2,7 +2,7 @@
 
 import json
 import os
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 
 from flask import Flask, current_app, render_template, request, session
 from numpy.random import default_rng
@@ -10,18 +10,21 @@ from whitenoise import WhiteNoise
 
 from comparison_interface.cli import blueprint as commands_bp
 from comparison_interface.configuration.flask import Settings as FlaskSettings
+from comparison_interface.configuration.integrity import IntegrityGuard
 from comparison_interface.configuration.website import Settings as WS
 from comparison_interface.db.connection import db
-from comparison_interface.db.models import WebsiteControl
+from comparison_interface.db.sqlite import configure_sqlite
 from comparison_interface.main import blueprint as main_bp
 from comparison_interface.main.views.request import Request
 
 
-def create_app(testing=False, test_config=None):
+def create_app(testing=False, test_config=None, warm_up=None):
     """Start Flask website application.
 
     Args:
         config_filename (object, optional): Default configuration file. Defaults to None. Used for testing.
+        warm_up (bool, optional): Load the caches of the website before returning the application, so the worker
+            processes forked by the server share them. Defaults to the WARM_UP_BEFORE_FORK flask setting.
     """
     # Create and configure the app
     app = Flask(__name__, instance_relative_config=True, static_folder="static")
@@ -58,6 +61,7 @@ def create_app(testing=False, test_config=None):
 
     # Register the database
     db.init_app(app)
+    configure_sqlite(app)
 
     # Register the custom Flask commands
     app.register_blueprint(commands_bp)
@@ -109,6 +113,14 @@ def create_app(testing=False, test_config=None):
         max_age=WHITENOISE_MAX_AGE,
     )
 
+    # load the caches in the master process so the workers forked from it share them
+    if warm_up is None:
+        warm_up = app.config.get("WARM_UP_BEFORE_FORK", False)
+    if warm_up:
+        from comparison_interface.warmup import warm_up as warm_up_caches
+
+        warm_up_caches(app)
+
     # seed the random number generator per process if we are in a uwsgi environment
     try:
         from uwsgidecorators import postfork
@@ -150,34 +162,9 @@ def _validate_app_integrity():
 
     The configuration file is used by the website during runtime. Modification of this file can cause
     unexpected results so changes are monitored and a RuntimeError will be raised if a change is detected.
+    The content of the file is checked by each worker process when it starts and whenever the study is set up again.
     """
-    app = current_app
-    modification_date = None
-    with app.app_context():
-        try:
-            # Get the application control variables
-            w = WebsiteControl()
-            conf = w.get_conf()
-
-            WS.set_configuration_location(app, conf.configuration_file)
-            setup_exec_date = conf.setup_exec_date.replace(tzinfo=timezone.utc)
-
-            # Get the last modification date of the configuration file (UTC)
-            modification_date = os.path.getmtime(WS.get_configuration_location(app))
-            modification_date = datetime.fromtimestamp(modification_date, tz=timezone.utc)
-        except Exception as e:
-            app.logger.critical(str(e))
-            raise RuntimeError("Application not yet initialised. Please read the README.md file for instructions.")
-
-        # Stop the server execution if the configuration file was modified after the setup of the application.
-        if modification_date is None or modification_date > setup_exec_date:
-            app.logger.critical(
-                "The configuration file cannot be modified after the website has been initialised "
-                "with the setup command. The file was modified on: %s UTC. Setup executed on : %s UTC. "
-                "Please execute >Flask setup< again if you want to re-initialise the database."
-                % (modification_date.strftime("%m/%d/%Y, %H:%M:%S"), setup_exec_date.strftime("%m/%d/%Y, %H:%M:%S"))
-            )
-            raise RuntimeError("Application unhealthy state. Please contact the website administrator.")
+    IntegrityGuard.get(current_app).validate(current_app)
 
 
 def _page_not_found(e):
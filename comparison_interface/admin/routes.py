@@ -15,8 +15,9 @@ from comparison_interface.configuration.validation import Validation as ConfigVa
 from comparison_interface.configuration.website import Settings as WS
 from comparison_interface.db.connection import db
 from comparison_interface.db.export import Exporter
-from comparison_interface.db.models import Comparison, Participant, WebsiteControl
+from comparison_interface.db.models import Comparison, Group, Participant, WebsiteControl
 from comparison_interface.db.setup import Setup as DBSetup
+from comparison_interface.scoring.online import ScoringEngine
 
 
 @blueprint.route("/", methods=["GET"])
@@ -60,6 +61,17 @@ def dashboard():
     date_study_created = f"{date_created.date()} {date_created.hour}:{date_created.minute}"
     total_judgements = db.session.query(Comparison).count()
     skipped_judgements = db.session.query(Comparison).where(Comparison.state == "skipped").count()
+    try:
+        scoring_engine = ScoringEngine.get(current_app)
+    except RuntimeError as e:
+        # The configuration file no longer matches the setup, e.g. it has just been replaced, so the scores are hidden
+        current_app.logger.warning("The scores could not be computed: %s" % (e))
+        group_scores = None
+    else:
+        group_scores = [
+            (group.display_name, scoring_engine.scores(group.group_id))
+            for group in db.session.scalars(db.select(Group).order_by(Group.group_id)).all()
+        ]
 
     # get the pages we are expecting from the config
     local_file_edits = True
@@ -88,6 +100,7 @@ def dashboard():
         "latest_registration": latest_registration_date,
         "total_judgements": total_judgements,
         "skipped_judgements": skipped_judgements,
+        "group_scores": group_scores,
         "form": form,
     }
 
@@ -263,12 +276,30 @@ def process_image_errors(errors):
     return processed_errors, missing_images
 
 
+def process_csv_errors(errors):
+    """Organise the errors of the csv file rows, keyed by line number, for displaying on the screen."""
+    if isinstance(errors, list):
+        return {"csv file": "; ".join(errors)}, []
+    processed_errors = {}
+    missing_images = []
+    for line in errors:
+        for field in errors[line]:
+            message = "; ".join(errors[line][field])
+            if "Image " in message and " not found " in message:
+                missing_images.append(message[6 : message.find(" not found ")])
+            else:
+                processed_errors[f"line {line}, {field}"] = message
+    return processed_errors, missing_images
+
+
 def process_errors(errors):
     """Organise the errors for displaying on the screen."""
     processed_errors = {}
     all_missing_images = []
     for typ in errors:
-        if typ == "groups":
+        if typ == "csvFile":
+            image_errors, missing_images = process_csv_errors(errors[typ])
+        elif typ == "groups":
             image_errors, missing_images = process_image_errors(errors)
         else:
             for field in errors[typ]:
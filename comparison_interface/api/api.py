@@ -9,6 +9,7 @@ from comparison_interface.api import blueprint
 from comparison_interface.db.export import Exporter
 from comparison_interface.db.models import Comparison, Item
 from comparison_interface.main.views.request import Request
+from comparison_interface.scoring.online import ScoringEngine
 
 
 @ttl_cache()
@@ -78,6 +79,25 @@ class Outcomes(Request):
             return send_file(BytesIO(file_buffer.read().encode('utf-8')), as_attachment=False, mimetype='text')
 
 
+class Scores(Request):
+    """API to get the current item scores."""
+
+    def get(self, _):
+        """Get the current Davidson model score of every item in each group and return them in csv format as text."""
+        engine = ScoringEngine.get(current_app)
+        data_list = []
+        for group_id in sorted(engine.groups):
+            data_list.extend({'group_id': group_id, **entry} for entry in engine.scores(group_id))
+        with StringIO() as file_buffer:
+            if len(data_list) > 0:
+                keys = data_list[0].keys()
+                csv_writer = csv.DictWriter(file_buffer, keys)
+                csv_writer.writeheader()
+                csv_writer.writerows(data_list)
+            file_buffer.seek(0)
+            return send_file(BytesIO(file_buffer.read().encode('utf-8')), as_attachment=False, mimetype='text')
+
+
 class Items(Request):
     """API to get the items (images)."""
 
@@ -109,6 +129,13 @@ def api_outcomes():
     return Request.process(Outcomes(current_app, session), request)
 
 
+@blueprint.route('/api/scores', methods=['GET'])
+@require_api_key
+def api_scores():
+    """Handle api URL to get the current item scores."""
+    return Request.process(Scores(current_app, session), request)
+
+
 @blueprint.route('/api/items', methods=['GET'])
 @require_api_key
 def api_items():
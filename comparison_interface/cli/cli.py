@@ -1,20 +1,22 @@
-"""Commands which are used to setup and control the application."""
+"""Commands which are used to setup and control the application.
+
+The validation, database setup, export, scoring and warm up modules, with their dependencies, are only imported by the
+commands that use them, so they are not loaded by the web server processes which register these commands.
+"""
 
 import os
 
 import click
 from flask import current_app
 from flask.cli import with_appcontext
-from marshmallow import ValidationError
+from sqlalchemy import inspect
 from sqlalchemy.exc import OperationalError
 
 from comparison_interface.cli import blueprint
-from comparison_interface.configuration.validation import Validation as ConfigValidation
 from comparison_interface.configuration.website import Settings as WS
 from comparison_interface.db.connection import db
-from comparison_interface.db.export import Exporter
 from comparison_interface.db.models import WebsiteControl
-from comparison_interface.db.setup import Setup as DBSetup
+from comparison_interface.scoring.bootstrap import RESAMPLE_COMPARISONS, RESAMPLE_PARTICIPANTS
 
 
 @blueprint.cli.command("setup_admin")
@@ -42,6 +44,11 @@ def setup(conf):
         conf (string): Website configuration location (either the path to a JSON file or a dir path to a dir containing
                        one JSON file and one CSV file.)
     """
+    from marshmallow import ValidationError
+
+    from comparison_interface.configuration.validation import Validation as ConfigValidation
+    from comparison_interface.db.setup import Setup as DBSetup
+
     # 1. Validate the website configuration
     app = current_app
     ConfigValidation(app).check_config_path(conf)
@@ -82,6 +89,11 @@ def reset(conf):
     Args:
         conf (string): Website configuration location
     """
+    from marshmallow import ValidationError
+
+    from comparison_interface.configuration.validation import Validation as ConfigValidation
+    from comparison_interface.db.setup import Setup as DBSetup
+
     app = current_app
     confirm = input(
         'Running this command will delete all of the data in the database and all existing export files. '
@@ -108,6 +120,61 @@ def reset(conf):
         return
 
 
+@blueprint.cli.command("create_indexes")
+@with_appcontext
+def create_indexes():
+    """Add the missing tables, columns and indexes to the database of a study that was set up before they were defined.
+
+    The existing rows are kept and the columns added are filled from them, so this can be run on a live study without a
+    reset.
+    """
+    from comparison_interface.db.setup import Setup as DBSetup
+
+    app = current_app
+    with app.app_context():
+        # The models can't be queried until the missing columns have been added
+        if not inspect(db.engines['study_db']).has_table(WebsiteControl.__tablename__):
+            app.logger.critical('Application not yet initialised.')
+            exit()
+
+    setup = DBSetup(app)
+    try:
+        added = setup.add_missing_columns()
+    except RuntimeError as e:
+        app.logger.critical(e)
+        exit()
+    for name in added:
+        app.logger.info("Added {}".format(name))
+    created = setup.create_indexes()
+    if not added and not created:
+        app.logger.info('The database is already up to date.')
+    for name in created:
+        app.logger.info("Created index {}".format(name))
+
+
+@blueprint.cli.command("db_maintenance")
+@click.option("--vacuum/--no-vacuum", default=False, show_default=True, help="Rebuild the databases to reclaim space")
+@with_appcontext
+def db_maintenance(vacuum):
+    """Refresh the query planner statistics of the databases and fold their write-ahead log back into them.
+
+    This can be run while the website is live, except with --vacuum which locks the databases while they are rebuilt.
+
+    Args:
+        vacuum (bool, optional): Also rebuild the databases to reclaim the space of deleted rows. Default is False.
+    """
+    from comparison_interface.db.sqlite import run_maintenance
+
+    app = current_app
+    try:
+        checkpointed = run_maintenance(app, vacuum=vacuum)
+    except Exception as e:
+        app.logger.critical(e)
+        exit()
+    for name, pages in checkpointed.items():
+        app.logger.info("Maintenance of the {} database done, {} pages checkpointed".format(name, max(pages, 0)))
+
+
 @blueprint.cli.command("export")
 @click.option("--format", default="csv", show_default=True, help="The file format required (csv or tsv)")
 @with_appcontext
@@ -120,6 +187,9 @@ def export(format):
     Args:
         format (string, optional): The file format required for each table, must be either csv or tsv. Default is csv.
     """
+    from comparison_interface.configuration.validation import Validation as ConfigValidation
+    from comparison_interface.db.export import Exporter
+
     app = current_app
     location = None
     with app.app_context():
@@ -149,3 +219,91 @@ def export(format):
 
     app.logger.info("Exporting database tables into {}".format(location))
     Exporter(app).save(location, format)
+
+
+@blueprint.cli.command("fit")
+@click.option("--format", default="csv", show_default=True, help="The file format required (csv or tsv)")
+@click.option(
+    "--ties/--no-ties",
+    default=True,
+    show_default=True,
+    help="Fit the Davidson model for ties, or the Bradley-Terry model counting a tie as half a win for each item",
+)
+@click.option("--bootstrap", default=0, show_default=True, help="Number of bootstrap replicates for 95% intervals")
+@click.option(
+    "--resample",
+    type=click.Choice([RESAMPLE_COMPARISONS, RESAMPLE_PARTICIPANTS]),
+    default=RESAMPLE_COMPARISONS,
+    show_default=True,
+    help="Resample the comparisons or the participants in the bootstrap",
+)
+@click.option("--workers", default=None, type=int, help="Number of bootstrap processes (default number of CPUs)")
+@click.option("--seed", default=None, type=int, help="Seed of the bootstrap")
+@with_appcontext
+def fit(format, ties, bootstrap, resample, workers, seed):
+    """Fit the item scores to all of the judgements made and save them with their standard errors.
+
+    The scores are fitted separately for each group and saved to a scores file in the location specified by the
+    behaviour configuration key 'exportPathLocation'. Bootstrap confidence intervals can also be computed, with the
+    replicates fitted in parallel processes.
+
+    Args:
+        format (string, optional): The file format required, must be either csv or tsv. Default is csv.
+        ties (bool, optional): Whether to fit the Davidson model for ties. Default is True.
+        bootstrap (int, optional): Number of bootstrap replicates, no intervals are computed if 0. Default is 0.
+        resample (string, optional): Resample the comparisons or the participants. Default is comparisons.
+        workers (int, optional): Number of bootstrap processes. Default is the number of CPUs.
+        seed (int, optional): Seed of the bootstrap. Default is None.
+    """
+    from comparison_interface.configuration.validation import Validation as ConfigValidation
+    from comparison_interface.scoring.batch import BatchFit
+
+    app = current_app
+    location = None
+    with app.app_context():
+        if format not in ['csv', 'tsv']:
+            app.logger.critical('Invalid file type requested. Must be csv or tsv.')
+            exit()
+        try:
+            # Get the website control variables
+            w = WebsiteControl()
+            conf = w.get_conf()
+            # Set the application configuration
+            app.logger.info("Setting website configuration")
+            WS.set_configuration_location(app, conf.configuration_file)
+            ConfigValidation(app).validate()
+            location = WS.get_export_location(app)
+            if not os.path.exists(location):
+                os.makedirs(location)
+                app.logger.info('Creating folder for data export.')
+
+        except OperationalError:
+            app.logger.critical('Application not yet initialised.')
+            exit()
+        except Exception as e:
+            # Report any other error
+            app.logger.critical(e)
+            exit()
+
+        batch_fit = BatchFit(app, fit_ties=ties, bootstrap=bootstrap, resample=resample, workers=workers, seed=seed)
+        path = batch_fit.save(location, format)
+    app.logger.info("Scores saved to {}".format(path))
+
+
+@blueprint.cli.command("warmup")
+@with_appcontext
+def warmup():
+    """Load the caches of the website and report the time taken by each step.
+
+    The same warm up is run by `create_app` before the server forks its worker processes when the WARM_UP_BEFORE_FORK
+    setting is enabled, this command checks that it works for the current study.
+    """
+    from comparison_interface.warmup import warm_up
+
+    app = current_app
+    timings = warm_up(app)
+    if not timings:
+        app.logger.critical('The caches could not be loaded, check that the study has been set up.')
+        exit()
+    for name, seconds in timings.items():
+        click.echo("{}: {:.3f}s".format(name, seconds))
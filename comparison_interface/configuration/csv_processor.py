@@ -1,38 +1,105 @@
 from csv import DictReader
+from typing import NamedTuple, Optional
+
+
+class CsvItem(NamedTuple):
+    """An item row of the csv file, with the optional columns filled in."""
+
+    line: int
+    group_name: Optional[str]
+    group_display_name: Optional[str]
+    name: Optional[str]
+    display_name: Optional[str]
+    image_name: Optional[str]
+    image_description: Optional[str]
 
 
 class CsvProcessor:
-    """A special validation class to validate a csv file used to upload images."""
+    """A special validation class to validate a csv file used to upload images.
 
-    def create_config_from_csv(self, file):
-        """Expand and restructure the data."""
+    The rows are read one at a time so only a chunk of items needs to be held in memory, however large the file is.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1000
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE) -> None:
+        """Initialise the processor.
+
+        Args:
+            chunk_size (int, optional): Number of items in each chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        """
+        self.chunk_size = chunk_size
+
+    def iter_items(self, file):
+        """Read the items of the csv file one row at a time.
+
+        Values missing from a short row are None, they are reported by the validation.
+
+        Args:
+            file (string): Path to the csv file
+
+        Yields:
+            CsvItem: Item of the next row, with the line number of the row in the file
+        """
         with open(file, mode='r') as csv_input:
-            by_group = {}
             image_data = DictReader(csv_input)
             image_data.fieldnames = [x.lower() for x in image_data.fieldnames]
             for entry in image_data:
-                if "item name" not in entry:
-                    entry["item name"] = entry["item display name"].lower().replace(" ", "_")
-                if "group display name" not in entry:
-                    entry["group display name"] = "default"
-                if "group name" not in entry:
-                    entry["group name"] = entry["group display name"].lower().replace(" ", "_")
-                if entry["group name"] not in by_group:
-                    by_group[entry["group name"]] = {
-                        "name": entry["group name"],
-                        "displayName": entry["group display name"],
-                        "items": [],
-                    }
-                item = {
-                    "name": entry["item name"],
-                    "displayName": entry["item display name"],
-                    "imageName": entry["image"],
-                    "imageDescription": entry.get("item description", None),
+                display_name = entry.get("item display name")
+                name = entry.get("item name")
+                if name is None and display_name is not None:
+                    name = display_name.lower().replace(" ", "_")
+                group_display_name = entry.get("group display name", "default")
+                group_name = entry.get("group name")
+                if group_name is None and group_display_name is not None:
+                    group_name = group_display_name.lower().replace(" ", "_")
+                description = entry.get("item description", None)
+                if description in ['None', 'none']:
+                    description = None
+                yield CsvItem(
+                    image_data.line_num,
+                    group_name,
+                    group_display_name,
+                    name,
+                    display_name,
+                    entry.get("image"),
+                    description,
+                )
+
+    def iter_chunks(self, file):
+        """Read the items of the csv file in chunks.
+
+        Args:
+            file (string): Path to the csv file
+
+        Yields:
+            list: The next chunk_size items, fewer for the last chunk
+        """
+        chunk = []
+        for item in self.iter_items(file):
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def create_config_from_csv(self, file):
+        """Expand and restructure the data."""
+        by_group = {}
+        for entry in self.iter_items(file):
+            if entry.group_name not in by_group:
+                by_group[entry.group_name] = {
+                    "name": entry.group_name,
+                    "displayName": entry.group_display_name,
+                    "items": [],
                 }
-                if item["imageDescription"] in ['None', 'none']:
-                    item["imageDescription"] = None
-                by_group[entry["group name"]]["items"].append(item)
-            groups = []
-            for entry in by_group:
-                groups.append(by_group[entry])
+            item = {
+                "name": entry.name,
+                "displayName": entry.display_name,
+                "imageName": entry.image_name,
+                "imageDescription": entry.image_description,
+            }
+            by_group[entry.group_name]["items"].append(item)
+        groups = list(by_group.values())
         return {"groups": groups, "weightConfiguration": "equal"}
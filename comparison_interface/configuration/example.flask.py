@@ -25,7 +25,19 @@ class Settings(object):
         'study_db': 'sqlite:///database.db',
     }
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Run on each new connection to the databases, set to {} to keep the SQLite defaults
+    SQLITE_PRAGMAS = {
+        'busy_timeout': 5000,  # Milliseconds a worker waits for the lock held by another one
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -16 * 1024,  # KiB
+        'temp_store': 'memory',
+    }
     SESSION_MINUTES_VALIDITY = 240  # Session expires after 4 hours of inactivity
+    INTEGRITY_CHECK_SECONDS = 10  # Seconds between two checks of the configuration file by each worker
+    WARM_UP_BEFORE_FORK = get_bool_value('WARM_UP_BEFORE_FORK', False)
+    STUDY_TEMPLATE_DIR = 'study_templates'  # Template databases used by setup and reset, None to always rebuild
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'strict'
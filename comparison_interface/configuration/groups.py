@@ -0,0 +1,122 @@
+"""Compact array-backed representation of the groups of the comparison configuration."""
+
+import sys
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class ItemConfiguration(NamedTuple):
+    """An item of a group of the comparison configuration."""
+
+    item_id: Optional[int]
+    name: str
+    display_name: str
+    image_name: str
+    image_description: Optional[str]
+
+
+class GroupConfiguration:
+    """A group of the comparison configuration, with its items and its custom weights.
+
+    The custom weights of a group can define up to 499500 item pairs, so rather than as one dictionary per pair they
+    are held as an array of int32 pairs of item positions and an array of float32 weights. The item names are interned
+    so each one is only stored once however many pairs it appears in.
+    """
+
+    __slots__ = ("name", "display_name", "items", "weight_pairs", "weights")
+
+    def __init__(self, name, display_name, items, weight_pairs=None, weights=None) -> None:
+        """Initialise the group.
+
+        Args:
+            name (str): Group name
+            display_name (str): Group display name
+            items (tuple): ItemConfiguration of each item of the group
+            weight_pairs (numpy.ndarray, optional): Positions of the items of each weighted pair, shape (n, 2)
+            weights (numpy.ndarray, optional): Weight of each pair. Defaults to None when there are no custom weights.
+        """
+        self.name = name
+        self.display_name = display_name
+        self.items = items
+        self.weight_pairs = weight_pairs
+        self.weights = weights
+
+    @classmethod
+    def from_config(cls, group):
+        """Build the group from its section of the configuration file.
+
+        Args:
+            group (dict): Group section of the comparison configuration
+
+        Returns:
+            GroupConfiguration: The group
+        """
+        items = tuple(
+            ItemConfiguration(
+                i.get("id"),
+                sys.intern(i["name"]),
+                i["displayName"],
+                i["imageName"],
+                i.get("imageDescription"),
+            )
+            for i in group["items"]
+        )
+        if "weight" not in group:
+            return cls(group["name"], group["displayName"], items)
+
+        positions = {item.name: position for position, item in enumerate(items)}
+        weights = group["weight"]
+        weight_pairs = np.fromiter(
+            (positions[w[key]] for w in weights for key in ("item_1", "item_2")),
+            dtype=np.int32,
+            count=2 * len(weights),
+        ).reshape(-1, 2)
+        values = np.fromiter((float(w["weight"]) for w in weights), dtype=np.float32, count=len(weights))
+        return cls(group["name"], group["displayName"], items, weight_pairs, values)
+
+    @classmethod
+    def from_csv_items(cls, csv_items):
+        """Build the groups from the items of a csv file, in the order they first appear in the file.
+
+        Args:
+            csv_items (iterable): CsvItem of each row of the file
+
+        Returns:
+            tuple: GroupConfiguration of each group
+        """
+        groups = {}
+        for i in csv_items:
+            if i.group_name not in groups:
+                groups[i.group_name] = (i.group_display_name, [])
+            item = ItemConfiguration(None, sys.intern(i.name), i.display_name, i.image_name, i.image_description)
+            groups[i.group_name][1].append(item)
+        return tuple(cls(name, display_name, tuple(items)) for name, (display_name, items) in groups.items())
+
+    def has_custom_weights(self):
+        """Check whether custom weights were defined for the group.
+
+        Returns:
+            bool: True if the group has custom weights
+        """
+        return self.weights is not None
+
+    def iter_weight_positions(self, start=0, stop=None):
+        """Iterate through the custom weights of the group, with the positions of the items in the group.
+
+        The weights are returned with the shortest decimal representation of their float32 value, so a weight of 0.1
+        in the configuration file is still 0.1.
+
+        Args:
+            start (int, optional): Position of the first weight. Defaults to 0.
+            stop (int, optional): Position after the last weight. Defaults to None for all of the remaining weights.
+
+        Yields:
+            int: Position of the first item
+            int: Position of the second item
+            float: Weight of the pair
+        """
+        if self.weights is None:
+            return
+        for (first, second), weight in zip(self.weight_pairs[start:stop].tolist(), self.weights[start:stop]):
+            yield first, second, float(str(weight))
@@ -0,0 +1,144 @@
+"""Checks of the item images, run in parallel and cached between runs."""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+
+class ImageChecks:
+    """Check that the item images exist and are large enough.
+
+    The result of each check is kept with the modification time and size of the image so an image is only opened again
+    once it has been replaced. Each application keeps its own results, which are saved to a cache file in its instance
+    folder so they are also reused by later commands.
+    """
+
+    # Allowed Items Image size
+    MIN_WIDTH = 300
+    MIN_HEIGHT = 300
+    # Name of the cache file in the instance folder of the application
+    CACHE_FILE = "image_checks.json"
+    # Name of the application attribute holding the results
+    APP_ATTRIBUTE = "image_checks"
+
+    _lock = threading.Lock()
+
+    def __init__(self, filepath=None) -> None:
+        """Initialise the checks, loading the results saved by previous runs.
+
+        Args:
+            filepath (string, optional): Path of the cache file. Defaults to None, the results are not saved.
+        """
+        self.filepath = filepath
+        self._results_lock = threading.Lock()
+        # Image path mapped to the modification time and size of the image and the error found, None if it is valid
+        self._results = {}
+        self._modified = False
+        self.load()
+
+    @classmethod
+    def get(cls, app):
+        """Get the image checks of the application, cached in its instance folder.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            ImageChecks: Image checks of the application
+        """
+        with cls._lock:
+            checks = getattr(app, cls.APP_ATTRIBUTE, None)
+            if checks is None:
+                checks = cls(os.path.join(app.instance_path, cls.CACHE_FILE))
+                setattr(app, cls.APP_ATTRIBUTE, checks)
+        return checks
+
+    @classmethod
+    def image_path(cls, image_name):
+        """Get the path of an item image.
+
+        Args:
+            image_name (string): Image file name, relative to the images folder
+
+        Returns:
+            string: Path of the image
+        """
+        return os.path.abspath(os.path.dirname(__file__)) + "/../static/images/" + image_name
+
+    def error(self, image_name):
+        """Check an image, reusing the previous result if the image has not changed since.
+
+        Args:
+            image_name (string): Image file name, relative to the images folder
+
+        Returns:
+            string: Description of the problem found | None if the image is valid
+        """
+        path = self.image_path(image_name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return f"Image {image_name} not found in static/images/ folder."
+
+        key = [stat.st_mtime_ns, stat.st_size]
+        result = self._results.get(path)
+        if result is not None and result[:2] == key:
+            return result[2]
+
+        error = None
+        try:
+            # Only the header of the image is read to get its size
+            with Image.open(path) as im:
+                h, w = im.size
+            if h < self.MIN_HEIGHT or w < self.MIN_WIDTH:
+                error = f"All item images must be at least {self.MIN_HEIGHT}x{self.MIN_WIDTH}px"
+        except Exception as e:
+            error = str(e)
+        with self._results_lock:
+            self._results[path] = key + [error]
+            self._modified = True
+        return error
+
+    def check_all(self, image_names, workers=None):
+        """Check several images in parallel threads so the results are ready when each item is validated.
+
+        Args:
+            image_names (list): Image file names, relative to the images folder
+            workers (int, optional): Number of threads. Defaults to the ThreadPoolExecutor default.
+
+        Returns:
+            dict: Image file names mapped to the problem found, only for the invalid images
+        """
+        image_names = list(dict.fromkeys(image_names))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = executor.map(self.error, image_names)
+            return {name: error for name, error in zip(image_names, errors) if error is not None}
+
+    def load(self):
+        """Load the results saved by previous runs, a missing or invalid cache file is ignored."""
+        if self.filepath is None:
+            return
+        try:
+            with open(self.filepath, mode='r', encoding='utf-8') as cache_file:
+                results = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        with self._results_lock:
+            for path, result in results.items():
+                self._results.setdefault(path, result)
+
+    def save(self):
+        """Save the results if any image has been checked since they were last saved."""
+        with self._results_lock:
+            if self.filepath is None or not self._modified:
+                return
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            # Replace the file in one step so another process never reads a partial file
+            temporary_filepath = f"{self.filepath}.{os.getpid()}.tmp"
+            with open(temporary_filepath, mode='w', encoding='utf-8') as cache_file:
+                json.dump(self._results, cache_file)
+            os.replace(temporary_filepath, self.filepath)
+            self._modified = False
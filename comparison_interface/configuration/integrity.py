@@ -0,0 +1,120 @@
+"""Per-process guard stopping the website when the configuration file is modified after the setup."""
+
+import time
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import WebsiteControl
+
+from .website import Settings as WS
+
+
+class IntegrityGuard:
+    """Check that the website configuration files have not been modified since the setup command was executed.
+
+    The content hash of the configuration files is compared with the hash recorded by the setup the first time the
+    guard is used and whenever the study has been set up again since. Otherwise only the configuration version counter
+    of the website control table is read, and only once the check interval has passed, so every server of a
+    deployment can verify its own copy of the files without relying on their modification dates. A failed check is
+    never cached so the website refuses to serve requests until the study is set up again.
+    """
+
+    # Name of the application attribute holding the guard
+    APP_ATTRIBUTE = "integrity_guard"
+    # Flask configuration key and default value of the number of seconds between two checks
+    CHECK_INTERVAL = "INTEGRITY_CHECK_SECONDS"
+    DEFAULT_CHECK_INTERVAL = 10
+
+    def __init__(self) -> None:
+        """Initialise the guard without any successful check."""
+        self.checked = None
+        self.configuration_file = None
+        self.configuration_version = None
+
+    @classmethod
+    def get(cls, app):
+        """Get the guard of the application, creating it if needed.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            IntegrityGuard: Integrity guard of the application
+        """
+        guard = getattr(app, cls.APP_ATTRIBUTE, None)
+        if guard is None:
+            guard = cls()
+            setattr(app, cls.APP_ATTRIBUTE, guard)
+        return guard
+
+    @classmethod
+    def invalidate(cls, app):
+        """Discard the result of the last check so the next request checks the configuration again.
+
+        Args:
+            app (Flask app): Flask application
+        """
+        setattr(app, cls.APP_ATTRIBUTE, None)
+
+    def validate(self, app):
+        """Check the integrity of the application unless it was checked successfully less than an interval ago.
+
+        Args:
+            app (Flask app): Flask application
+
+        Raises:
+            RuntimeError: The application has not been set up or the configuration file has been modified since
+        """
+        now = time.monotonic()
+        if (
+            self.checked is not None
+            and now - self.checked < app.config.get(self.CHECK_INTERVAL, self.DEFAULT_CHECK_INTERVAL)
+            and app.config.get(WS.CONFIGURATION_LOCATION) == self.configuration_file
+        ):
+            return
+        self.checked = None
+        self._check(app)
+        self.checked = now
+
+    def _check(self, app):
+        """Compare the content of the configuration files with the content used by the setup, if it has changed.
+
+        Args:
+            app (Flask app): Flask application
+
+        Raises:
+            RuntimeError: The application has not been set up or the configuration file has been modified since
+        """
+        with app.app_context():
+            try:
+                # The files only need to be checked again if the study has been set up again
+                query = (
+                    db.select(WebsiteControl.configuration_file, WebsiteControl.configuration_version)
+                    .order_by(WebsiteControl.website_control_id.desc())
+                    .limit(1)
+                )
+                configuration_file, version = db.session.execute(query).one()
+                if (
+                    configuration_file == self.configuration_file == app.config.get(WS.CONFIGURATION_LOCATION)
+                    and version == self.configuration_version
+                ):
+                    return
+
+                conf = WebsiteControl().get_conf()
+                WS.set_configuration_location(app, conf.configuration_file)
+                fingerprint = WS.get_configuration_fingerprint(app)
+            except Exception as e:
+                app.logger.critical(str(e))
+                raise RuntimeError("Application not yet initialised. Please read the README.md file for instructions.")
+
+        # Stop the server execution if the configuration file was modified after the setup of the application.
+        if fingerprint != conf.configuration_hash:
+            app.logger.critical(
+                "The configuration file cannot be modified after the website has been initialised "
+                "with the setup command. The content of %s is not the one used by the setup executed on: %s UTC. "
+                "Please execute >Flask setup< again if you want to re-initialise the database."
+                % (conf.configuration_file, conf.setup_exec_date.strftime("%m/%d/%Y, %H:%M:%S"))
+            )
+            raise RuntimeError("Application unhealthy state. Please contact the website administrator.")
+
+        self.configuration_file = conf.configuration_file
+        self.configuration_version = conf.configuration_version
@@ -1,12 +1,13 @@
-import itertools
-import os
 import re
+from typing import NamedTuple
 
+import numpy as np
+from flask import current_app, has_app_context
 from marshmallow import Schema, ValidationError, fields, post_load, validate, validates
-from PIL import Image
 
 from comparison_interface.db.models import WebsiteControl
 
+from .images import ImageChecks
 from .website import Settings as WS
 
 
@@ -19,10 +20,6 @@ class Item(Schema):
     imageName = fields.Str(required=True, validate=[validate.Length(min=1, max=500)])
     imageDescription = fields.Str(required=False, allow_none=True)
 
-    # Allowed Items Image size
-    MIN_WIDTH = 300
-    MIN_HEIGHT = 300
-
     @validates('name')
     def _validate_name(self, name, data_key):
         match = re.match(r'^[a-zA-Z0-9_-]+$', name)
@@ -36,17 +33,11 @@ class Item(Schema):
 
     @validates('imageName')
     def _validate_image_path(self, image_name, data_key):
-        path = os.path.abspath(os.path.dirname(__file__)) + "/../static/images/" + image_name
-        if not os.path.exists(path):
-            raise ValidationError(f"Image {image_name} not found in static/images/ folder.")
-
-        try:
-            im = Image.open(path)
-            h, w = im.size
-            if h < self.MIN_HEIGHT or w < self.MIN_WIDTH:
-                raise ValidationError(f"All item images must be at least {self.MIN_HEIGHT}x{self.MIN_WIDTH}px")
-        except Exception as e:
-            raise ValidationError(str(e))
+        # The results of the application are reused, outside of it the image is just checked
+        checks = ImageChecks.get(current_app) if has_app_context() else ImageChecks()
+        error = checks.error(image_name)
+        if error is not None:
+            raise ValidationError(error)
 
 
 class Weight(Schema):
@@ -66,13 +57,79 @@ class Weight(Schema):
             )
 
 
+class PairWeights(NamedTuple):
+    """Custom weights of a group loaded by the WeightList field, one entry per item pair."""
+
+    item_1: list
+    item_2: list
+    weight: np.ndarray
+
+
+class WeightList(fields.Field):
+    """List of custom item pair weights validated in bulk.
+
+    Loading each of the up to 499500 weights of a group with the nested Weight schema is very slow, so the entries are
+    checked in a single pass with the same rules and loaded as PairWeights columns. The Weight schema is only used to
+    describe the problems of the entries which are not valid.
+    """
+
+    KEYS = {"item_1", "item_2", "weight"}
+    # Maximum number of invalid entries described in the error
+    MAX_ERRORS = 5
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        if not isinstance(value, list):
+            raise ValidationError("Not a valid list.")
+        validate.Length(min=1, max=499500)(value)
+
+        valid_names = {}
+        item_1, item_2, weight = [], [], []
+        errors = {}
+        for index, w in enumerate(value):
+            if (
+                isinstance(w, dict)
+                and w.keys() == self.KEYS
+                and self._is_valid_name(w["item_1"], valid_names)
+                and self._is_valid_name(w["item_2"], valid_names)
+                and type(w["weight"]) in (int, float)
+                and 0.0 <= w["weight"] <= 1.0
+            ):
+                loaded = w
+            else:
+                # describe the problem, the Weight schema may also accept some values, such as numeric strings
+                try:
+                    loaded = Weight().load(w)
+                except ValidationError as err:
+                    if len(errors) < self.MAX_ERRORS:
+                        errors[index] = err.messages
+                    else:
+                        break
+                    continue
+            item_1.append(loaded["item_1"])
+            item_2.append(loaded["item_2"])
+            weight.append(loaded["weight"])
+        if errors:
+            raise ValidationError(errors)
+        return PairWeights(item_1, item_2, np.asarray(weight, dtype=np.float64))
+
+    @staticmethod
+    def _is_valid_name(name, valid_names):
+        if not isinstance(name, str):
+            return False
+        valid = valid_names.get(name)
+        if valid is None:
+            valid = 1 <= len(name) <= 200 and re.match(r'^[a-z0-9_-]+$', name) is not None
+            valid_names[name] = valid
+        return valid
+
+
 class Group(Schema):
     """The schema for a Group."""
 
     name = fields.Str(required=True, validate=[validate.Length(min=1, max=200)])
     displayName = fields.Str(required=True, validate=[validate.Length(min=1, max=200)])
     items = fields.List(fields.Nested(Item()), required=True, validate=[validate.Length(min=1, max=1000)])
-    weight = fields.List(fields.Nested(Weight()), required=False, validate=[validate.Length(min=1, max=499500)])
+    weight = WeightList(required=False)
 
     @validates('items')
     def _validate_unique_names(self, items, data_key):
@@ -100,10 +157,7 @@ class Group(Schema):
 
     @validates('weight')
     def _validate_weight_sum(self, weights, data_key):
-        w = 0
-        for g in weights:
-            w += g['weight']
-
+        w = float(np.sum(weights.weight))
         if w < 0.98 or w > 1.02:
             raise ValidationError(f"Custom weights for item's pairs must sum close to 1. Actual weight sum {w}.")
 
@@ -113,25 +167,41 @@ class Group(Schema):
             return data
 
         # Validate item pairs name when defined
-        items = data['items']
+        items_name = [i['name'] for i in data['items']]
+        index = {name: i for i, name in enumerate(items_name)}
         weights = data['weight']
-        items_name = [i['name'] for i in items]
-        pairs = []
-        for w in weights:
-            if w['item_1'] not in items_name:
-                raise ValidationError(f"{w['item_1']} not defined as item name.")
-            if w['item_2'] not in items_name:
-                raise ValidationError(f"{w['item_2']} not defined as item name.")
-
-            # The order of the pair is important to validate the combinations
-            pairs.append((w['item_1'], w['item_2']))
-            pairs.append((w['item_2'], w['item_1']))
+        first = np.array([index.get(name, -1) for name in weights.item_1], dtype=np.int64)
+        second = np.array([index.get(name, -1) for name in weights.item_2], dtype=np.int64)
+        unknown = np.flatnonzero((first < 0) | (second < 0))
+        if unknown.size > 0:
+            k = unknown[0]
+            name = weights.item_1[k] if first[k] < 0 else weights.item_2[k]
+            raise ValidationError(f"{name} not defined as item name.")
+
+        same = np.flatnonzero(first == second)
+        if same.size > 0:
+            pair = (weights.item_1[same[0]], weights.item_2[same[0]])
+            raise ValidationError(f"Custom weight for item pair {pair} must be between two different items.")
+
+        # Count the weights of each pair in the upper triangle of the item matrix, in either order
+        n = len(items_name)
+        low = np.minimum(first, second)
+        high = np.maximum(first, second)
+        counts = np.bincount(low * n + high, minlength=n * n).reshape(n, n)
+        duplicated = np.argwhere(counts > 1)
+        if duplicated.size > 0:
+            pair = (items_name[duplicated[0, 0]], items_name[duplicated[0, 1]])
+            raise ValidationError(f"Custom weight for item pair {pair} is defined more than once.")
 
         # Validate that a weight was custom defined for all item pairs
-        possible_pair_combinations = list(itertools.combinations(items_name, 2))
-        for pair in possible_pair_combinations:
-            if pair not in pairs:
-                raise ValidationError(f"Custom weight for item pair {pair} needs to be defined.")
+        missing = np.argwhere(np.triu(counts == 0, k=1))
+        if missing.size > 0:
+            pairs = [(items_name[i], items_name[j]) for i, j in missing[: WeightList.MAX_ERRORS]]
+            if len(missing) == 1:
+                raise ValidationError(f"Custom weight for item pair {pairs[0]} needs to be defined.")
+            listed = ", ".join(str(pair) for pair in pairs)
+            more = f" and {len(missing) - len(pairs)} more" if len(missing) > len(pairs) else ""
+            raise ValidationError(f"Custom weights for item pairs {listed}{more} need to be defined.")
         return data
 
     @validates('name')
@@ -172,9 +242,10 @@ class ComparisonConfiguration(Schema):
             groups = data['groups']
             item_weight_conf = sum([1 if "weight" in g else 0 for g in groups])
 
-            if item_weight_conf != 0 and weight_conf == WebsiteControl.EQUAL_WEIGHT:
+            if item_weight_conf != 0 and weight_conf != WebsiteControl.CUSTOM_WEIGHT:
                 raise ValidationError(
-                    "Custom weight configuration is not allowed when the weight configuration was defined as 'equal'."
+                    "Custom weight configuration is not allowed when the weight configuration was defined as "
+                    f"'{weight_conf}'."
                 )
 
             if item_weight_conf != len(groups) and weight_conf == WebsiteControl.CUSTOM_WEIGHT:
@@ -325,6 +396,8 @@ class BehaviourConfiguration(Schema):
     allowTies = fields.Boolean(required=True)
     allowSkip = fields.Boolean(required=True)
     allowBack = fields.Boolean(required=True)
+    noRepeatPairs = fields.Boolean(required=False)
+    pairQueueLength = fields.Integer(required=False, validate=[validate.Range(min=1, max=1000)])
     userInstructionHtml = fields.Str(required=False, validate=[validate.Length(min=1, max=100)])
     userEthicsAgreementHtml = fields.Str(required=False, validate=[validate.Length(min=1, max=100)])
     sitePoliciesHtml = fields.Str(required=False, validate=[validate.Length(min=1, max=100)])
@@ -373,6 +446,14 @@ class Configuration(Schema):
                     "User item preference section cannot be rendered when defining a manual weight configuration. "
                     "Please change renderUserItemPreferencePage to false"
                 )
+            if (
+                weight_conf in [WebsiteControl.ADAPTIVE_WEIGHT, WebsiteControl.BALANCED_WEIGHT]
+                and render_item_preference
+            ):
+                raise ValidationError(
+                    f"User item preference section cannot be rendered when defining a {weight_conf} weight "
+                    "configuration. Please change renderUserItemPreferencePage to false"
+                )
 
         # Check that if we want to show the item selection page we have the required text field too
         if render_item_preference and ('itemSelectionQuestionLabel' not in data['websiteTextConfiguration']):
@@ -4,53 +4,158 @@ from csv import DictReader
 from marshmallow import ValidationError
 
 from .csv_processor import CsvProcessor
-from .schema import ComparisonConfiguration as CompSchema
+from .images import ImageChecks
 from .schema import Configuration as ConfigSchema
+from .schema import Group as GroupSchema
+from .schema import Item as ItemSchema
 from .website import Settings as WS
 
 
 class Validation:
     """A Validator for the config file."""
 
+    # Maximum number of csv rows reported with errors
+    MAX_CSV_ERRORS = 100
+    # Limits of the comparison configuration schema
+    MAX_GROUPS = 100
+    MAX_GROUP_ITEMS = 1000
+
     def __init__(self, app) -> None:
         """Initialise the Validation with the Flask app."""
         self.__app = app
 
     def validate(self) -> list:
         """Validate the configuration file or directory."""
-        conf = WS.get_configuration(self.__app)
+        # always read the file again as it may have been replaced since it was last loaded
+        conf = WS.reload_configuration(self.__app)
         # now add the keys from the language file if they are not in the project file so we can validate the full set
-        # all the keys have to be in at least one of them for the validation to pass
+        # all the keys have to be in at least one of them for the validation to pass. The shared configuration object
+        # is not modified, the full set is built in a copy.
+        full_conf = conf
         if "websiteTextConfiguration" in self.__app.language_config:
             if "websiteTextConfiguration" in conf:
-                for key in self.__app.language_config["websiteTextConfiguration"]:
-                    if key not in conf["websiteTextConfiguration"]:
-                        conf["websiteTextConfiguration"][key] = self.__app.language_config["websiteTextConfiguration"][
-                            key
-                        ]
+                full_conf = {
+                    **conf,
+                    "websiteTextConfiguration": {
+                        **self.__app.language_config["websiteTextConfiguration"],
+                        **conf["websiteTextConfiguration"],
+                    },
+                }
+        self.check_images(conf.get("comparisonConfiguration"))
         schema = ConfigSchema()
         try:
-            schema.load(conf)
+            schema.load(full_conf)
         except ValidationError:
             raise
         else:
-            # now we have validated, reload the config so that we just have the project
-            conf = WS.get_configuration(self.__app, True)
             # now if we reference a csv file validate that
             if "csvFile" in conf["comparisonConfiguration"]:
                 config_location = WS.get_configuration_location(self.__app)
                 # check the csv file structure is good enough.
                 self.validate_csv_structure(os.path.join(config_location, conf["comparisonConfiguration"]["csvFile"]))
                 self.__app.logger.info("structure of csv file is good")
-                # structure is fine so read the contents and send it to the comparisonConfiguration schema validator
-                config = CsvProcessor().create_config_from_csv(
-                    os.path.join(config_location, conf["comparisonConfiguration"]["csvFile"])
-                )
-                schema = CompSchema()
-                try:
-                    schema.load(config)
-                except ValidationError:
-                    raise
+                # structure is fine so validate the contents one chunk of rows at a time
+                self.validate_csv_content(os.path.join(config_location, conf["comparisonConfiguration"]["csvFile"]))
+
+    def check_images(self, comparison_conf):
+        """Check all of the item images of the comparison configuration in parallel before the schema validation.
+
+        The results are cached in the instance folder so the images which have not changed since a previous run are
+        not opened again, and the schema validation of each item only looks up the result.
+
+        Args:
+            comparison_conf (dict): Comparison configuration
+        """
+        if not isinstance(comparison_conf, dict) or not isinstance(comparison_conf.get("groups"), list):
+            return
+        # the schema reports any malformed entries so they are just ignored here
+        image_names = []
+        for group in comparison_conf["groups"]:
+            items = group.get("items") if isinstance(group, dict) else None
+            for item in items if isinstance(items, list) else []:
+                if isinstance(item, dict) and isinstance(item.get("imageName"), str):
+                    image_names.append(item["imageName"])
+        checks = ImageChecks.get(self.__app)
+        checks.check_all(image_names)
+        try:
+            checks.save()
+        except OSError as e:
+            self.__app.logger.warning("The image checks could not be cached: %s" % (e))
+
+    def validate_csv_content(self, file, chunk_size=CsvProcessor.DEFAULT_CHUNK_SIZE):
+        """Validate the items of the provided csv file with the item and group schemas, streaming the rows.
+
+        The images of each chunk of rows are checked in parallel and only the names of the items seen so far are kept,
+        so the memory used doesn't depend on the size of the file. The validation stops at the end of the chunk in
+        which MAX_CSV_ERRORS rows with errors have been found.
+
+        Args:
+            file (string): Path to the csv file
+            chunk_size (int, optional): Number of rows read at a time. Defaults to CsvProcessor.DEFAULT_CHUNK_SIZE.
+
+        Raises:
+            ValidationError: The errors found keyed by the line number of their row, under the csvFile key
+        """
+        item_schema = ItemSchema()
+        group_schema = GroupSchema(only=("name", "displayName"))
+        item_names = {}
+        errors = {}
+        checks = ImageChecks.get(self.__app)
+        for chunk in CsvProcessor(chunk_size).iter_chunks(file):
+            checks.check_all([i.image_name for i in chunk if isinstance(i.image_name, str)])
+            for i in chunk:
+                messages = self._validate_csv_item(i, item_names, item_schema, group_schema)
+                if messages:
+                    errors[i.line] = messages
+            if len(errors) >= self.MAX_CSV_ERRORS:
+                break
+        try:
+            checks.save()
+        except OSError as e:
+            self.__app.logger.warning("The image checks could not be cached: %s" % (e))
+
+        if len(item_names) == 0:
+            raise ValidationError({"csvFile": ["The csv file must contain at least one item."]})
+        if errors:
+            raise ValidationError({"csvFile": errors})
+
+    def _validate_csv_item(self, i, item_names, item_schema, group_schema):
+        """Validate a row of the csv file.
+
+        Args:
+            i (CsvItem): Item of the row
+            item_names (dict): Group names mapped to the set of the names of the items of the group read so far
+            item_schema (Item): Schema validating the item
+            group_schema (Group): Schema validating the group name and display name
+
+        Returns:
+            dict: Error messages for each field, empty if the row is valid
+        """
+        messages = {}
+        if i.group_name not in item_names:
+            item_names[i.group_name] = set()
+            messages.update(group_schema.validate({"name": i.group_name, "displayName": i.group_display_name}))
+            if len(item_names) > self.MAX_GROUPS:
+                messages["group name"] = [f"The csv file can have at most {self.MAX_GROUPS} groups."]
+
+        item = {
+            "name": i.name,
+            "displayName": i.display_name,
+            "imageName": i.image_name,
+            "imageDescription": i.image_description,
+        }
+        for field, field_messages in item_schema.validate({k: v for k, v in item.items() if v is not None}).items():
+            messages.setdefault(field, []).extend(field_messages)
+
+        group_items = item_names[i.group_name]
+        if i.name in group_items:
+            messages.setdefault("name", []).append(
+                "All items in the same group must have an unique name. Repeated name {}".format(i.name)
+            )
+        group_items.add(i.name)
+        if len(group_items) == self.MAX_GROUP_ITEMS + 1:
+            messages.setdefault("group name", []).append(f"A group can have at most {self.MAX_GROUP_ITEMS} items.")
+        return messages
 
     def check_config_path(self, path):
         """Check that the path provided meets the requirements.
@@ -1,14 +1,42 @@
+import hashlib
 import json
 import os
+from types import MappingProxyType
+from typing import NamedTuple, Optional
 
 from .csv_processor import CsvProcessor
+from .groups import GroupConfiguration
+
+
+class CompiledConfiguration(NamedTuple):
+    """Website configuration of an application, parsed and prepared for lookups once when it is loaded.
+
+    The behaviour values are also interpreted as booleans once, and the project text is merged with the language text
+    into a single table. The groups of the comparison configuration are held as GroupConfiguration objects and removed
+    from the configuration object, groups is None if they are not defined in the configuration file. Values derived
+    from the configuration, such as the layout text of each language, can be memoised in the memo dictionary and are
+    discarded with the rest of the object when the configuration is reloaded.
+    """
+
+    location: str
+    configuration: dict
+    behaviour: MappingProxyType
+    flags: MappingProxyType
+    project_text: MappingProxyType
+    text: MappingProxyType
+    groups: Optional[tuple]
+    memo: dict
 
 
 class Settings:
-    """The configuration settings for this instance of the website."""
+    """The configuration settings for this instance of the website.
 
-    # Json configuration object
-    configuration = None
+    The configuration is compiled once per application and kept in the application's `website_configuration`
+    attribute, so applications using different configuration locations don't share any state.
+    """
+
+    # Name of the application attribute holding the compiled configuration
+    APP_ATTRIBUTE = "website_configuration"
 
     # Configuration file key values
     CONFIGURATION_LOCATION = "CONFIG_LOC"
@@ -30,6 +58,8 @@ class Settings:
     BEHAVIOUR_ALLOW_TIES = "allowTies"
     BEHAVIOUR_ALLOW_SKIP = "allowSkip"
     BEHAVIOUR_ALLOW_BACK = "allowBack"
+    BEHAVIOUR_NO_REPEAT_PAIRS = "noRepeatPairs"
+    BEHAVIOUR_PAIR_QUEUE_LENGTH = "pairQueueLength"
     BEHAVIOUR_USER_INSTRUCTION_HTML = "userInstructionHtml"
     BEHAVIOUR_ETHICS_AGREEMENT_HTML = "userEthicsAgreementHtml"
     BEHAVIOUR_SITE_POLICIES_HTML = "sitePoliciesHtml"
@@ -124,7 +154,8 @@ class Settings:
             loc (string): Path for the configuration file
         """
         app.config[cls.CONFIGURATION_LOCATION] = loc
-        cls.configuration = None  # make sure we clear the settings from the previous location
+        # make sure we clear the settings from the previous setup, the file may have changed at the same location
+        setattr(app, cls.APP_ATTRIBUTE, None)
 
     @classmethod
     def get_configuration_location(cls, app):
@@ -155,32 +186,82 @@ class Settings:
         Returns:
             boolean: True if the label exists, False it if does not
         """
-        conf = cls.get_configuration(app)
-        if label in conf[cls.CONFIGURATION_WEBSITE_TEXT]:
-            return True
-        if label in conf[cls.CONFIGURATION_BEHAVIOUR]:
-            return True
-        return False
+        compiled = cls.get_compiled_configuration(app)
+        return label in compiled.project_text or label in compiled.behaviour
 
     @classmethod
-    def get_configuration(cls, app, force_reload=False):
-        """Get the website configuration.
+    def get_compiled_configuration(cls, app, force_reload=False):
+        """Get the compiled website configuration of the application, loading it if needed.
 
         Args:
             app (Flask app): Flask application
+            force_reload (bool, optional): Load the configuration file again. Defaults to False.
 
         Returns:
-            json: website configuration object
+            CompiledConfiguration: Compiled website configuration
         """
         if cls.CONFIGURATION_LOCATION not in app.config:
             app.logger.critical("Configuration location not set in the application yet")
             exit()
 
-        if cls.configuration is None or force_reload:
+        compiled = getattr(app, cls.APP_ATTRIBUTE, None)
+        location = app.config[cls.CONFIGURATION_LOCATION]
+        if compiled is None or compiled.location != location or force_reload:
             app.logger.info("Loading website configuration")
-            cls.configuration = cls._unmarshall(app)
+            compiled = cls._compile(app, location, cls._unmarshall(app))
+            setattr(app, cls.APP_ATTRIBUTE, compiled)
+
+        return compiled
+
+    @classmethod
+    def get_configuration(cls, app, force_reload=False):
+        """Get the website configuration.
+
+        The configuration object is shared by every user of the application so it must not be modified.
+
+        Args:
+            app (Flask app): Flask application
+            force_reload (bool, optional): Load the configuration file again. Defaults to False.
+
+        Returns:
+            json: website configuration object
+        """
+        return cls.get_compiled_configuration(app, force_reload).configuration
+
+    @classmethod
+    def reload_configuration(cls, app):
+        """Load the configuration file again and get the complete configuration object as it is in the file.
+
+        The compiled configuration doesn't keep the groups in the configuration object, this object is meant to be
+        validated and then discarded.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            json: website configuration object
+        """
+        configuration = cls._unmarshall(app)
+        compiled = cls._compile(app, app.config[cls.CONFIGURATION_LOCATION], configuration)
+        setattr(app, cls.APP_ATTRIBUTE, compiled)
+        return configuration
+
+    @classmethod
+    def memoise(cls, app, key, build):
+        """Get a value derived from the website configuration, building it the first time it is requested.
 
-        return cls.configuration
+        Args:
+            app (Flask app): Flask application
+            key (hashable): Key identifying the value
+            build (callable): Function building the value
+
+        Returns:
+            object: The value built for the current configuration
+        """
+        memo = cls.get_compiled_configuration(app).memo
+        if key not in memo:
+            memo[key] = build()
+        return memo[key]
 
     @classmethod
     def get_text(cls, label, app):
@@ -193,14 +274,10 @@ class Settings:
         Returns:
             string: Text configuration for the specified label
         """
-        conf = cls.get_configuration(app)
-
-        # first try the project configuration
-        if label in conf[cls.CONFIGURATION_WEBSITE_TEXT]:
-            return conf[cls.CONFIGURATION_WEBSITE_TEXT][label]
-        # now try the language configuration
-        if label in app.language_config[cls.CONFIGURATION_WEBSITE_TEXT]:
-            return app.language_config[cls.CONFIGURATION_WEBSITE_TEXT][label]
+        # the text table has the project configuration merged over the language configuration
+        text = cls.get_compiled_configuration(app).text
+        if label in text:
+            return text[label]
         # raise an error
         app.logger.critical(f"Label {label} wasn't found in the project configuration or the language configuration.")
         exit()
@@ -216,11 +293,7 @@ class Settings:
         Returns:
             string: Text configuration for the specified label or None is not supplied in config
         """
-        conf = cls.get_configuration(app)
-        if label not in conf[cls.CONFIGURATION_WEBSITE_TEXT]:
-            return None
-
-        return conf[cls.CONFIGURATION_WEBSITE_TEXT][label]
+        return cls.get_compiled_configuration(app).project_text.get(label)
 
     @classmethod
     def get_comparison_conf(cls, key, app):
@@ -233,22 +306,85 @@ class Settings:
             app (Flask app): Flask application
 
         Returns:
-            string: Configuration value for the requested key
+            string: Configuration value for the requested key, a tuple of GroupConfiguration for the groups
         """
-        conf = cls.get_configuration(app)
+        compiled = cls.get_compiled_configuration(app)
+        conf = compiled.configuration
         if "csvFile" in conf[cls.CONFIGURATION_COMPARISON]:
             # then we need to get the data from the csv file
-            location = cls.get_configuration_location(app)
-            filepath = os.path.join(location, conf[cls.CONFIGURATION_COMPARISON]["csvFile"])
-            data = CsvProcessor().create_config_from_csv(filepath)
-            return data[key]
+            return cls.get_csv_comparison_conf(app)[key]
+        elif key == cls.GROUPS and compiled.groups is not None:
+            return compiled.groups
         else:
-            conf = cls.get_configuration(app)
             if key not in conf[cls.CONFIGURATION_COMPARISON]:
                 app.logger.critical("Label %s wasn't found in the comparison configuration." % (key))
                 exit()
         return conf[cls.CONFIGURATION_COMPARISON][key]
 
+    @classmethod
+    def get_groups(cls, app):
+        """Get the groups of the comparison configuration, from the config file or from the csv file.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            tuple: GroupConfiguration of each group
+        """
+        return cls.get_comparison_conf(cls.GROUPS, app)
+
+    @classmethod
+    def get_csv_comparison_conf(cls, app):
+        """Get the comparison configuration built from the csv file referenced by the configuration file.
+
+        The csv file is only parsed again when its path, modification time or size changes. The result is shared by
+        every user of the application so it must not be modified.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            dict: Comparison configuration with the groups, as a tuple of GroupConfiguration, and the weight
+                configuration
+        """
+        compiled = cls.get_compiled_configuration(app)
+        filepath = os.path.join(
+            cls.get_configuration_location(app), compiled.configuration[cls.CONFIGURATION_COMPARISON]["csvFile"]
+        )
+        stat = os.stat(filepath)
+        stamp = (filepath, stat.st_mtime_ns, stat.st_size)
+        cached = compiled.memo.get("csv_comparison_conf")
+        if cached is None or cached[0] != stamp:
+            app.logger.info("Loading comparison configuration from %s" % (filepath))
+            groups = GroupConfiguration.from_csv_items(CsvProcessor().iter_items(filepath))
+            cached = (stamp, {cls.GROUPS: groups, cls.GROUP_WEIGHT_CONFIGURATION: "equal"})
+            compiled.memo["csv_comparison_conf"] = cached
+        return cached[1]
+
+    @classmethod
+    def get_configuration_fingerprint(cls, app):
+        """Get a hash of the content of the configuration file, and of the csv file if one is used.
+
+        Unlike the modification date of the files the hash is the same on every server the files are deployed to. The
+        files are read again on every call.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            string: Hexadecimal SHA-256 digest of the files
+        """
+        filepaths = [cls._get_configuration_file(app)]
+        comparison = cls.get_configuration(app)[cls.CONFIGURATION_COMPARISON]
+        if "csvFile" in comparison:
+            filepaths.append(os.path.join(cls.get_configuration_location(app), comparison["csvFile"]))
+        digest = hashlib.sha256()
+        for filepath in filepaths:
+            with open(filepath, 'rb') as file:
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
     @classmethod
     def get_user_conf(cls, app):
         """Get the configuration values related to the user profile.
@@ -278,12 +414,25 @@ class Settings:
         Returns:
             string: Configuration value related to the key
         """
-        conf = cls.get_configuration(app)
-        if key not in conf[cls.CONFIGURATION_BEHAVIOUR]:
+        behaviour = cls.get_compiled_configuration(app).behaviour
+        if key not in behaviour:
             app.logger.critical(f"Label {key} wasn't found in the behaviour configuration.")
             exit()
 
-        return conf[cls.CONFIGURATION_BEHAVIOUR][key]
+        return behaviour[key]
+
+    @classmethod
+    def get_optional_behaviour_conf(cls, key, app):
+        """Get the configuration value related to the behaviour of the website or None if not supplied.
+
+        Args:
+            key (string): configuration key required
+            app (Flask app): Flask application
+
+        Returns:
+            string: Configuration value related to the key or None if not supplied in config
+        """
+        return cls.get_compiled_configuration(app).behaviour.get(key)
 
     @classmethod
     def get_export_location(cls, app):
@@ -309,24 +458,80 @@ class Settings:
         Returns:
             boolean: True when the section should be rendered, False if not.
         """
-        render = cls.get_behaviour_conf(section, app)
-        return render == "true" or render == "True" or render == "1" or render is True
+        flags = cls.get_compiled_configuration(app).flags
+        if section not in flags:
+            app.logger.critical(f"Label {section} wasn't found in the behaviour configuration.")
+            exit()
+
+        return flags[section]
 
     @classmethod
-    def _unmarshall(cls, app):
-        """Load the configuration file into a JSON object.
+    def _compile(cls, app, location, configuration):
+        """Prepare the website configuration for lookups.
 
         Args:
             app (Flask app): Flask application
+            location (string): Configuration location the configuration was loaded from
+            configuration (JSON): Website configuration object
 
         Returns:
-            JSON: Website configuration object
+            CompiledConfiguration: Compiled website configuration
+        """
+        groups = None
+        comparison = configuration.get(cls.CONFIGURATION_COMPARISON)
+        if isinstance(comparison, dict) and cls.GROUPS in comparison:
+            try:
+                groups = tuple(GroupConfiguration.from_config(g) for g in comparison[cls.GROUPS])
+            except (AttributeError, KeyError, TypeError, ValueError):
+                # the groups are not valid, this is reported by the validation of the configuration
+                groups = None
+            else:
+                # only the compact groups are kept
+                comparison = {key: value for key, value in comparison.items() if key != cls.GROUPS}
+                configuration = {**configuration, cls.CONFIGURATION_COMPARISON: comparison}
+        behaviour = dict(configuration.get(cls.CONFIGURATION_BEHAVIOUR, {}))
+        project_text = dict(configuration.get(cls.CONFIGURATION_WEBSITE_TEXT, {}))
+        language_text = app.language_config.get(cls.CONFIGURATION_WEBSITE_TEXT, {})
+        flags = {key: value in ("true", "True", "1") or value is True for key, value in behaviour.items()}
+        return CompiledConfiguration(
+            location=location,
+            configuration=configuration,
+            behaviour=MappingProxyType(behaviour),
+            flags=MappingProxyType(flags),
+            project_text=MappingProxyType(project_text),
+            text=MappingProxyType({**language_text, **project_text}),
+            groups=groups,
+            memo={},
+        )
+
+    @classmethod
+    def _get_configuration_file(cls, app):
+        """Get the path of the configuration file, which may be inside the configuration location directory.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            string: Path to the JSON configuration file
         """
         location = cls.get_configuration_location(app)
         if os.path.isdir(location):
             for file in os.listdir(location):
                 if file.lower()[-5:] == ".json":
                     location = os.path.join(location, file)
+        return location
+
+    @classmethod
+    def _unmarshall(cls, app):
+        """Load the configuration file into a JSON object.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            JSON: Website configuration object
+        """
+        location = cls._get_configuration_file(app)
         config_data = None
         try:
             with open(location, 'r') as config_file:
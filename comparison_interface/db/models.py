@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy.schema import UniqueConstraint
+from sqlalchemy.schema import Index, UniqueConstraint
 
 from .connection import db
 
@@ -78,7 +78,11 @@ class ItemGroup(db.Model, BaseModel):
     group_id = db.Column(db.Integer, db.ForeignKey('group.group_id'), nullable=False)
     created_date = db.Column(db.DateTime(timezone=True), default=datetime.now)
 
-    __table_args__ = (UniqueConstraint('item_id', 'group_id', name='_item_group_uidx'),)
+    __table_args__ = (
+        UniqueConstraint('item_id', 'group_id', name='_item_group_uidx'),
+        # Items of the groups selected by a participant
+        Index('_item_group_group_idx', 'group_id', 'item_id'),
+    )
 
 
 class Participant(db.Model, BaseModel):
@@ -95,6 +99,9 @@ class Participant(db.Model, BaseModel):
     # Other user files are added automatically by using the Website configuration file
     created_date = db.Column(db.DateTime(timezone=True), default=datetime.now)
     completed_cycles = db.Column(db.Integer, server_default='0')
+    # Number of comparisons made (selected or tied) and skipped, kept up to date by the rank page
+    compared_count = db.Column(db.Integer, nullable=False, server_default='0')
+    skipped_count = db.Column(db.Integer, nullable=False, server_default='0')
 
 
 class ParticipantGroup(db.Model, BaseModel):
@@ -112,7 +119,11 @@ class ParticipantGroup(db.Model, BaseModel):
     participant_id = db.Column(db.Integer, db.ForeignKey('participant.participant_id'), nullable=False)
     created_date = db.Column(db.DateTime(timezone=True), default=datetime.now)
 
-    __table_args__ = (UniqueConstraint('group_id', 'participant_id', name='_participant_group_uidx'),)
+    __table_args__ = (
+        UniqueConstraint('group_id', 'participant_id', name='_participant_group_uidx'),
+        # Groups selected by a participant
+        Index('_participant_group_participant_idx', 'participant_id', 'group_id'),
+    )
 
 
 class Comparison(db.Model, BaseModel):
@@ -138,6 +149,24 @@ class Comparison(db.Model, BaseModel):
     state = db.Column(db.String(20), nullable=False)
     created = db.Column(db.DateTime(timezone=True), default=datetime.now)
     updated = db.Column(db.DateTime(timezone=True), default=datetime.now)
+    # Rejudged comparisons are numbered by the database in the order the rejudgements are committed, so the per-process
+    # scores can tell which ones they haven't seen yet without relying on the clock of each process
+    revision = db.Column(db.Integer, nullable=True, index=True)
+
+    # Comparisons made by a participant, counted by state on each rank page
+    __table_args__ = (Index('_comparison_participant_state_idx', 'participant_id', 'state'),)
+
+    @classmethod
+    def next_revision(cls):
+        """Get the revision of a comparison rejudged in the current transaction.
+
+        The revision is computed by the database when the comparison is written, while the transaction holds the write
+        lock, so the revisions are committed in increasing order.
+
+        Returns:
+            ScalarSelect: SQL expression of the next revision
+        """
+        return db.select(db.func.coalesce(db.func.max(cls.revision), 0) + 1).scalar_subquery()
 
 
 class CustomItemPair(db.Model, BaseModel):
@@ -179,7 +208,31 @@ class ParticipantItem(db.Model, BaseModel):
     known = db.Column(db.Boolean, nullable=False)  # 0 for unknown. 1 for know.
     date = db.Column(db.DateTime(timezone=True), default=datetime.now)
 
-    __table_args__ = (UniqueConstraint('participant_id', 'item_id', name='_participant_item_uidx'),)
+    __table_args__ = (
+        UniqueConstraint('participant_id', 'item_id', name='_participant_item_uidx'),
+        # Items known by a participant, read from the index alone
+        Index('_participant_item_known_idx', 'participant_id', 'known', 'item_id'),
+    )
+
+
+class QueuedPair(db.Model, BaseModel):
+    """Pairs of items selected in advance for a participant, served in order of insertion.
+
+    Args:
+        db (SQLAlchemy): SQLAlchemy connection object
+    """
+
+    __tablename__ = 'queued_pair'
+    __bind_key__ = "study_db"
+
+    queued_pair_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    participant_id = db.Column(db.Integer, db.ForeignKey('participant.participant_id'), nullable=False)
+    item_1_id = db.Column(db.Integer, db.ForeignKey('item.item_id'), nullable=False)
+    item_2_id = db.Column(db.Integer, db.ForeignKey('item.item_id'), nullable=False)
+    created = db.Column(db.DateTime(timezone=True), default=datetime.now)
+
+    # Pairs queued for a participant, the index entries are ordered by id within each participant
+    __table_args__ = (Index('_queued_pair_participant_idx', 'participant_id'),)
 
 
 class WebsiteControl(db.Model, BaseModel):
@@ -195,11 +248,17 @@ class WebsiteControl(db.Model, BaseModel):
     # Available weight configuration
     EQUAL_WEIGHT = 'equal'  # All items weights during the comparison are the same.
     CUSTOM_WEIGHT = 'manual'  # The weights of the items were manually assigned by the researcher.
+    ADAPTIVE_WEIGHT = 'adaptive'  # Pairs are chosen to be as informative as possible about the item strengths.
+    BALANCED_WEIGHT = 'balanced'  # Pairs are chosen to even out the number of judgements across items and pairs.
 
     website_control_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     weight_configuration = db.Column(db.String(20), nullable=False)
     configuration_file = db.Column(db.String(500), nullable=False)
     setup_exec_date = db.Column(db.DateTime(timezone=True), default=datetime.now)
+    # SHA-256 digest of the configuration files used by the setup
+    configuration_hash = db.Column(db.String(64), nullable=False)
+    # Number of times the study has been set up, so servers only need to check the files again when it changes
+    configuration_version = db.Column(db.Integer, nullable=False, default=1)
 
     def get_conf(self):
         """Get the website control configuration.
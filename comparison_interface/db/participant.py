@@ -0,0 +1,60 @@
+"""Per-process copy of the participant table, with the participant fields of the study."""
+
+import threading
+
+from sqlalchemy import MetaData, Table
+
+from .connection import db
+from .models import Participant
+
+
+class ParticipantTable:
+    """Participant table reflected from the study database, once per worker process.
+
+    The participant fields are added to the table by the setup command from the website configuration, so they are
+    not part of the Participant model. The table is reflected the first time a participant registers and again when the
+    study has been set up since, which is told by the configuration version of the website control table.
+    """
+
+    # Name of the application attribute holding the reflected table
+    APP_ATTRIBUTE = "participant_table"
+
+    _lock = threading.Lock()
+
+    def __init__(self, configuration_version) -> None:
+        """Reflect the participant table from the study database.
+
+        Args:
+            configuration_version (int): Configuration version of the study the table belongs to
+        """
+        self.configuration_version = configuration_version
+        # The bind key makes the database session execute the statements of the table on the study database
+        metadata = MetaData(info={"bind_key": "study_db"})
+        self.table = Table(Participant.__tablename__, metadata, autoload_with=db.engines["study_db"])
+
+    @classmethod
+    def get(cls, app, configuration_version):
+        """Get the participant table of the application, reflecting it again if the study has been set up since.
+
+        Args:
+            app (Flask app): Flask application
+            configuration_version (int): Configuration version of the current study
+
+        Returns:
+            Table: Participant table with the participant fields of the study
+        """
+        with cls._lock:
+            reflected = getattr(app, cls.APP_ATTRIBUTE, None)
+            if reflected is None or reflected.configuration_version != configuration_version:
+                reflected = cls(configuration_version)
+                setattr(app, cls.APP_ATTRIBUTE, reflected)
+        return reflected.table
+
+    @classmethod
+    def invalidate(cls, app):
+        """Discard the reflected table so it is reflected again for the next registration.
+
+        Args:
+            app (Flask app): Flask application
+        """
+        setattr(app, cls.APP_ATTRIBUTE, None)
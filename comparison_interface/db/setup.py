@@ -1,31 +1,56 @@
 """Setup the website database."""
 
+import hashlib
 import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
 
+from comparison_interface.configuration.integrity import IntegrityGuard
 from comparison_interface.configuration.website import Settings as WS
 
 from .connection import db, persist
-from .models import CustomItemPair, Group, Item, ItemGroup, WebsiteControl
+from .models import Comparison, CustomItemPair, Group, Item, ItemGroup, Participant, WebsiteControl
+from .participant import ParticipantTable
 
 
 class Setup:
     """Set up functions to create the application from the configuration."""
 
+    # Number of rows inserted by each statement
+    CHUNK_SIZE = 10000
+    # Flask configuration key of the folder of the template databases, relative to the instance folder
+    TEMPLATE_DIRECTORY = "STUDY_TEMPLATE_DIR"
+    # Name of the template databases, the hash of the configuration, so no other file of the folder is replaced
+    TEMPLATE_NAME = re.compile(r"[0-9a-f]{64}\.db")
+
     def __init__(self, app) -> None:
         """Initialise the Setup with the Flask app."""
         self.app = app
+        # Seconds taken by each stage of the last setup
+        self.timings = {}
+        self._next_item_id = 1
 
     def exec(self):
         """Initialise the website database.
 
+        When the STUDY_TEMPLATE_DIR flask setting is set, a copy of the database is saved as a template once it has
+        been set up, and later setups of the same configuration restore the template rather than building the database
+        again.
+
         Args:
             app (Flask): Flask application.
         """
         with self.app.app_context():
-            db.drop_all('study_db')
-            db.create_all('study_db')
+            self.timings = {}
+            self._next_item_id = 1
+            version = self._get_next_configuration_version(db)
+            template = self._get_template_path(db)
 
             # Remove previous exported database content
             export_location = WS.get_export_location(self.app)
@@ -36,129 +61,282 @@ class Setup:
                     except IsADirectoryError:
                         pass
 
-            # The session needs be committed after the creation of the groups.
-            self._setup_group(db)
-            self._setup_website_control_history(db)
-            db.session.commit()
+            if template is not None and os.path.exists(template):
+                self.app.logger.info("Restoring the website database from {}".format(template))
+                self._time_stage("template restore", self._restore_template, db, template, version)
+            else:
+                db.drop_all('study_db')
+                db.create_all('study_db')
+
+                # The session needs be committed after the creation of the groups.
+                self._setup_group(db)
+                self._setup_website_control_history(db, version)
+                self._time_stage("commit", db.session.commit)
+
+                # The setup of the participant configuration doesn't use SQLAlchemy ORM. The transaction
+                # needs to be committed before inserting the participant fields values. The participant
+                # columns values are dynamically defined so a different process needs to be followed.
+                self._time_stage("participant fields", self._setup_participant, db)
+
+                if template is not None:
+                    self._time_stage("template save", self._save_template, db, template)
+
+        for stage, seconds in self.timings.items():
+            self.app.logger.info("Setup of the {}: {:.2f}s".format(stage, seconds))
+
+        # Make the next request check the configuration file against the new setup date
+        IntegrityGuard.invalidate(self.app)
+        # The participant fields may have changed
+        ParticipantTable.invalidate(self.app)
+
+    def add_missing_columns(self):
+        """Add the tables and columns defined on the models which are missing from an existing study database.
+
+        The columns added are filled from the existing rows: the comparison counters of each participant are counted
+        from their comparisons, each setup gets its own configuration version and the hash of the last setup is taken
+        from the configuration files if they haven't been modified since. Nothing is changed if any of them can't be
+        filled.
 
-            # The setup of the participant configuration doesn't use SQLAlchemy ORM. The transaction
-            # needs to be committed before inserting the participant fields values. The participant
-            # columns values are dynamically defined so a different process needs to be followed.
-            self._setup_participant(db)
+        Raises:
+            RuntimeError: The configuration files have been modified since the last setup
+
+        Returns:
+            list: Names of the tables and columns (as table.column) added
+        """
+        added = []
+        with self.app.app_context():
+            engine = db.engines['study_db']
+            compiler = engine.dialect.ddl_compiler(engine.dialect, None)
+            # SQLite runs the schema changes in the transaction, so they are all rolled back if a column can't be filled
+            with engine.begin() as connection:
+                # Reading the schema on the same connection also makes sure SQLite doesn't alter a cached copy of it
+                inspector = inspect(connection)
+                for table in db.metadatas['study_db'].sorted_tables:
+                    if not inspector.has_table(table.name):
+                        table.create(connection)
+                        added.append(table.name)
+                        continue
+                    existing = {column['name'] for column in inspector.get_columns(table.name)}
+                    for column in table.columns:
+                        if column.name in existing:
+                            continue
+                        definition = compiler.get_column_specification(column)
+                        if not column.nullable and column.server_default is None:
+                            # SQLite needs a default for the existing rows, which is replaced below
+                            definition += " DEFAULT ''"
+                        connection.execute(text('ALTER TABLE "{}" ADD COLUMN {}'.format(table.name, definition)))
+                        added.append("{}.{}".format(table.name, column.name))
+                self._fill_added_columns(connection, added)
+        return added
+
+    def _fill_added_columns(self, connection, added):
+        """Fill the columns just added to an existing study database from its rows.
+
+        Args:
+            connection (Connection): Connection to the study database, in the transaction adding the columns
+            added (list): Names of the tables and columns (as table.column) added
+
+        Raises:
+            RuntimeError: The configuration files have been modified since the last setup
+        """
+        if "participant.compared_count" in added or "participant.skipped_count" in added:
+            participant_comparisons = db.select(db.func.count(Comparison.comparison_id)).where(
+                Comparison.participant_id == Participant.participant_id
+            )
+            connection.execute(
+                db.update(Participant).values(
+                    compared_count=participant_comparisons.where(
+                        Comparison.state != Comparison.SKIPPED
+                    ).scalar_subquery(),
+                    skipped_count=participant_comparisons.where(
+                        Comparison.state == Comparison.SKIPPED
+                    ).scalar_subquery(),
+                )
+            )
+        if "website_control.configuration_version" in added:
+            connection.execute(
+                db.update(WebsiteControl).values(configuration_version=WebsiteControl.website_control_id)
+            )
+        if "website_control.configuration_hash" in added:
+            query = (
+                db.select(
+                    WebsiteControl.website_control_id,
+                    WebsiteControl.configuration_file,
+                    WebsiteControl.setup_exec_date,
+                )
+                .order_by(WebsiteControl.website_control_id.desc())
+                .limit(1)
+            )
+            conf = connection.execute(query).first()
+            if conf is None:
+                return
+            # The earlier versions checked the modification date of the configuration file against the setup date
+            WS.set_configuration_location(self.app, conf.configuration_file)
+            location = WS.get_configuration_location(self.app)
+            modification_date = datetime.fromtimestamp(os.path.getmtime(location), tz=timezone.utc)
+            setup_exec_date = conf.setup_exec_date.replace(tzinfo=timezone.utc)
+            if modification_date > setup_exec_date:
+                raise RuntimeError(
+                    "The configuration file {} has been modified since the setup executed on {} UTC, please execute "
+                    ">Flask setup< again.".format(conf.configuration_file, f"{setup_exec_date:%m/%d/%Y, %H:%M:%S}")
+                )
+            connection.execute(
+                db.update(WebsiteControl)
+                .where(WebsiteControl.website_control_id == conf.website_control_id)
+                .values(configuration_hash=WS.get_configuration_fingerprint(self.app))
+            )
+
+    def create_indexes(self):
+        """Add the indexes defined on the models which are missing from the tables of an existing study database.
+
+        The tables and their content are left as they are, so the indexes can be added to a live study that was set up
+        before they were defined.
+
+        Returns:
+            list: Names of the indexes created
+        """
+        created = []
+        with self.app.app_context():
+            engine = db.engines['study_db']
+            inspector = inspect(engine)
+            for table in db.metadatas['study_db'].sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing = {index['name'] for index in inspector.get_indexes(table.name)}
+                for index in sorted(table.indexes, key=lambda index: index.name):
+                    if index.name not in existing:
+                        index.create(engine)
+                        created.append(index.name)
+        return created
 
     def _setup_group(self, db):
         """Save the group configuration in the database.
 
+        The items, their group memberships and the custom weights of each group are inserted in bulk, a chunk of rows
+        per statement, and the time taken by each stage is added to the timings of the setup.
+
         Args:
             db (SQLAlchemy): Database connection
         """
-        for g in WS.get_comparison_conf(WS.GROUPS, self.app):
-            group = Group(name=g[WS.GROUP_NAME], display_name=g[WS.GROUP_DISPLAY_NAME])
-            group = persist(db, group)
+        weight_conf = WS.get_comparison_conf(WS.GROUP_WEIGHT_CONFIGURATION, self.app)
+        # Ids of the items already inserted, by name, display name and image, so items listed in several groups are
+        # only inserted once. The database has just been created so there are no other items.
+        item_ids = {}
+        for g in WS.get_groups(self.app):
+            group = self._time_stage("groups", persist, db, Group(name=g.name, display_name=g.display_name))
             # Setup the items and their weights
-            items = self._setup_item(db, group, g)
-            self._setup_custom_item_pair(db, items, group, g)
+            group_item_ids = self._time_stage("items", self._setup_item, db, g, item_ids)
+            self._time_stage("item groups", self._setup_item_group, db, group, group_item_ids)
+            # Ignore the weights when defining equally weighted items
+            if weight_conf == WebsiteControl.CUSTOM_WEIGHT:
+                self._time_stage("custom item pairs", self._setup_custom_item_pair, db, group, g, group_item_ids)
 
-    def _setup_custom_item_pair(self, db, items, group, g):
-        """Save the custom item's weight configuration when defined manually using the Website configuration file.
+    def _time_stage(self, stage, function, *args):
+        """Run a step of the setup and add the time it took to the time of its stage.
 
-        If the web configuration type was "equal", this section will be ignored.
+        Args:
+            stage (str): Name of the stage
+            function (callable): Step of the setup
+            *args: Arguments of the step
+
+        Returns:
+            object: Result of the step
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        self.timings[stage] = self.timings.get(stage, 0) + time.perf_counter() - start
+        return result
+
+    def _insert(self, db, model, rows):
+        """Insert rows in chunks of CHUNK_SIZE, each chunk with a single statement.
 
         Args:
             db (SQLAlchemy): Database connection
-            items (array(Item)): Group items store in the database.
-            group (Group): Group store in the database.
-            g (json): Group configuration being saved.
+            model (db.Model): Model of the table
+            rows (list): Column values of each row
         """
-        weight_conf = WS.get_comparison_conf(WS.GROUP_WEIGHT_CONFIGURATION, self.app)
-        # Ignore this section when defining equally weighted items
-        if weight_conf == WebsiteControl.EQUAL_WEIGHT:
-            return
-
-        # Save the custom weights configuration
-        if weight_conf == WebsiteControl.CUSTOM_WEIGHT:
-            weights = g[WS.GROUP_ITEMS_WEIGHT]
+        for start in range(0, len(rows), self.CHUNK_SIZE):
+            db.session.execute(model.__table__.insert(), rows[start : start + self.CHUNK_SIZE])
 
-            items_dict = {}
-            for i in items:
-                items_dict[i.name] = int(i.item_id)
+    def _setup_custom_item_pair(self, db, group, g, group_item_ids):
+        """Save the custom item's weight configuration when defined manually using the Website configuration file.
 
-            for w in weights:
-                c = CustomItemPair()
-                c.item_1_id = items_dict[w["item_1"]]
-                c.item_2_id = items_dict[w["item_2"]]
-                c.group_id = group.group_id
-                c.weight = w["weight"]
-                db.session.add(c)
+        Args:
+            db (SQLAlchemy): Database connection
+            group (Group): Group store in the database.
+            g (GroupConfiguration): Group configuration being saved.
+            group_item_ids (list): Id of each item of the group, in the order of the group configuration
+        """
+        if not g.has_custom_weights():
+            return
 
-        return
+        total = len(g.weights)
+        for start in range(0, total, self.CHUNK_SIZE):
+            rows = [
+                {
+                    'group_id': group.group_id,
+                    'item_1_id': group_item_ids[first],
+                    'item_2_id': group_item_ids[second],
+                    'weight': weight,
+                }
+                for first, second, weight in g.iter_weight_positions(start, start + self.CHUNK_SIZE)
+            ]
+            self._insert(db, CustomItemPair, rows)
+            self.app.logger.info(
+                "Saved {} of {} custom item pairs of group {}".format(start + len(rows), total, group.name)
+            )
 
-    def _setup_item(self, db, group, g):
-        """Save the item configuration in the database.
+    def _setup_item(self, db, g, item_ids):
+        """Save the items of a group which are not already in the database.
 
         Args:
             db (SQLAlchemy): Database connection
-            group (SQLAlchemy): Inserted group object.
-            g (Json): Group configuration object on the global website configuration.
-        """
-        # Insert each of the items related to the groups
-        items = []
-        for i in g[WS.GROUP_ITEMS]:
-            # Verify if the item already exists in the database
-            query = db.select(Item).where(
-                Item.name == i[WS.ITEM_NAME],
-                Item.display_name == i[WS.ITEM_DISPLAY_NAME],
-                Item.image_path == i[WS.ITEM_IMAGE_NAME],
-            )
-            item = db.session.scalars(query).first()
-
-            # Insert the item in the database if it doesn't exist
-            if item is None:
-                if WS.ITEM_ID in i:
-                    item = Item(
-                        item_id=i[WS.ITEM_ID],
-                        name=i[WS.ITEM_NAME],
-                        display_name=i[WS.ITEM_DISPLAY_NAME],
-                        image_description=i.get(WS.ITEM_IMAGE_DESCRIPTION, None),
-                        image_path=i[WS.ITEM_IMAGE_NAME],
-                    )
-                else:
-                    # this uses the implicit auto increment
-                    item = Item(
-                        name=i[WS.ITEM_NAME],
-                        display_name=i[WS.ITEM_DISPLAY_NAME],
-                        image_description=i.get(WS.ITEM_IMAGE_DESCRIPTION, None),
-                        image_path=i[WS.ITEM_IMAGE_NAME],
-                    )
-                persist(db, item)
+            g (GroupConfiguration): Group configuration object on the global website configuration.
+            item_ids (dict): Ids of the items already saved, by name, display name and image. The new items are added.
+
+        Returns:
+            list: Id of each item of the group, in the order of the group configuration
+        """
+        rows = []
+        group_item_ids = []
+        for i in g.items:
+            key = (i.name, i.display_name, i.image_name)
+            item_id = item_ids.get(key)
+            if item_id is None:
+                # Items without an id are given the next id after the largest one, as SQLite would
+                item_id = i.item_id if i.item_id is not None else self._next_item_id
+                self._next_item_id = max(self._next_item_id, item_id + 1)
+                item_ids[key] = item_id
+                rows.append(
+                    {
+                        'item_id': item_id,
+                        'name': i.name,
+                        'display_name': i.display_name,
+                        'image_description': i.image_description,
+                        'image_path': i.image_name,
+                    }
+                )
             else:
-                self.app.logger.info("Reusing item {} information.".format(item.name))
-            self._setup_item_group(db, item, group)
+                self.app.logger.info("Reusing item {} information.".format(i.name))
+            group_item_ids.append(item_id)
 
-            items.append(item)
-        return items
+        self._insert(db, Item, rows)
+        return group_item_ids
 
-    def _setup_item_group(self, db, item, group):
-        """Relate the item to the correspondent group in the database.
+    def _setup_item_group(self, db, group, group_item_ids):
+        """Relate the items to the correspondent group in the database.
 
         Args:
             db (SQLAlchemy): Database connection.
-            item (SQLAlchemy): Inserted item object.
-            group (SQLAlchemy): Inserted group object.
+            group (Group): Inserted group object.
+            group_item_ids (list): Id of each item of the group
         """
-        item_id = item.item_id
-        group_id = group.group_id
-
-        # Verify if the item was already related to the group
-        query = db.select(ItemGroup).where(ItemGroup.item_id == item_id, ItemGroup.group_id == group_id)
-        item_group = db.session.scalars(query).first()
-
-        # Relate the item to the group if the relationship hasn't been created yet.
-        if item_group is None:
-            item_group = ItemGroup(item_id=item_id, group_id=group_id)
-            persist(db, item_group)
-        else:
-            self.app.logger.info("Reusing Item {} relationship with group {}.".format(item.name, group.name))
+        rows = []
+        for item_id in dict.fromkeys(group_item_ids):
+            rows.append({'item_id': item_id, 'group_id': group.group_id})
+        if len(rows) < len(group_item_ids):
+            self.app.logger.info("Reusing items relationship with group {}.".format(group.name))
+        self._insert(db, ItemGroup, rows)
 
     def _setup_participant(self, db):
         """Save the participant configuration in the database.
@@ -212,7 +390,100 @@ class Setup:
                     text('alter table participant add column accepted_ethics_agreement INT NOT NULL DEFAULT "0"')
                 )
 
-    def _setup_website_control_history(self, db):
+    def _get_template_path(self, db):
+        """Get the path of the template database of the current configuration.
+
+        The name of the template is a hash of the configuration files and of the tables defined by the models, so a
+        template is never used for another configuration or by a version of the website with different tables.
+
+        Args:
+            db (SQLAlchemy): Database connection
+
+        Returns:
+            string: Path of the template | None if the templates are disabled or the database is not SQLite
+        """
+        directory = self.app.config.get(self.TEMPLATE_DIRECTORY)
+        engine = db.engines['study_db']
+        if not directory or engine.dialect.name != 'sqlite':
+            return None
+
+        digest = hashlib.sha256(WS.get_configuration_fingerprint(self.app).encode())
+        for table in db.metadatas['study_db'].sorted_tables:
+            digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+        return os.path.join(self.app.instance_path, directory, digest.hexdigest() + ".db")
+
+    def _save_template(self, db, template):
+        """Save a copy of the database just set up as the template of its configuration, replacing any other template.
+
+        Args:
+            db (SQLAlchemy): Database connection
+            template (string): Path of the template
+        """
+        directory = os.path.dirname(template)
+        os.makedirs(directory, exist_ok=True)
+        temporary_template = "{}.{}.tmp".format(template, os.getpid())
+        source = db.engines['study_db'].raw_connection()
+        target = sqlite3.connect(temporary_template)
+        try:
+            source.driver_connection.backup(target)
+        finally:
+            target.close()
+            source.close()
+        # Replace the file in one step so another process never restores a partial template
+        os.replace(temporary_template, template)
+
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if self.TEMPLATE_NAME.fullmatch(name) and path != template:
+                os.remove(path)
+
+    def _restore_template(self, db, template, version):
+        """Replace the content of the database with the template and record the new setup.
+
+        The SQLite backup API copies the template into the database while holding its lock, so the other workers
+        either see the previous study or the new one.
+
+        Args:
+            db (SQLAlchemy): Database connection
+            template (string): Path of the template
+            version (int): Configuration version number
+        """
+        db.session.remove()
+        source = sqlite3.connect(template)
+        target = db.engines['study_db'].raw_connection()
+        try:
+            source.backup(target.driver_connection)
+        finally:
+            target.close()
+            source.close()
+
+        # A new setup date and version make the workers load the new study
+        conf = WebsiteControl().get_conf()
+        conf.configuration_file = self.app.config[WS.CONFIGURATION_LOCATION]
+        conf.configuration_version = version
+        conf.setup_exec_date = datetime.now()
+        db.session.commit()
+
+    def _get_next_configuration_version(self, db):
+        """Get the version number of the study being set up, one more than the version of the previous study.
+
+        Args:
+            db (SQLAlchemy): Database connection
+
+        Returns:
+            int: Configuration version number
+        """
+        try:
+            version = db.session.execute(db.select(db.func.max(WebsiteControl.configuration_version))).scalar()
+        except SQLAlchemyError:
+            # There is no previous study, or it was set up before the version was recorded
+            db.session.rollback()
+            version = None
+        return (version or 0) + 1
+
+    def _setup_website_control_history(self, db, version):
         """Setup the control history to monitor for changes to the website configuration file.
 
         Once the project has been setup no changes are allowed to the website configuration file.
@@ -221,8 +492,11 @@ class Setup:
 
         Args:
             db (SQLAlchemy): Database connection,
+            version (int): Configuration version number
         """
         hist = WebsiteControl()
         hist.weight_configuration = WS.get_comparison_conf(WS.GROUP_WEIGHT_CONFIGURATION, self.app)
         hist.configuration_file = self.app.config[WS.CONFIGURATION_LOCATION]
+        hist.configuration_hash = WS.get_configuration_fingerprint(self.app)
+        hist.configuration_version = version
         db.session.add(hist)
@@ -0,0 +1,82 @@
+"""Tuning and maintenance of the SQLite databases of the application."""
+
+from functools import partial
+
+from sqlalchemy import event, text
+
+from .connection import db
+
+# Flask setting holding the pragmas run on each new SQLite connection
+PRAGMAS_SETTING = "SQLITE_PRAGMAS"
+# Used when the setting is missing, an empty setting leaves the SQLite defaults
+DEFAULT_PRAGMAS = {
+    # Wait for the lock held by another worker rather than failing with "database is locked"
+    "busy_timeout": 5000,
+    # Readers are not blocked by a writer and a commit only appends to the write-ahead log
+    "journal_mode": "wal",
+    # In WAL mode the database cannot be corrupted without the fsync on each commit
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative sizes are in KiB
+    "cache_size": -16 * 1024,
+    "temp_store": "memory",
+}
+
+
+def configure_sqlite(app):
+    """Run the pragmas of the SQLITE_PRAGMAS flask setting on each new connection to the SQLite databases.
+
+    Args:
+        app (Flask app): Flask application, the database must already be registered
+    """
+    pragmas = app.config.get(PRAGMAS_SETTING, DEFAULT_PRAGMAS)
+    if not pragmas:
+        return
+    statements = ["PRAGMA {}={}".format(name, value) for name, value in pragmas.items()]
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", partial(_run_pragmas, statements))
+
+
+def _run_pragmas(statements, dbapi_connection, connection_record):
+    """Run the pragmas on a new connection.
+
+    Args:
+        statements (list): Pragma statements
+        dbapi_connection (sqlite3.Connection): New connection
+        connection_record (ConnectionRecord): Pool record of the connection
+    """
+    cursor = dbapi_connection.cursor()
+    for statement in statements:
+        cursor.execute(statement)
+    cursor.close()
+
+
+def run_maintenance(app, vacuum=False):
+    """Refresh the query planner statistics of the SQLite databases and fold their write-ahead log back into them.
+
+    Args:
+        app (Flask app): Flask application
+        vacuum (bool, optional): Also rebuild the databases to reclaim the space of deleted rows. Defaults to False.
+
+    Returns:
+        dict: Name of each database mapped to the number of pages copied back from its write-ahead log, -1 if it is
+            not in WAL mode
+    """
+    checkpointed = {}
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite":
+                continue
+            # VACUUM cannot be run inside a transaction
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text("ANALYZE"))
+                if vacuum:
+                    connection.execute(text("VACUUM"))
+                # Done last so the pages written by the other steps are included and the log is emptied
+                busy, _, pages = connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)")).one()
+            if busy:
+                raise RuntimeError("The write-ahead log of the {} database is in use.".format(bind_key or "main"))
+            checkpointed[bind_key or "main"] = pages
+    return checkpointed
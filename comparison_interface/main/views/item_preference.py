@@ -12,6 +12,7 @@ from comparison_interface.db.models import (
     WebsiteControl,
 )
 
+from .rank import Rank
 from .request import Request
 
 
@@ -91,4 +92,7 @@ class ItemsPreference(Request):
         except SQLAlchemyError as e:
             raise RuntimeError(str(e))
 
+        # Pairs selected in advance don't take the new preference into account
+        Rank(self._app, self._session).clear_pair_queue()
+
         return self._redirect('.item_selection')
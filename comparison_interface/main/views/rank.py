@@ -1,20 +1,20 @@
 from datetime import datetime, timezone
 
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.sql.expression import func
 
 from comparison_interface.configuration.website import Settings as WS
 from comparison_interface.db.connection import db
 from comparison_interface.db.models import (
     Comparison,
-    CustomItemPair,
-    Item,
-    ItemGroup,
     Participant,
-    ParticipantGroup,
     ParticipantItem,
     WebsiteControl,
 )
+from comparison_interface.selection.adaptive import AdaptiveScheduler
+from comparison_interface.selection.catalogue import Catalogue
+from comparison_interface.selection.coverage import CoverageScheduler
+from comparison_interface.selection.permutation import PairPermutation
+from comparison_interface.selection.queue import PairQueue
 
 from .request import Request
 
@@ -27,6 +27,12 @@ class Rank(Request):
     CONFIRMED = 'confirmed'
     SKIPPED = 'skipped'
 
+    # Pair schedulers which learn from the judgements made, by weight configuration
+    SCHEDULERS = {
+        WebsiteControl.ADAPTIVE_WEIGHT: AdaptiveScheduler,
+        WebsiteControl.BALANCED_WEIGHT: CoverageScheduler,
+    }
+
     def get(self, request):
         """Request get handler."""
         if not self._valid_session():
@@ -38,8 +44,20 @@ class Rank(Request):
 
         use_escape_route = WS.get_behaviour_conf(WS.BEHAVIOUR_ESCAPE_ROUTE, self._app)
 
-        if use_escape_route and self._get_current_cycle() >= WS.get_behaviour_conf(WS.BEHAVIOUR_MAX_CYCLES, self._app):
-            return self._redirect('.thankyou')
+        # The progress of the participant is kept on their row, which is only read once by the page
+        participant = self._get_participant()
+        compared, skipped = self._get_comparison_stats(participant)
+        if use_escape_route:
+            completed_cycles = self._get_current_cycle(participant)
+            if completed_cycles >= WS.get_behaviour_conf(WS.BEHAVIOUR_MAX_CYCLES, self._app):
+                return self._redirect('.thankyou')
+            # If we have asked for an escape route check the counts and redirect if necessary, before a pair is taken
+            # from the queue which the end of the cycle would clear
+            if compared + skipped >= WS.get_behaviour_conf(WS.BEHAVIOUR_CYCLE_LENGTH, self._app) * (
+                completed_cycles + 1
+            ):
+                self._increment_cycle_count(participant)
+                return self._redirect('.thankyou')
 
         comparison_id = None
         args = request.args.to_dict(flat=True)
@@ -70,18 +88,6 @@ class Rank(Request):
         # this boolean determines whether the previous button is present or not
         can_rejudge = len(self._session['comparison_ids']) > 0 and self._session['previous_comparison_id'] is not None
 
-        compared, skipped = self._get_comparison_stats()
-
-        if use_escape_route:
-            # If we have asked for an escape route check the counts and redirect if necessary
-            completed_cycles = self._get_current_cycle()
-
-            if compared + skipped >= WS.get_behaviour_conf(WS.BEHAVIOUR_CYCLE_LENGTH, self._app) * (
-                completed_cycles + 1
-            ):
-                self._increment_cycle_count()
-                return self._redirect('.thankyou')
-
         if allow_ties:
             additional_screen_reader_instructions = ""
         else:
@@ -148,12 +154,14 @@ class Rank(Request):
                 )
                 try:
                     db.session.add(c)
+                    self._count_comparison(None, state)
                     db.session.commit()
                     # Save the comparison for future possible rejudging
                     self._session['previous_comparison_id'] = c.comparison_id
                     self._session['comparison_ids'] = self._session['comparison_ids'] + [c.comparison_id]
                 except SQLAlchemyError as e:
                     raise RuntimeError(str(e))
+                self._update_scheduler()
             else:
                 # Rejudge an existence comparison.
                 query = db.select(Comparison).where(
@@ -165,10 +173,15 @@ class Rank(Request):
                 if comparison is None:
                     raise RuntimeError("Invalid comparison id provided")
                 try:
+                    self._count_comparison(comparison.state, state)
                     comparison.selected_item_id = selected_item_id
                     comparison.state = state
                     comparison.updated = datetime.now(timezone.utc)
+                    comparison.revision = Comparison.next_revision()
                     db.session.commit()
+                    # The pairs selected in advance may depend on the judgement just changed
+                    self.clear_pair_queue()
+                    self._update_scheduler()
                     # Return the pointer to the last comparison made as the participant will be given a new one next
                     self._session['previous_comparison_id'] = self._session['comparison_ids'][
                         len(self._session['comparison_ids']) - 1
@@ -180,6 +193,37 @@ class Rank(Request):
         else:
             return self._redirect('.rank', comparison_id=self._session['previous_comparison_id'])
 
+    def _count_comparison(self, previous_state, state):
+        """Update the participant's comparison counters for a comparison made or rejudged, in the same transaction.
+
+        The counters are incremented by the database so concurrent requests of the participant are not lost.
+
+        Args:
+            previous_state (str): State of the comparison before it was rejudged, None for a new comparison
+            state (str): New state of the comparison
+        """
+        compared = int(state != Comparison.SKIPPED)
+        skipped = int(state == Comparison.SKIPPED)
+        if previous_state is not None:
+            compared -= int(previous_state != Comparison.SKIPPED)
+            skipped -= int(previous_state == Comparison.SKIPPED)
+        if compared == 0 and skipped == 0:
+            return
+        db.session.execute(
+            db.update(Participant)
+            .where(Participant.participant_id == self._session['participant_id'])
+            .values(
+                compared_count=Participant.compared_count + compared,
+                skipped_count=Participant.skipped_count + skipped,
+            )
+        )
+
+    def _update_scheduler(self):
+        """Bring the pair scheduler of the weight configuration up to date with the judgements made, if there is one."""
+        weight_conf = self._session.get('weight_conf')
+        if weight_conf in self.SCHEDULERS:
+            self.SCHEDULERS[weight_conf].get(self._app)
+
     def _get_current_comparison_state(self, comparison_id):
         """Get the current comparison state and selected item id for the requested comparison id.
 
@@ -218,51 +262,59 @@ class Rank(Request):
 
         return state, selected_item_id
 
-    def _get_current_cycle(self):
+    def _get_participant(self):
+        """Get the participant of the session.
+
+        Returns:
+            Participant: Participant | None
+        """
+        return db.session.get(Participant, self._session['participant_id'])
+
+    def _get_current_cycle(self, participant=None):
         """Get the current cycle count for this participant.
 
+        Args:
+            participant (Participant, optional): Participant of the session, if already loaded. Defaults to None.
+
         Returns:
             cycle_count: current cycle of the participant
         """
-        participant = db.session.get(Participant, self._session['participant_id'])
+        if participant is None:
+            participant = self._get_participant()
         if participant is None:
             return 0
         return participant.completed_cycles
 
-    def _increment_cycle_count(self):
-        """Increment the current participant's cycle count."""
-        participant = db.session.get(Participant, self._session['participant_id'])
+    def _increment_cycle_count(self, participant=None):
+        """Increment the current participant's cycle count.
+
+        Args:
+            participant (Participant, optional): Participant of the session, if already loaded. Defaults to None.
+        """
+        if participant is None:
+            participant = self._get_participant()
         participant.completed_cycles = participant.completed_cycles + 1
         db.session.commit()
+        self.clear_pair_queue()
 
-    def _get_comparison_stats(self):
+    def _get_comparison_stats(self, participant=None):
         """Get summary statistics about the comparison made.
 
+        The counters on the participant's row are used rather than counting their comparisons, which would take longer
+        with each comparison made.
+
+        Args:
+            participant (Participant, optional): Participant of the session, if already loaded. Defaults to None.
+
         Returns:
             compared: Number of comparisons made
             skipped: Number of comparisons skipped
         """
-        compared = 0
-        skipped = 0
-
-        query = (
-            db.select(Comparison.state, func.count(Comparison.comparison_id))
-            .where(Comparison.participant_id == self._session['participant_id'])
-            .group_by(Comparison.state)
-        )
-        counts = db.session.execute(query).all()
-
-        if len(counts) == 0:
-            return compared, skipped
-
-        for states in counts:
-            stateName, number = states
-            if stateName == Comparison.SELECTED or stateName == Comparison.TIED:
-                compared = compared + number
-            if stateName == Comparison.SKIPPED:
-                skipped = number
-
-        return compared, skipped
+        if participant is None:
+            participant = self._get_participant()
+        if participant is None:
+            return 0, 0
+        return participant.compared_count, participant.skipped_count
 
     def _get_items_to_compare(self, comparison_id=None):
         """Get the items to compare.
@@ -272,19 +324,36 @@ class Rank(Request):
             the rejudging functionality. Defaults to None.
 
         Returns:
-            Item: Model Item | None
-            Item: Model Item | None
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
         """
-        render_item_prefer = WS.should_render(WS.BEHAVIOUR_RENDER_USER_ITEM_PREFERENCE_PAGE, self._app)
-
         # Case 1: Returns the items related to a particular comparison.
         if comparison_id is not None:
             return self._get_comparison_items(comparison_id)
 
-        # Case 2: Get a random pair from list of custom defined weights
+        # Case 2: Take the next pair selected in advance when the pair queue is enabled
+        if self._session.get('pair_queue_length'):
+            return self._get_queued_items()
+
+        return self._select_items()
+
+    def _select_items(self):
+        """Select a new pair of items according to the weight configuration.
+
+        Returns:
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
+        """
+        render_item_prefer = WS.should_render(WS.BEHAVIOUR_RENDER_USER_ITEM_PREFERENCE_PAGE, self._app)
+
+        # Case 1: Get a random pair from list of custom defined weights
         if self._session['weight_conf'] == WebsiteControl.CUSTOM_WEIGHT:
             return self._get_custom_items()
 
+        # Case 2: Get a pair from a scheduler which learns from the judgements made
+        if self._session['weight_conf'] in self.SCHEDULERS:
+            return self._get_scheduled_items()
+
         # Case 3: Get a random item pair when equal weights and item preference was defined
         if self._session['weight_conf'] == WebsiteControl.EQUAL_WEIGHT and render_item_prefer:
             return self._get_preferred_items()
@@ -296,6 +365,52 @@ class Rank(Request):
         # All no implemented cases
         return None, None
 
+    def _get_queued_items(self):
+        """Get the next pair of items from the participant's pair queue.
+
+        When the queue is empty a new batch of pairs is selected, the first one is shown straight away and the rest
+        are queued.
+
+        Returns:
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
+        """
+        queue = PairQueue(self._session['participant_id'])
+        item_1_id, item_2_id = queue.pop()
+        if item_1_id is None or item_2_id is None:
+            pairs = self._select_pair_batch()
+            if len(pairs) == 0:
+                return None, None
+            (item_1_id, item_2_id), pairs = pairs[0], pairs[1:]
+            queue.push(pairs)
+
+        catalogue = Catalogue.get(self._app)
+        return catalogue.get_item(item_1_id), catalogue.get_item(item_2_id)
+
+    def _select_pair_batch(self):
+        """Select the next batch of pairs for the participant's pair queue.
+
+        Returns:
+            list: Pairs of item ids, in the order they should be shown
+        """
+        pairs = []
+        for _ in range(self._session['pair_queue_length']):
+            item_1, item_2 = self._select_items()
+            if item_1 is None or item_2 is None:
+                break
+            pairs.append((item_1.item_id, item_2.item_id))
+        return pairs
+
+    def fill_pair_queue(self):
+        """Select a batch of pairs in advance for the participant, if the pair queue is enabled."""
+        if self._session.get('pair_queue_length'):
+            PairQueue(self._session['participant_id']).push(self._select_pair_batch())
+
+    def clear_pair_queue(self):
+        """Discard the pairs selected in advance for the participant, if the pair queue is enabled."""
+        if self._session.get('pair_queue_length'):
+            PairQueue(self._session['participant_id']).clear()
+
     def _get_comparison_items(self, comparison_id: int):
         """Get the items related to a particular comparison already made.
 
@@ -308,8 +423,8 @@ class Rank(Request):
             RuntimeError: Invalid comparison id provided
 
         Returns:
-            Item: Model Item | None
-            Item: Model Item | None
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
         """
         # 1. Get the items related to the comparison.
         query = db.select(Comparison).where(
@@ -320,125 +435,124 @@ class Rank(Request):
         if comparison is None:
             raise RuntimeError("Invalid comparison id provided")
 
-        # 2. Get the items information)
-        query = db.select(Item).where(Item.item_id.in_([comparison.item_1_id, comparison.item_2_id]))
-        items = db.session.scalars(query).all()
-
-        # 3. Update the session parameters
+        # 2. Update the session parameters
         comparison_id_index = self._session['comparison_ids'].index(int(comparison_id))
         if comparison_id_index == 0:
             self._session['previous_comparison_id'] = None
         else:
             self._session['previous_comparison_id'] = self._session['comparison_ids'][comparison_id_index - 1]
-        # return them in the order they were originally displayed
-        if items[0].item_id == comparison.item_1_id:
-            return items[0], items[1]
-        return items[1], items[0]
+
+        # 3. Get the items information in the order they were originally displayed
+        catalogue = Catalogue.get(self._app)
+        return catalogue.get_item(comparison.item_1_id), catalogue.get_item(comparison.item_2_id)
 
     def _get_custom_items(self):
         """Get a random pair of items respecting the weights provided in config file.
 
         Returns:
-            Item: Model Item | None
-            Item: Model Item | None
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
         """
-        # 1. Get the the custom pairs. This query assumes that just one group
-        # can be selected by the participant when defining custom weights.
-        query = (
-            db.select(ParticipantGroup, CustomItemPair)
-            .join(CustomItemPair, CustomItemPair.group_id == ParticipantGroup.group_id, isouter=True)
-            .where(
-                ParticipantGroup.participant_id == self._session['participant_id'],
-                ParticipantGroup.group_id.in_(self._session['group_ids']),
-            )
-        )
-        result = db.session.execute(query).all()
-        pair_ids = []
-        pair_weights = []
-        pairs = {}
-        for _, p in result:
-            pairs[p.custom_item_pair_id] = p
-            pair_ids.append(p.custom_item_pair_id)
-            pair_weights.append(p.weight)
-        if len(pair_ids) == 0:
+        # 1. Select the item pair to compare respecting the custom weights. The weighted pairs are kept in an alias
+        # table per group, this assumes that just one group can be selected by the participant when defining custom
+        # weights.
+        catalogue = Catalogue.get(self._app)
+        item_1_id, item_2_id = catalogue.sample_custom_pair(self._session['group_ids'][0], self._app.rng)
+        if item_1_id is None or item_2_id is None:
             return None, None
 
-        # 2. Select the item pair to compare but respecting the custom weights
-        pair_id = self._app.rng.choice(pair_ids, 1, p=pair_weights, replace=False)
-        item_1_id = pairs[pair_id[0]].item_1_id
-        item_2_id = pairs[pair_id[0]].item_2_id
+        # 2. Get the items information
+        return catalogue.get_item(item_1_id), catalogue.get_item(item_2_id)
 
-        # 3. Get the items information
-        query = db.select(Item).where(Item.item_id.in_([item_1_id, item_2_id]))
-        items = db.session.scalars(query).all()
+    def _get_scheduled_items(self):
+        """Get a pair of items from the scheduler of the weight configuration.
 
-        return items[0], items[1]
+        The adaptive scheduler selects the pair whose outcome is expected to tell us the most about the item strengths
+        and the balanced scheduler favours the items and pairs with the fewest judgements.
+
+        Returns:
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
+        """
+        # 1. Select the pair using the scheduler state. As with custom weights this assumes that just one group can be
+        # selected by the participant.
+        scheduler = self.SCHEDULERS[self._session['weight_conf']].get(self._app)
+        item_1_id, item_2_id = scheduler.select_pair(self._session['group_ids'][0], self._app.rng)
+        if item_1_id is None or item_2_id is None:
+            return None, None
+
+        # 2. Get the items information
+        catalogue = scheduler.catalogue
+        return catalogue.get_item(item_1_id), catalogue.get_item(item_2_id)
 
     def _get_preferred_items(self):
         """Get a random pair of items from the preferred participant's item selection.
 
         Returns:
-            Item: Model Item | None
-            Item: Model Item | None
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
         """
-        # 1. Get the participant's item preferences
-        query = (
-            db.select(ParticipantItem, Item)
-            .join(Item, Item.item_id == ParticipantItem.item_id, isouter=True)
-            .where(ParticipantItem.participant_id == self._session['participant_id'], ParticipantItem.known == 1)
+        # 1. Get the participant's item preferences. Each item can only be recorded once per participant so the ids
+        # are already unique, which guarantees an equal item distribution.
+        query = db.select(ParticipantItem.item_id).where(
+            ParticipantItem.participant_id == self._session['participant_id'], ParticipantItem.known == 1
         )
-        result = db.session.execute(query).all()
-
-        items_id = []
-        items = {}
-        for _, i in result:
-            # Insert only unique values to guarantee an equal item distribution.
-            if i.item_id not in items_id:
-                items_id.append(i.item_id)
-                items[i.item_id] = i
+        items_id = sorted(db.session.scalars(query).all())
 
         if len(items_id) < 2:
             return None, None
 
         # 2. Select randomly two items from the participant's item preferences
-        selected_items_id = [None, None]
-        selected_items_id = self._app.rng.choice(items_id, 2, replace=False)
+        catalogue = Catalogue.get(self._app)
+        selected_items_id = self._select_random_pair(items_id)
 
-        return items[selected_items_id[0]], items[selected_items_id[1]]
+        return catalogue.get_item(selected_items_id[0]), catalogue.get_item(selected_items_id[1])
 
     def _get_random_items(self):
         """Get a random pair of items from the website configuration list.
 
         Returns:
-            Item: Model Item | None
-            Item: Model Item | None
+            CatalogueItem: Catalogue item | None
+            CatalogueItem: Catalogue item | None
         """
         # 1. Get the items related to the participant's group preferences
-        query = (
-            db.select(ParticipantGroup, ItemGroup, Item)
-            .join(ItemGroup, ItemGroup.group_id == ParticipantGroup.group_id, isouter=True)
-            .join(Item, ItemGroup.item_id == Item.item_id, isouter=True)
-            .where(
-                ParticipantGroup.participant_id == self._session['participant_id'],
-                ParticipantGroup.group_id.in_(self._session['group_ids']),
-                ItemGroup.group_id.in_(self._session['group_ids']),
-            )
-        )
-        result = db.session.execute(query).all()
-
-        items_id = []
-        items = {}
-        for _, _, i in result:
-            # Insert only unique values to guarantee an equal item distribution.
-            if i.item_id not in items_id:
-                items_id.append(i.item_id)
-                items[i.item_id] = i
+        catalogue = Catalogue.get(self._app)
+        items_id = catalogue.group_item_ids(self._session['group_ids'])
 
         if len(items_id) < 2:
             return None, None
 
         # 2. Select randomly two items using the participant's group preferences
-        selected_items_id = [None, None]
-        selected_items_id = self._app.rng.choice(items_id, 2, replace=False)
+        selected_items_id = self._select_random_pair(items_id)
+
+        return catalogue.get_item(selected_items_id[0]), catalogue.get_item(selected_items_id[1])
+
+    def _select_random_pair(self, items_id):
+        """Select two different items at random.
 
-        return items[selected_items_id[0]], items[selected_items_id[1]]
+        When the noRepeatPairs behaviour is enabled the pairs are taken in turn from a random permutation of all of the
+        possible pairs, so the participant doesn't see the same pair twice until every pair has been shown. Only the
+        permutation seed and a cursor are kept in the participant's session.
+
+        Args:
+            items_id (list): Sorted ids of the items to select from
+
+        Returns:
+            list: The two selected item ids
+        """
+        if not WS.get_optional_behaviour_conf(WS.BEHAVIOUR_NO_REPEAT_PAIRS, self._app):
+            return self._app.rng.choice(items_id, 2, replace=False)
+
+        # Start a new permutation the first time and whenever all of the pairs have been shown
+        sequence = self._session.get('pair_sequence')
+        pair_count = len(items_id) * (len(items_id) - 1) // 2
+        if sequence is None or sequence['item_count'] != len(items_id) or sequence['cursor'] >= pair_count:
+            sequence = {'seed': int(self._app.rng.integers(2**31)), 'cursor': 0, 'item_count': len(items_id)}
+
+        i, j = PairPermutation(len(items_id), sequence['seed']).pair(sequence['cursor'])
+        self._session['pair_sequence'] = {**sequence, 'cursor': sequence['cursor'] + 1}
+
+        # Randomise which side of the screen each item is shown on
+        if self._app.rng.random() < 0.5:
+            i, j = j, i
+        return [items_id[i], items_id[j]]
@@ -1,13 +1,14 @@
 from datetime import datetime, timezone
 
 from flask import render_template
-from sqlalchemy import MetaData
 from sqlalchemy.exc import SQLAlchemyError
 
 from comparison_interface.configuration.website import Settings as WS
 from comparison_interface.db.connection import db
-from comparison_interface.db.models import Group, Participant, ParticipantGroup, WebsiteControl
+from comparison_interface.db.models import Group, ParticipantGroup, WebsiteControl
+from comparison_interface.db.participant import ParticipantTable
 
+from .rank import Rank
 from .request import Request
 
 
@@ -47,44 +48,47 @@ class Register(Request):
         group_ids = request.form.to_dict(flat=False)['group_ids']
 
         # Register the user in the database.
-        # Some of the user fields were dynamically added so we are using SQLAlchemy
-        # reflection functionality to insert them.
-        db_engine = db.engines['study_db']
-        db_meta = MetaData()
-        db_meta.reflect(bind=db_engine)
-        table = db_meta.tables["participant"]
+        # Some of the user fields were dynamically added so the participant table reflected from the database is used
+        # to insert them.
         dic_user_attr['created_date'] = datetime.now(timezone.utc)
         if not WS.get_behaviour_conf(WS.BEHAVIOUR_ESCAPE_ROUTE, self._app):
             dic_user_attr['completed_cycles'] = None
-        new_user_sql = table.insert().values(**dic_user_attr)
         try:
-            # Insert the user into the database
-            with db_engine.begin() as connection:
-                result = connection.execute(new_user_sql)
-
-            # Get last inserted id
-            id = result.lastrowid
-            query = db.select(Participant).where(Participant.participant_id == id)
-            participant = db.session.scalars(query).first()
-
-            # Save the user's group preferences
-            for id in group_ids:
-                ug = ParticipantGroup()
-                ug.group_id = id
-                ug.participant_id = participant.participant_id
-
-                db.session.add(ug)
-                db.session.commit()
+            conf = WebsiteControl().get_conf()
+            table = ParticipantTable.get(self._app, conf.configuration_version)
+            new_user_sql = table.insert().values(**dic_user_attr)
+            if db.engines['study_db'].dialect.insert_returning:
+                # Get the inserted id in the same statement
+                participant_id = db.session.execute(new_user_sql.returning(table.c.participant_id)).scalar_one()
+            else:
+                participant_id = db.session.execute(new_user_sql).inserted_primary_key[0]
+
+            # Save the user's group preferences, in the same transaction as the user
+            db.session.execute(
+                db.insert(ParticipantGroup),
+                [{'group_id': id, 'participant_id': participant_id} for id in group_ids],
+            )
+            db.session.commit()
 
             # Save reference to the inserted values in the session
-            self._session['participant_id'] = participant.participant_id
+            self._session['participant_id'] = participant_id
             self._session['group_ids'] = group_ids
-            self._session['weight_conf'] = WebsiteControl().get_conf().weight_configuration
+            self._session['weight_conf'] = conf.weight_configuration
             self._session['previous_comparison_id'] = None
             self._session['comparison_ids'] = []
+            self._session['pair_queue_length'] = WS.get_optional_behaviour_conf(
+                WS.BEHAVIOUR_PAIR_QUEUE_LENGTH, self._app
+            )
         except SQLAlchemyError as e:
+            db.session.rollback()
             raise RuntimeError(str(e))
 
+        # Select the first pairs in advance, unless they depend on the items the participant says they know
+        if self._session['pair_queue_length'] and not WS.should_render(
+            WS.BEHAVIOUR_RENDER_USER_ITEM_PREFERENCE_PAGE, self._app
+        ):
+            Rank(self._app, self._session).fill_pair_queue()
+
         return self._redirect('.item_selection')
 
     def _load_user_component(self, user_components: list):
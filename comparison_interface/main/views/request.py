@@ -37,6 +37,16 @@ class Request:
     def get_layout_text(self):
         """Get the application layout configuration text.
 
+        The text only depends on the configuration and the language so it is built once for each of them.
+
+        Returns:
+            dict: Layout configured text
+        """
+        return WS.memoise(self._app, ('layout_text', self._app.language_code), self._build_layout_text)
+
+    def _build_layout_text(self):
+        """Build the application layout configuration text.
+
         Returns:
             dict: Layout configured text
         """
@@ -0,0 +1,203 @@
+"""Fit of the Davidson or Bradley-Terry model to all of the judgements recorded, for each group of the study."""
+
+import csv
+import os
+
+import numpy as np
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import Comparison
+from comparison_interface.selection.catalogue import Catalogue
+from comparison_interface.selection.judgements import ITEM_1_SELECTED, ITEM_2_SELECTED, TIED
+
+from . import davidson
+from .bootstrap import RESAMPLE_COMPARISONS, Bootstrap
+from .online import GroupScores
+
+
+class BatchFit:
+    """Fit the item scores and their standard errors from the comparison table."""
+
+    # Number of comparison rows converted to arrays at a time while loading
+    CHUNK_SIZE = 100000
+
+    def __init__(self, app, fit_ties=True, bootstrap=0, resample=RESAMPLE_COMPARISONS, workers=None, seed=None) -> None:
+        """Initialise the fit.
+
+        Args:
+            app (Flask app): Flask application
+            fit_ties (bool, optional): Fit the Davidson model, otherwise the Bradley-Terry model with each tie counted
+                as half a win for both items. Defaults to True.
+            bootstrap (int, optional): Number of bootstrap replicates used for the 95% confidence interval of each
+                score, no intervals are computed if 0. Defaults to 0.
+            resample (str, optional): Resample the comparisons or the participants in the bootstrap. Defaults to
+                comparisons.
+            workers (int, optional): Number of processes fitting the bootstrap replicates. Defaults to the number of
+                CPUs.
+            seed (int, optional): Seed of the bootstrap. Defaults to None.
+        """
+        self.app = app
+        self.fit_ties = fit_ties
+        self.bootstrap = bootstrap
+        self.resample = resample
+        self.workers = workers
+        self.seed = seed
+
+    def load_outcomes(self):
+        """Load the items compared and the outcome of every comparison which wasn't skipped.
+
+        The outcome is computed by the database and the rows are converted to arrays in chunks, so no model object is
+        built for each comparison.
+
+        Returns:
+            array(int): Id of the first item of each comparison
+            array(int): Id of the second item of each comparison
+            array(int): Outcome code of each comparison
+            array(int): Id of the participant who made each comparison
+        """
+        outcome = db.case(
+            (Comparison.state == Comparison.TIED, TIED),
+            (Comparison.selected_item_id == Comparison.item_1_id, ITEM_1_SELECTED),
+            else_=ITEM_2_SELECTED,
+        )
+        query = (
+            db.select(Comparison.item_1_id, Comparison.item_2_id, outcome, Comparison.participant_id)
+            .where(Comparison.state != Comparison.SKIPPED)
+            .execution_options(yield_per=self.CHUNK_SIZE)
+        )
+        chunks = [np.array(rows, dtype=np.int64) for rows in db.session.execute(query).partitions()]
+        data = np.concatenate(chunks) if len(chunks) > 0 else np.empty((0, 4), dtype=np.int64)
+        return data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+
+    @staticmethod
+    def group_comparisons(item_ids, item_1_ids, item_2_ids):
+        """Find the comparisons between the items of a group.
+
+        Args:
+            item_ids (array(int)): Sorted ids of the items of the group
+            item_1_ids (array(int)): Id of the first item of each comparison
+            item_2_ids (array(int)): Id of the second item of each comparison
+
+        Returns:
+            array(bool): Whether each comparison is between items of the group
+            array(int): Position in the group of the first item of each of these comparisons
+            array(int): Position in the group of the second item of each of these comparisons
+        """
+        in_group = np.isin(item_1_ids, item_ids) & np.isin(item_2_ids, item_ids)
+        i = np.searchsorted(item_ids, item_1_ids[in_group])
+        j = np.searchsorted(item_ids, item_2_ids[in_group])
+        return in_group, i, j
+
+    @staticmethod
+    def summarise(item_ids, item_1_ids, item_2_ids, outcomes):
+        """Summarise the comparisons between the items of a group into the model's sufficient statistics.
+
+        Args:
+            item_ids (array(int)): Sorted ids of the items of the group
+            item_1_ids (array(int)): Id of the first item of each comparison
+            item_2_ids (array(int)): Id of the second item of each comparison
+            outcomes (array(int)): Outcome code of each comparison
+
+        Returns:
+            array(float): Points scored by each item
+            array(int): Position of the first item of each judged pair
+            array(int): Position of the second item of each judged pair
+            array(float): Number of judgements of each pair
+            float: Number of tied judgements
+        """
+        in_group, i, j = BatchFit.group_comparisons(item_ids, item_1_ids, item_2_ids)
+        outcomes = outcomes[in_group]
+        n = len(item_ids)
+
+        won = np.where(outcomes == ITEM_1_SELECTED, i, j)[outcomes != TIED]
+        tied = outcomes == TIED
+        points = (
+            2.0 * np.bincount(won, minlength=n) + np.bincount(i[tied], minlength=n) + np.bincount(j[tied], minlength=n)
+        ).astype(np.float64)
+
+        pair_keys, pair_counts = np.unique(np.minimum(i, j) * n + np.maximum(i, j), return_counts=True)
+        return points, pair_keys // n, pair_keys % n, pair_counts.astype(np.float64), float(tied.sum())
+
+    def fit(self):
+        """Fit the scores of the items of every group.
+
+        Returns:
+            list: Dictionaries with the group id, item id, item name, score, standard error, number of judgements and,
+                if the bootstrap was requested, the confidence interval of the score of each item
+        """
+        catalogue = Catalogue.get(self.app)
+        item_1_ids, item_2_ids, outcomes, participant_ids = self.load_outcomes()
+        self.app.logger.info(f"Loaded {len(outcomes)} judgements")
+
+        data_list = []
+        with Bootstrap(self.bootstrap, self.resample, self.workers, self.seed) as bootstrap:
+            for group_id in sorted(catalogue.groups):
+                item_ids = catalogue.groups[group_id]
+                n = len(item_ids)
+                points, pair_a, pair_b, pair_counts, ties = self.summarise(item_ids, item_1_ids, item_2_ids, outcomes)
+                prior_weight = GroupScores.PRIOR_WEIGHT
+                strengths, tie_parameter, iterations = davidson.fit(
+                    points, pair_a, pair_b, pair_counts, ties, prior_weight, fit_ties=self.fit_ties
+                )
+                errors = davidson.standard_errors(strengths, pair_a, pair_b, pair_counts, tie_parameter, prior_weight)
+                judgements = np.bincount(pair_a, pair_counts, n) + np.bincount(pair_b, pair_counts, n)
+                self.app.logger.info(
+                    f"Group {group_id}: {n} items, {int(pair_counts.sum())} judgements, "
+                    f"{iterations} iterations, tie parameter {tie_parameter:.4f}"
+                )
+
+                if self.bootstrap > 0:
+                    in_group, i, j = self.group_comparisons(item_ids, item_1_ids, item_2_ids)
+                    pair_index = np.searchsorted(pair_a * n + pair_b, np.minimum(i, j) * n + np.maximum(i, j))
+                    _, participants = np.unique(participant_ids[in_group], return_inverse=True)
+                    lower, upper = bootstrap.intervals(
+                        i,
+                        j,
+                        outcomes[in_group],
+                        participants,
+                        pair_a,
+                        pair_b,
+                        pair_index,
+                        strengths,
+                        tie_parameter,
+                        prior_weight,
+                        self.fit_ties,
+                    )
+                    self.app.logger.info(f"Group {group_id}: {self.bootstrap} bootstrap replicates fitted")
+
+                for k in np.argsort(-strengths, kind='stable'):
+                    entry = {
+                        'group_id': group_id,
+                        'item_id': int(item_ids[k]),
+                        'item_name': catalogue.get_item(item_ids[k]).name,
+                        'score': float(np.log(strengths[k])),
+                        'standard_error': float(errors[k]),
+                        'judgements': int(judgements[k]),
+                    }
+                    if self.bootstrap > 0:
+                        entry['lower'] = float(lower[k])
+                        entry['upper'] = float(upper[k])
+                    data_list.append(entry)
+        return data_list
+
+    def save(self, location, file_type='csv'):
+        """Fit the scores and save them to a scores file of the type requested in the location supplied.
+
+        Args:
+            location (str): Directory the file is saved to
+            file_type (str, optional): Either csv or tsv. Defaults to 'csv'.
+
+        Returns:
+            str: Path of the file saved
+        """
+        delimiter = '\t' if file_type == 'tsv' else ','
+        data_list = self.fit()
+        path = os.path.join(location, f'scores.{file_type}')
+        with open(path, mode='w', encoding='utf-8') as csv_out:
+            keys = ['group_id', 'item_id', 'item_name', 'score', 'standard_error', 'judgements']
+            if self.bootstrap > 0:
+                keys = keys + ['lower', 'upper']
+            csv_writer = csv.DictWriter(csv_out, keys, delimiter=delimiter)
+            csv_writer.writeheader()
+            csv_writer.writerows(data_list)
+        return path
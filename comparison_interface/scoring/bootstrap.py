@@ -0,0 +1,163 @@
+"""Bootstrap confidence intervals for the item scores, with the replicates fitted in a pool of processes."""
+
+import os
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from comparison_interface.selection.judgements import ITEM_1_SELECTED, TIED
+
+from . import davidson
+
+# What is resampled with replacement in each replicate
+RESAMPLE_COMPARISONS = 'comparisons'
+RESAMPLE_PARTICIPANTS = 'participants'
+
+
+def _fit_replicates(
+    directory, seed, replicates, resample, initial_strengths, initial_tie_parameter, prior_weight, fit_ties
+):
+    """Fit the scores of a number of bootstrap replicates, run in a worker process.
+
+    The comparisons are read from the memory mapped arrays saved in the directory and each replicate only draws how
+    many times each comparison (or each participant's comparisons) is counted, so the judgements are never copied per
+    replicate.
+
+    Returns:
+        array(float): Scores, one row per replicate
+    """
+    comparisons = np.load(os.path.join(directory, 'comparisons.npy'), mmap_mode='r')
+    pairs = np.load(os.path.join(directory, 'pairs.npy'), mmap_mode='r')
+    i, j, outcomes, pair, participants = (np.ascontiguousarray(comparisons[:, k]) for k in range(5))
+    pair_a = np.ascontiguousarray(pairs[:, 0])
+    pair_b = np.ascontiguousarray(pairs[:, 1])
+    tied = outcomes == TIED
+    won = ~tied
+    winners = np.where(outcomes == ITEM_1_SELECTED, i, j)[won]
+    item_count = len(initial_strengths)
+    comparison_count = len(outcomes)
+    participant_count = int(participants.max()) + 1 if comparison_count > 0 else 0
+
+    rng = np.random.default_rng(seed)
+    scores = np.empty((replicates, item_count), dtype=np.float64)
+    for r in range(replicates):
+        if resample == RESAMPLE_PARTICIPANTS:
+            drawn = np.bincount(rng.integers(participant_count, size=participant_count), minlength=participant_count)
+            weights = drawn[participants].astype(np.float64)
+        else:
+            weights = np.bincount(rng.integers(comparison_count, size=comparison_count), minlength=comparison_count)
+            weights = weights.astype(np.float64)
+        points = (
+            2.0 * np.bincount(winners, weights[won], minlength=item_count)
+            + np.bincount(i[tied], weights[tied], minlength=item_count)
+            + np.bincount(j[tied], weights[tied], minlength=item_count)
+        )
+        pair_counts = np.bincount(pair, weights, minlength=len(pair_a))
+        strengths, _, _ = davidson.fit(
+            points,
+            pair_a,
+            pair_b,
+            pair_counts,
+            float(weights[tied].sum()),
+            prior_weight,
+            fit_ties=fit_ties,
+            tolerance=1e-6,
+            initial_strengths=initial_strengths,
+            initial_tie_parameter=initial_tie_parameter,
+        )
+        scores[r] = np.log(strengths)
+    return scores
+
+
+class Bootstrap:
+    """Percentile bootstrap of the item scores, to be used as a context manager owning the pool of processes."""
+
+    # Number of tasks the replicates are split into for each worker process, to balance the load
+    TASKS_PER_WORKER = 4
+
+    def __init__(self, replicates, resample=RESAMPLE_COMPARISONS, workers=None, seed=None, level=0.95) -> None:
+        """Initialise the bootstrap.
+
+        Args:
+            replicates (int): Number of bootstrap replicates
+            resample (str, optional): Resample the comparisons or the participants. Defaults to comparisons.
+            workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            seed (int, optional): Seed of the random number generator. Defaults to None.
+            level (float, optional): Confidence level of the intervals. Defaults to 0.95.
+        """
+        self.replicates = replicates
+        self.resample = resample
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.level = level
+        self.workers = workers or os.cpu_count()
+        self._executor = None
+
+    def __enter__(self):
+        """Start the pool of worker processes, if any replicate is requested."""
+        if self.replicates > 0:
+            # Imported here as it loads multiprocessing, which is only needed by the fit command
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *args):
+        """Shut the pool of worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def intervals(
+        self, i, j, outcomes, participants, pair_a, pair_b, pair_index, strengths, tie_parameter, prior_weight, fit_ties
+    ):
+        """Get the confidence interval of the score of each item of a group.
+
+        Args:
+            i (array(int)): Position of the first item of each comparison
+            j (array(int)): Position of the second item of each comparison
+            outcomes (array(int)): Outcome code of each comparison
+            participants (array(int)): Position of the participant who made each comparison
+            pair_a (array(int)): Position of the first item of each judged pair
+            pair_b (array(int)): Position of the second item of each judged pair
+            pair_index (array(int)): Judged pair of each comparison
+            strengths (array(float)): Strengths fitted to all of the comparisons, used as the starting point
+            tie_parameter (float): Tie parameter fitted to all of the comparisons, used as the starting point
+            prior_weight (float): Number of virtual wins and losses of each item against the reference item
+            fit_ties (bool): Fit the Davidson model, otherwise the Bradley-Terry model
+
+        Returns:
+            array(float): Lower bound of the score of each item
+            array(float): Upper bound of the score of each item
+        """
+        if len(outcomes) == 0:
+            # Nothing to resample, the scores are those given by the prior
+            return np.log(strengths), np.log(strengths)
+
+        tasks = min(self.replicates, self.workers * self.TASKS_PER_WORKER)
+        sizes = [len(chunk) for chunk in np.array_split(np.arange(self.replicates), tasks)]
+        with TemporaryDirectory() as directory:
+            # The workers read the comparisons from memory mapped files rather than receiving a copy with each task
+            np.save(
+                os.path.join(directory, 'comparisons.npy'),
+                np.column_stack([i, j, outcomes, pair_index, participants]).astype(np.int32),
+            )
+            np.save(os.path.join(directory, 'pairs.npy'), np.column_stack([pair_a, pair_b]).astype(np.int32))
+            futures = [
+                self._executor.submit(
+                    _fit_replicates,
+                    directory,
+                    seed,
+                    size,
+                    self.resample,
+                    strengths,
+                    tie_parameter,
+                    prior_weight,
+                    fit_ties,
+                )
+                for seed, size in zip(self.seed_sequence.spawn(tasks), sizes)
+            ]
+            scores = np.concatenate([future.result() for future in futures])
+
+        alpha = (1 - self.level) / 2
+        lower, upper = np.quantile(scores, [alpha, 1 - alpha], axis=0)
+        return lower, upper
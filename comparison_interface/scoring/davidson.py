@@ -0,0 +1,181 @@
+"""Vectorised steps of the minorisation-maximisation (MM) algorithm for the Davidson model.
+
+The Davidson model extends the Bradley-Terry model to tied judgements: item i beats item j with probability p_i / D and
+they tie with probability v sqrt(p_i p_j) / D, where D = p_i + p_j + v sqrt(p_i p_j). With v = 0 it is the Bradley-Terry
+model. The judgements are summarised by the points of each item (two for a win and one for a tie) and the number of
+judgements of each judged pair, given as parallel arrays of item positions and counts. Every item also has a number of
+virtual wins and losses (the prior weight) against a reference item of strength 1, which keeps the strengths finite for
+items that have won or lost all of their judgements.
+"""
+
+import numpy as np
+
+
+def mm_step(strengths, points, pair_a, pair_b, pair_counts, tie_parameter, prior_weight):
+    """Take one MM step for all of the strengths at once.
+
+    Args:
+        strengths (array(float)): Current strength of each item
+        points (array(float)): Points scored by each item
+        pair_a (array(int)): Position of the first item of each judged pair
+        pair_b (array(int)): Position of the second item of each judged pair
+        pair_counts (array(float)): Number of judgements of each pair
+        tie_parameter (float): Current tie parameter
+        prior_weight (float): Number of virtual wins and losses of each item against the reference item
+
+    Returns:
+        array(float): New strengths
+    """
+    p = strengths[pair_a]
+    q = strengths[pair_b]
+    nu = tie_parameter
+    d = p + q + nu * np.sqrt(p * q)
+    n = len(strengths)
+    denominator = (
+        np.bincount(pair_a, pair_counts * (2 + nu * np.sqrt(q / p)) / d, minlength=n)
+        + np.bincount(pair_b, pair_counts * (2 + nu * np.sqrt(p / q)) / d, minlength=n)
+        + 2 * prior_weight * (2 + nu / np.sqrt(strengths)) / (strengths + 1 + nu * np.sqrt(strengths))
+    )
+    return (points + 2 * prior_weight) / denominator
+
+
+def scale_step(strengths, tie_parameter, prior_weight):
+    """Take a Newton step for the common scale of the strengths.
+
+    Multiplying all of the strengths by the same factor doesn't change the probabilities of the real judgements, only
+    those of the virtual judgements against the reference item. The MM steps are very slow to move along that direction
+    when the prior weight is small compared to the number of judgements, so the scale is optimised separately.
+
+    Args:
+        strengths (array(float)): Current strength of each item
+        tie_parameter (float): Current tie parameter
+        prior_weight (float): Number of virtual wins and losses of each item against the reference item
+
+    Returns:
+        array(float): Rescaled strengths
+    """
+    if prior_weight <= 0:
+        return strengths
+    d = strengths + 1 + tie_parameter * np.sqrt(strengths)
+    win = strengths / d
+    tie = tie_parameter * np.sqrt(strengths) / d
+    share = win + tie / 2
+    # Derivative and (minus) second derivative of the virtual judgements' log likelihood with respect to the log scale
+    gradient = np.sum(1 - 2 * share)
+    curvature = np.sum(2 * (win + tie / 4 - share**2))
+    if curvature <= 0:
+        return strengths
+    return strengths * np.exp(gradient / curvature)
+
+
+def tie_step(strengths, pair_a, pair_b, pair_counts, ties, tie_parameter):
+    """Take one MM step for the tie parameter.
+
+    Args:
+        strengths (array(float)): Current strength of each item
+        pair_a (array(int)): Position of the first item of each judged pair
+        pair_b (array(int)): Position of the second item of each judged pair
+        pair_counts (array(float)): Number of judgements of each pair
+        ties (float): Number of tied judgements
+        tie_parameter (float): Current tie parameter
+
+    Returns:
+        float: New tie parameter
+    """
+    p = strengths[pair_a]
+    q = strengths[pair_b]
+    denominator = np.sum(pair_counts * np.sqrt(p * q) / (p + q + tie_parameter * np.sqrt(p * q)))
+    if denominator <= 0:
+        return tie_parameter
+    return max(ties, 0.0) / denominator
+
+
+def standard_errors(strengths, pair_a, pair_b, pair_counts, tie_parameter, prior_weight):
+    """Get the standard error of the log strength of each item from the Fisher information.
+
+    For a single judgement the information on the log strengths is the variance of the share of the point scored by
+    the first item, P(win) + P(tie) / 4 - (P(win) + P(tie) / 2)^2, with a positive sign on the diagonal and a negative
+    one between the two items, so the information matrix is a weighted graph Laplacian plus the virtual judgements.
+
+    Args:
+        strengths (array(float)): Fitted strength of each item
+        pair_a (array(int)): Position of the first item of each judged pair
+        pair_b (array(int)): Position of the second item of each judged pair
+        pair_counts (array(float)): Number of judgements of each pair
+        tie_parameter (float): Fitted tie parameter
+        prior_weight (float): Number of virtual wins and losses of each item against the reference item
+
+    Returns:
+        array(float): Standard errors
+    """
+
+    def variance(p, q):
+        d = p + q + tie_parameter * np.sqrt(p * q)
+        win = p / d
+        tie = tie_parameter * np.sqrt(p * q) / d
+        return win + tie / 4 - (win + tie / 2) ** 2
+
+    n = len(strengths)
+    weights = pair_counts * variance(strengths[pair_a], strengths[pair_b])
+    information = np.zeros((n, n), dtype=np.float64)
+    np.add.at(information, (pair_a, pair_b), -weights)
+    np.add.at(information, (pair_b, pair_a), -weights)
+    diagonal = (
+        np.bincount(pair_a, weights, minlength=n)
+        + np.bincount(pair_b, weights, minlength=n)
+        + 2 * prior_weight * variance(strengths, np.ones(n))
+    )
+    information[np.diag_indices(n)] += diagonal
+    return np.sqrt(np.diag(np.linalg.inv(information)))
+
+
+def fit(
+    points,
+    pair_a,
+    pair_b,
+    pair_counts,
+    ties,
+    prior_weight,
+    fit_ties=True,
+    tolerance=1e-8,
+    max_iterations=10000,
+    initial_strengths=None,
+    initial_tie_parameter=0.5,
+):
+    """Fit the strengths (and the tie parameter) by iterating MM steps until the log strengths stop changing.
+
+    Args:
+        points (array(float)): Points scored by each item
+        pair_a (array(int)): Position of the first item of each judged pair
+        pair_b (array(int)): Position of the second item of each judged pair
+        pair_counts (array(float)): Number of judgements of each pair
+        ties (float): Number of tied judgements
+        prior_weight (float): Number of virtual wins and losses of each item against the reference item
+        fit_ties (bool, optional): Fit the Davidson model, otherwise the Bradley-Terry model with ties counted as half a
+            win for each item. Defaults to True.
+        tolerance (float, optional): Largest change of a log strength at convergence. Defaults to 1e-8.
+        max_iterations (int, optional): Maximum number of MM steps. Defaults to 10000.
+        initial_strengths (array(float), optional): Strengths to start from, e.g. those of a previous fit of similar
+            data. Defaults to 1 for every item.
+        initial_tie_parameter (float, optional): Tie parameter to start from. Defaults to 0.5.
+
+    Returns:
+        array(float): Fitted strengths
+        float: Fitted tie parameter, 0 for the Bradley-Terry model
+        int: Number of MM steps taken
+    """
+    if initial_strengths is None:
+        strengths = np.ones(len(points), dtype=np.float64)
+    else:
+        strengths = np.array(initial_strengths, dtype=np.float64)
+    tie_parameter = initial_tie_parameter if fit_ties and ties > 0 else 0.0
+    for iteration in range(1, max_iterations + 1):
+        updated = mm_step(strengths, points, pair_a, pair_b, pair_counts, tie_parameter, prior_weight)
+        updated = scale_step(updated, tie_parameter, prior_weight)
+        if tie_parameter > 0:
+            tie_parameter = tie_step(updated, pair_a, pair_b, pair_counts, ties, tie_parameter)
+        change = np.max(np.abs(np.log(updated) - np.log(strengths)), initial=0.0)
+        strengths = updated
+        if change < tolerance:
+            break
+    return strengths, tie_parameter, iteration
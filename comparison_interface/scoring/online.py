@@ -0,0 +1,275 @@
+"""Item strengths kept up to date with every judgement using the Davidson extension of the Bradley-Terry model."""
+
+import threading
+
+import numpy as np
+
+from comparison_interface.selection.catalogue import Catalogue
+from comparison_interface.selection.judgements import ITEM_1_SELECTED, ITEM_2_SELECTED, NO_OUTCOME, TIED, JudgementLog
+
+from . import davidson
+
+
+class GroupScores:
+    """Davidson model strengths of the items of a single group.
+
+    Under the Davidson model item i beats item j with probability p_i / D, they tie with probability
+    v sqrt(p_i p_j) / D, where D = p_i + p_j + v sqrt(p_i p_j). The model's sufficient statistics (points scored by each
+    item and number of judgements of each pair) are updated exactly, so a judgement can be removed again when it is
+    rejudged. After each judgement the two items involved take a minorisation-maximisation (MM) step, which only looks
+    at the pairs they have been judged in, and every time as many judgements as items have been recorded all of the
+    strengths and the tie parameter take a full MM step, so the cost per judgement stays O(items) on average.
+    """
+
+    # Every item starts with this many virtual wins and losses against a reference item of strength 1, which keeps the
+    # strengths finite and defines the scale
+    PRIOR_WEIGHT = 1.0
+    INITIAL_TIE_PARAMETER = 0.5
+
+    def __init__(self, item_ids) -> None:
+        """Initialise the strengths of the supplied item ids.
+
+        Args:
+            item_ids (array(int)): Ids of the items in the group
+        """
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.index = {int(item_id): i for i, item_id in enumerate(self.item_ids)}
+        n = len(self.item_ids)
+        self.strengths = np.ones(n, dtype=np.float64)
+        self.tie_parameter = self.INITIAL_TIE_PARAMETER
+        # Two points for a win and one for a tie
+        self.points = np.zeros(n, dtype=np.float64)
+        self.judgements = np.zeros(n, dtype=np.float64)
+        self.ties = 0.0
+        # Judged pairs as growable edge arrays, with the edges incident to each item
+        self._edges = {}
+        self._edge_items = np.zeros((max(n, 1), 2), dtype=np.int32)
+        self._edge_counts = np.zeros(max(n, 1), dtype=np.float64)
+        self._incident = [[] for _ in range(n)]
+        self._updates_since_sweep = 0
+
+    def contains(self, item_1_id, item_2_id):
+        """Check if both items of a comparison belong to this group."""
+        return item_1_id in self.index and item_2_id in self.index
+
+    def _edge(self, i, j):
+        """Get the index of the edge between two item positions, adding it if needed."""
+        key = (i, j) if i < j else (j, i)
+        e = self._edges.get(key)
+        if e is None:
+            e = len(self._edges)
+            if e == len(self._edge_counts):
+                self._edge_items = np.concatenate([self._edge_items, np.zeros_like(self._edge_items)])
+                self._edge_counts = np.concatenate([self._edge_counts, np.zeros_like(self._edge_counts)])
+            self._edges[key] = e
+            self._edge_items[e] = key
+            self._incident[i].append(e)
+            self._incident[j].append(e)
+        return e
+
+    def update(self, item_1_id, item_2_id, outcome, weight=1.0):
+        """Record a judgement between two items and update their strengths.
+
+        Args:
+            item_1_id (int): Id of the first item compared
+            item_2_id (int): Id of the second item compared
+            outcome (int): Outcome code of the comparison
+            weight (float, optional): 1 to add the judgement, -1 to remove a judgement added before. Defaults to 1.
+        """
+        i = self.index[item_1_id]
+        j = self.index[item_2_id]
+        if outcome == ITEM_1_SELECTED:
+            self.points[i] += 2 * weight
+        elif outcome == ITEM_2_SELECTED:
+            self.points[j] += 2 * weight
+        else:
+            self.points[i] += weight
+            self.points[j] += weight
+            self.ties += weight
+        self.judgements[i] += weight
+        self.judgements[j] += weight
+        e = self._edge(i, j)
+        self._edge_counts[e] += weight
+
+        self._updates_since_sweep += 1
+        if self._updates_since_sweep >= len(self.item_ids):
+            self.sweep()
+        else:
+            self._update_item(i)
+            self._update_item(j)
+
+    def seed(self, item_1_ids, item_2_ids, outcomes):
+        """Record many judgements at once and fit the strengths and the tie parameter to all of the judgements.
+
+        The judgements are summarised into the sufficient statistics with a few array operations and the MM steps are
+        then iterated to convergence, which is much faster than recording them one at a time.
+
+        Args:
+            item_1_ids (array(int)): Id of the first item of each judgement, both items must belong to the group
+            item_2_ids (array(int)): Id of the second item of each judgement
+            outcomes (array(int)): Outcome code of each judgement
+        """
+        n = len(self.item_ids)
+        order = np.argsort(self.item_ids)
+        i = order[np.searchsorted(self.item_ids, item_1_ids, sorter=order)]
+        j = order[np.searchsorted(self.item_ids, item_2_ids, sorter=order)]
+        tied = outcomes == TIED
+        won = np.where(outcomes == ITEM_1_SELECTED, i, j)[~tied]
+        self.points += (
+            2.0 * np.bincount(won, minlength=n) + np.bincount(i[tied], minlength=n) + np.bincount(j[tied], minlength=n)
+        )
+        self.judgements += np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+        self.ties += float(tied.sum())
+        pair_keys, pair_counts = np.unique(np.minimum(i, j) * n + np.maximum(i, j), return_counts=True)
+        for key, count in zip(pair_keys.tolist(), pair_counts.tolist()):
+            e = self._edge(*divmod(key, n))
+            self._edge_counts[e] += count
+
+        m = len(self._edges)
+        self.strengths, self.tie_parameter, _ = davidson.fit(
+            self.points,
+            self._edge_items[:m, 0],
+            self._edge_items[:m, 1],
+            self._edge_counts[:m],
+            self.ties,
+            self.PRIOR_WEIGHT,
+            initial_strengths=self.strengths,
+            initial_tie_parameter=self.tie_parameter,
+        )
+        self._updates_since_sweep = 0
+
+    def _prior_denominator(self, strengths):
+        """Contribution of the virtual judgements against the reference item to the MM denominator."""
+        nu = self.tie_parameter
+        return 2 * self.PRIOR_WEIGHT * (2 + nu / np.sqrt(strengths)) / (strengths + 1 + nu * np.sqrt(strengths))
+
+    def _update_item(self, i):
+        """Take an MM step for the strength of one item, keeping the others fixed."""
+        edges = np.asarray(self._incident[i], dtype=np.int64)
+        items = self._edge_items[edges]
+        others = np.where(items[:, 0] == i, items[:, 1], items[:, 0])
+        p = self.strengths[i]
+        q = self.strengths[others]
+        nu = self.tie_parameter
+        denominator = np.sum(self._edge_counts[edges] * (2 + nu * np.sqrt(q / p)) / (p + q + nu * np.sqrt(p * q)))
+        denominator += self._prior_denominator(p)
+        self.strengths[i] = (self.points[i] + 2 * self.PRIOR_WEIGHT) / denominator
+
+    def sweep(self):
+        """Take an MM step for all of the strengths at once and then for the tie parameter."""
+        self._updates_since_sweep = 0
+        m = len(self._edges)
+        a = self._edge_items[:m, 0]
+        b = self._edge_items[:m, 1]
+        counts = self._edge_counts[:m]
+        self.strengths = davidson.mm_step(
+            self.strengths, self.points, a, b, counts, self.tie_parameter, self.PRIOR_WEIGHT
+        )
+        self.strengths = davidson.scale_step(self.strengths, self.tie_parameter, self.PRIOR_WEIGHT)
+        self.tie_parameter = davidson.tie_step(self.strengths, a, b, counts, self.ties, self.tie_parameter)
+
+    def scores(self):
+        """Get the current score of each item, the natural logarithm of its strength.
+
+        Returns:
+            array(int): Item ids
+            array(float): Scores
+            array(float): Number of judgements of each item
+        """
+        return self.item_ids, np.log(self.strengths), self.judgements
+
+
+class ScoringEngine:
+    """Per-process Davidson model scores for each group of the study, kept in sync with the comparison table.
+
+    The scores are synchronised when they are read rather than when the judgements are made. The first synchronisation
+    fits the scores to all of the comparisons at once, later ones apply the comparisons recorded or rejudged since,
+    replacing the old outcome of a rejudged comparison.
+    """
+
+    APP_ATTRIBUTE = 'scoring_engine'
+
+    _lock = threading.Lock()
+
+    def __init__(self, catalogue) -> None:
+        """Initialise the scores for each group of the catalogue.
+
+        Args:
+            catalogue (Catalogue): Catalogue of the study the scores belong to
+        """
+        self.catalogue = catalogue
+        self.judgements = JudgementLog()
+        self.groups = {group_id: GroupScores(item_ids) for group_id, item_ids in catalogue.groups.items()}
+
+    @classmethod
+    def get(cls, app):
+        """Get the scoring engine for the application, building it again if the study has been set up since.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            ScoringEngine: Scoring engine for the current study, synchronised with the comparison table
+        """
+        catalogue = Catalogue.get(app)
+        with cls._lock:
+            engine = getattr(app, cls.APP_ATTRIBUTE, None)
+            if engine is None or engine.catalogue is not catalogue:
+                engine = cls(catalogue)
+                setattr(app, cls.APP_ATTRIBUTE, engine)
+            engine.sync()
+        return engine
+
+    def sync(self):
+        """Apply the comparisons recorded or rejudged since the last synchronisation to the group scores."""
+        seed = self.judgements.is_empty()
+        item_1_ids, item_2_ids, outcomes, previous = self.judgements.read()
+        if seed:
+            # Nothing has been applied yet, so there are no old outcomes to replace
+            for group_scores in self.groups.values():
+                in_group = (
+                    np.isin(item_1_ids, group_scores.item_ids)
+                    & np.isin(item_2_ids, group_scores.item_ids)
+                    & (outcomes != NO_OUTCOME)
+                )
+                if in_group.any():
+                    group_scores.seed(item_1_ids[in_group], item_2_ids[in_group], outcomes[in_group])
+            return
+
+        changed = outcomes != previous
+        for item_1_id, item_2_id, outcome, previous_outcome in zip(
+            item_1_ids[changed].tolist(),
+            item_2_ids[changed].tolist(),
+            outcomes[changed].tolist(),
+            previous[changed].tolist(),
+        ):
+            for group_scores in self.groups.values():
+                if group_scores.contains(item_1_id, item_2_id):
+                    if previous_outcome != NO_OUTCOME:
+                        group_scores.update(item_1_id, item_2_id, previous_outcome, weight=-1.0)
+                    if outcome != NO_OUTCOME:
+                        group_scores.update(item_1_id, item_2_id, outcome)
+
+    def scores(self, group_id):
+        """Get the current scores of the items of a group, from the strongest to the weakest item.
+
+        Args:
+            group_id (int): Group id
+
+        Returns:
+            list: Dictionaries with the item id, name, score and number of judgements of each item
+        """
+        group_scores = self.groups.get(int(group_id))
+        if group_scores is None:
+            return []
+        item_ids, scores, judgements = group_scores.scores()
+        order = np.argsort(-scores, kind='stable')
+        return [
+            {
+                'item_id': int(item_ids[k]),
+                'item_name': self.catalogue.get_item(item_ids[k]).name,
+                'score': round(float(scores[k]), 4),
+                'judgements': int(judgements[k]),
+            }
+            for k in order
+        ]
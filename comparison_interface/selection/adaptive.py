@@ -0,0 +1,102 @@
+"""Adaptive pair selection driven by a running Bradley-Terry estimate of the item strengths."""
+
+import numpy as np
+
+from .scheduler import GroupScheduler
+
+
+class GroupStrengths:
+    """Running Bradley-Terry strength estimate for the items of a single group.
+
+    Each item keeps a score and the amount of Fisher information gathered about it so far. Every judgement applies a
+    single diagonal Newton step to the two items involved, so the estimate is kept up to date without ever refitting
+    the model over all of the comparisons.
+    """
+
+    # Precision given to every item before any judgement is made (i.e. a unit variance prior on the scores)
+    PRIOR_INFORMATION = 1.0
+
+    def __init__(self, item_ids) -> None:
+        """Initialise the estimate for the supplied item ids.
+
+        Args:
+            item_ids (array(int)): Ids of the items in the group
+        """
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.index = {int(item_id): i for i, item_id in enumerate(self.item_ids)}
+        self.scores = np.zeros(len(self.item_ids), dtype=np.float64)
+        self.information = np.full(len(self.item_ids), self.PRIOR_INFORMATION, dtype=np.float64)
+
+    def contains(self, item_1_id, item_2_id):
+        """Check if both items of a comparison belong to this group."""
+        return item_1_id in self.index and item_2_id in self.index
+
+    def update(self, item_1_id, item_2_id, outcome, weight=1.0):
+        """Update the scores with the outcome of a comparison.
+
+        A judgement is removed by taking the Newton step of the opposite evidence, so a rejudged comparison moves the
+        scores by the difference between its old and new outcomes while the information stays about the same.
+
+        Args:
+            item_1_id (int): Id of the first item compared
+            item_2_id (int): Id of the second item compared
+            outcome (float): 1 if the first item was selected, 0 if the second one was and 0.5 for a tie
+            weight (float, optional): 1 to add the judgement, -1 to remove a judgement added before. Defaults to 1.
+        """
+        i = self.index[item_1_id]
+        j = self.index[item_2_id]
+        p = 1.0 / (1.0 + np.exp(self.scores[j] - self.scores[i]))
+        w = p * (1.0 - p)
+        self.information[i] = max(self.information[i] + weight * w, self.PRIOR_INFORMATION)
+        self.information[j] = max(self.information[j] + weight * w, self.PRIOR_INFORMATION)
+        self.scores[i] += weight * (outcome - p) / self.information[i]
+        self.scores[j] -= weight * (outcome - p) / self.information[j]
+
+    def select_pair(self, rng):
+        """Select the pair of items with the largest expected information gain.
+
+        The gain of comparing two items is p(1-p)(var_1 + var_2), where p is the predicted probability of the first
+        item winning. Each item's best gain is approximated by comparing it with its neighbours in score order, the
+        first item is drawn with a probability proportional to that and its partner is the item which maximises the
+        gain. This keeps the selection O(items log items) while spreading concurrent participants across the catalogue.
+
+        Args:
+            rng (numpy.random.Generator): Random number generator
+
+        Returns:
+            int: Id of the first item | None
+            int: Id of the second item | None
+        """
+        if len(self.item_ids) < 2:
+            return None, None
+
+        variance = 1.0 / self.information
+
+        # 1. Draw the first item using the gain of comparing it against its closest neighbours in score order
+        order = np.argsort(self.scores)
+        p = 1.0 / (1.0 + np.exp(np.diff(self.scores[order])))
+        neighbour_gain = p * (1.0 - p) * (variance[order][:-1] + variance[order][1:])
+        utility = np.empty(len(order))
+        utility[order] = np.maximum(np.append(neighbour_gain, 0.0), np.insert(neighbour_gain, 0, 0.0))
+        i = rng.choice(len(self.item_ids), p=utility / utility.sum())
+
+        # 2. Pair it with the item that maximises the expected gain
+        p = 1.0 / (1.0 + np.exp(self.scores - self.scores[i]))
+        gain = p * (1.0 - p) * (variance + variance[i])
+        gain[i] = -1.0
+        candidates = np.flatnonzero(gain >= gain.max() * (1.0 - 1e-9))
+        j = candidates[rng.integers(len(candidates))]
+
+        if rng.random() < 0.5:
+            i, j = j, i
+        return int(self.item_ids[i]), int(self.item_ids[j])
+
+
+class AdaptiveScheduler(GroupScheduler):
+    """Per-process collection of running strength estimates, one for each group of the study."""
+
+    APP_ATTRIBUTE = 'adaptive_scheduler'
+
+    def _create_group_state(self, item_ids):
+        """Create an empty strength estimate for the items of a group."""
+        return GroupStrengths(item_ids)
@@ -0,0 +1,67 @@
+"""Constant time weighted sampling of item pairs using Walker/Vose alias tables."""
+
+import numpy as np
+
+
+class AliasTable:
+    """Alias table over a fixed list of weighted item pairs.
+
+    The table is built once in O(pairs) time and then each weighted draw only needs one random integer and one random
+    float, regardless of the number of pairs.
+    """
+
+    def __init__(self, item_1_ids, item_2_ids, weights) -> None:
+        """Build the alias table for the weighted pairs supplied.
+
+        Args:
+            item_1_ids (array(int)): Id of the first item of each pair
+            item_2_ids (array(int)): Id of the second item of each pair
+            weights (array(float)): Weight of each pair, they will be normalised to sum 1
+        """
+        self.item_1_ids = np.asarray(item_1_ids, dtype=np.int32)
+        self.item_2_ids = np.asarray(item_2_ids, dtype=np.int32)
+        weights = np.asarray(weights, dtype=np.float64)
+        n = len(weights)
+        self.probability = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int32)
+        if n == 0 or weights.sum() <= 0:
+            return
+
+        # Vose's algorithm: split the scaled weights into those below and above the average and pair them up
+        scaled = weights * n / weights.sum()
+        small = list(np.flatnonzero(scaled < 1.0))
+        large = list(np.flatnonzero(scaled >= 1.0))
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self.probability[s] = scaled[s]
+            self.alias[s] = g
+            scaled[g] = scaled[g] + scaled[s] - 1.0
+            if scaled[g] < 1.0:
+                small.append(g)
+            else:
+                large.append(g)
+        # Whatever remains is (up to rounding errors) exactly at the average weight
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def __len__(self):
+        """Get the number of pairs in the table."""
+        return len(self.probability)
+
+    def sample(self, rng):
+        """Draw a pair respecting the weights.
+
+        Args:
+            rng (numpy.random.Generator): Random number generator
+
+        Returns:
+            int: Id of the first item | None
+            int: Id of the second item | None
+        """
+        if len(self) == 0:
+            return None, None
+        k = int(rng.integers(len(self)))
+        if rng.random() >= self.probability[k]:
+            k = int(self.alias[k])
+        return int(self.item_1_ids[k]), int(self.item_2_ids[k])
@@ -0,0 +1,126 @@
+"""Immutable per-process catalogue of the items and groups of the study."""
+
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from comparison_interface.configuration.integrity import IntegrityGuard
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import CustomItemPair, Item, ItemGroup
+
+from .alias import AliasTable
+
+
+class CatalogueItem(NamedTuple):
+    """Lightweight read only copy of an item row, used when rendering the comparisons."""
+
+    item_id: int
+    name: str
+    display_name: str
+    image_path: str
+    image_description: Optional[str]
+
+
+class Catalogue:
+    """Items and item groups of the study, loaded once per worker process.
+
+    Items and groups never change after the setup command has been run, so the catalogue is only rebuilt when the
+    configuration version checked by the integrity guard changes. The guard only reads the version once its check
+    interval has passed, so getting the catalogue doesn't query the database.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, configuration_version) -> None:
+        """Load the items and their group membership from the database.
+
+        Args:
+            configuration_version (int): Configuration version of the study the catalogue belongs to
+        """
+        self.configuration_version = configuration_version
+        self.items = {}
+        query = db.select(Item.item_id, Item.name, Item.display_name, Item.image_path, Item.image_description)
+        for row in db.session.execute(query).all():
+            self.items[row.item_id] = CatalogueItem(*row)
+
+        members = {}
+        query = db.select(ItemGroup.group_id, ItemGroup.item_id).order_by(ItemGroup.item_id)
+        for group_id, item_id in db.session.execute(query).all():
+            members.setdefault(group_id, []).append(item_id)
+        self.groups = {group_id: np.array(item_ids, dtype=np.int64) for group_id, item_ids in members.items()}
+
+        # Custom weighted pairs are only defined for the manual weight configuration
+        pairs = {}
+        query = db.select(
+            CustomItemPair.group_id, CustomItemPair.item_1_id, CustomItemPair.item_2_id, CustomItemPair.weight
+        ).order_by(CustomItemPair.custom_item_pair_id)
+        for group_id, item_1_id, item_2_id, weight in db.session.execute(query).all():
+            pairs.setdefault(group_id, ([], [], []))
+            pairs[group_id][0].append(item_1_id)
+            pairs[group_id][1].append(item_2_id)
+            pairs[group_id][2].append(weight)
+        self.custom_pairs = {group_id: AliasTable(*p) for group_id, p in pairs.items()}
+
+    @classmethod
+    def get(cls, app):
+        """Get the catalogue for the application, building it again if the study has been set up since.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            Catalogue: Catalogue of the current study
+        """
+        guard = IntegrityGuard.get(app)
+        guard.validate(app)
+        configuration_version = guard.configuration_version
+        with cls._lock:
+            catalogue = getattr(app, 'item_catalogue', None)
+            if catalogue is None or catalogue.configuration_version != configuration_version:
+                catalogue = cls(configuration_version)
+                app.item_catalogue = catalogue
+        return catalogue
+
+    def group_item_ids(self, group_ids):
+        """Get the ids of all of the items belonging to any of the groups supplied.
+
+        Args:
+            group_ids (list): Group ids
+
+        Returns:
+            numpy.ndarray: Sorted unique item ids
+        """
+        arrays = [self.groups[int(g)] for g in group_ids if int(g) in self.groups]
+        if len(arrays) == 0:
+            return np.empty(0, dtype=np.int64)
+        if len(arrays) == 1:
+            return arrays[0]
+        return np.unique(np.concatenate(arrays))
+
+    def sample_custom_pair(self, group_id, rng):
+        """Draw a pair of items from the group respecting the custom weights.
+
+        Args:
+            group_id (int): Group id
+            rng (numpy.random.Generator): Random number generator
+
+        Returns:
+            int: Id of the first item | None
+            int: Id of the second item | None
+        """
+        table = self.custom_pairs.get(int(group_id))
+        if table is None:
+            return None, None
+        return table.sample(rng)
+
+    def get_item(self, item_id):
+        """Get the catalogue entry for an item.
+
+        Args:
+            item_id (int): Item id
+
+        Returns:
+            CatalogueItem: Item details
+        """
+        return self.items[int(item_id)]
@@ -0,0 +1,86 @@
+"""Pair selection which balances the number of judgements made across all items and pairs."""
+
+import numpy as np
+
+from .scheduler import GroupScheduler
+
+
+class GroupCoverage:
+    """Judgement counts for the items and item pairs of a single group.
+
+    The pair counts are held in a dense symmetric matrix so recording a judgement and reading the counts of every
+    partner of an item are both constant time array operations.
+    """
+
+    # How strongly the selection favours items and pairs with fewer judgements
+    BALANCE_EXPONENT = 2.0
+
+    def __init__(self, item_ids) -> None:
+        """Initialise the counts for the supplied item ids.
+
+        Args:
+            item_ids (array(int)): Ids of the items in the group
+        """
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.index = {int(item_id): i for i, item_id in enumerate(self.item_ids)}
+        self.item_counts = np.zeros(len(self.item_ids), dtype=np.int32)
+        self.pair_counts = np.zeros((len(self.item_ids), len(self.item_ids)), dtype=np.int32)
+
+    def contains(self, item_1_id, item_2_id):
+        """Check if both items of a comparison belong to this group."""
+        return item_1_id in self.index and item_2_id in self.index
+
+    def update(self, item_1_id, item_2_id, outcome=None, weight=1.0):
+        """Record a judgement between two items, the outcome is not relevant to the counts.
+
+        Args:
+            item_1_id (int): Id of the first item compared
+            item_2_id (int): Id of the second item compared
+            outcome (float, optional): Outcome of the comparison. Defaults to None.
+            weight (float, optional): 1 to add the judgement, -1 to remove a judgement added before. Defaults to 1.
+        """
+        i = self.index[item_1_id]
+        j = self.index[item_2_id]
+        count = int(weight)
+        self.item_counts[i] += count
+        self.item_counts[j] += count
+        self.pair_counts[i, j] += count
+        self.pair_counts[j, i] += count
+
+    def select_pair(self, rng):
+        """Select a pair favouring the items and pairs with the fewest judgements.
+
+        The first item is drawn with a probability proportional to (1 + judgements)^-k and its partner with a
+        probability proportional to (1 + pair judgements)^-k (1 + partner judgements)^-1, so the whole catalogue reaches
+        a minimum number of judgements quickly while every pair keeps a chance of being selected.
+
+        Args:
+            rng (numpy.random.Generator): Random number generator
+
+        Returns:
+            int: Id of the first item | None
+            int: Id of the second item | None
+        """
+        if len(self.item_ids) < 2:
+            return None, None
+
+        item_weight = (1.0 + self.item_counts) ** -self.BALANCE_EXPONENT
+        i = rng.choice(len(self.item_ids), p=item_weight / item_weight.sum())
+
+        pair_weight = (1.0 + self.pair_counts[i]) ** -self.BALANCE_EXPONENT / (1.0 + self.item_counts)
+        pair_weight[i] = 0.0
+        j = rng.choice(len(self.item_ids), p=pair_weight / pair_weight.sum())
+
+        if rng.random() < 0.5:
+            i, j = j, i
+        return int(self.item_ids[i]), int(self.item_ids[j])
+
+
+class CoverageScheduler(GroupScheduler):
+    """Per-process collection of judgement counts, one for each group of the study."""
+
+    APP_ATTRIBUTE = 'coverage_scheduler'
+
+    def _create_group_state(self, item_ids):
+        """Create empty judgement counts for the items of a group."""
+        return GroupCoverage(item_ids)
@@ -0,0 +1,75 @@
+"""Outcomes of the comparisons made, read incrementally from the comparison table by the per-process caches."""
+
+import numpy as np
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import Comparison
+
+# Outcome coding of a comparison, the same used by the outcome table of the export
+ITEM_1_SELECTED = 0
+ITEM_2_SELECTED = 1
+TIED = 2
+# Kept for the comparisons which were skipped and for those not applied yet
+NO_OUTCOME = -1
+
+
+class JudgementLog:
+    """Outcome applied by a per-process cache for each comparison, with the watermarks to catch up with the table.
+
+    New comparisons are found using the comparison id as a watermark and rejudged comparisons using the revision the
+    database gives them, as both are committed in increasing order. The outcome applied for each comparison is kept in
+    an array indexed by the comparison id, which is all that is needed to replace the old outcome of a rejudged
+    comparison.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty log."""
+        self.last_comparison_id = 0
+        self.last_revision = 0
+        self.outcomes = np.full(0, NO_OUTCOME, dtype=np.int8)
+
+    def is_empty(self):
+        """Check if no comparison has been read yet."""
+        return self.last_comparison_id == 0
+
+    def read(self):
+        """Read the comparisons recorded or rejudged since the last read and log their outcome as applied.
+
+        Returns:
+            array(int): Id of the first item of each comparison
+            array(int): Id of the second item of each comparison
+            array(int): Outcome code of each comparison
+            array(int): Outcome code applied before for each comparison, NO_OUTCOME if it hasn't been read before
+        """
+        outcome = db.case(
+            (Comparison.state == Comparison.SKIPPED, NO_OUTCOME),
+            (Comparison.state == Comparison.TIED, TIED),
+            (Comparison.selected_item_id == Comparison.item_1_id, ITEM_1_SELECTED),
+            else_=ITEM_2_SELECTED,
+        )
+        query = (
+            db.select(
+                Comparison.comparison_id,
+                Comparison.item_1_id,
+                Comparison.item_2_id,
+                outcome,
+                db.func.coalesce(Comparison.revision, 0),
+            )
+            .where(db.or_(Comparison.comparison_id > self.last_comparison_id, Comparison.revision > self.last_revision))
+            .order_by(Comparison.comparison_id)
+        )
+        rows = np.array(db.session.execute(query).all(), dtype=np.int64).reshape(-1, 5)
+        comparison_ids, item_1_ids, item_2_ids, outcomes, revisions = rows.T
+        if len(rows) == 0:
+            return item_1_ids, item_2_ids, outcomes, outcomes.copy()
+
+        size = int(comparison_ids.max()) + 1
+        if size > len(self.outcomes):
+            outcomes_kept = self.outcomes
+            self.outcomes = np.full(max(size, 2 * len(outcomes_kept)), NO_OUTCOME, dtype=np.int8)
+            self.outcomes[: len(outcomes_kept)] = outcomes_kept
+        previous = self.outcomes[comparison_ids].astype(np.int64)
+        self.outcomes[comparison_ids] = outcomes
+        self.last_comparison_id = max(self.last_comparison_id, int(comparison_ids.max()))
+        self.last_revision = max(self.last_revision, int(revisions.max()))
+        return item_1_ids, item_2_ids, outcomes, previous
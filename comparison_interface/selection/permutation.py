@@ -0,0 +1,81 @@
+"""Implicit random permutation of all of the unordered item pairs of a set of items."""
+
+import math
+
+
+class PairPermutation:
+    """Seeded random permutation over the n(n-1)/2 unordered pairs of n items.
+
+    The permutation is computed on demand with a Feistel network over the pair index space and cycle walking, so
+    walking through it with a cursor visits every pair exactly once without ever storing or shuffling the list of
+    pairs.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, item_count, seed) -> None:
+        """Initialise the permutation.
+
+        Args:
+            item_count (int): Number of items the pairs are formed from
+            seed (int): Seed of the permutation, the same seed always gives the same order
+        """
+        self.item_count = item_count
+        self.size = item_count * (item_count - 1) // 2
+        # The Feistel network works on an even number of bits so the domain is at most four times the pair count
+        half_bits = max(1, math.ceil(math.log2(max(self.size, 2)) / 2))
+        self._half_bits = half_bits
+        self._half_mask = (1 << half_bits) - 1
+        self._keys = [self._mix(seed * self.ROUNDS + r) for r in range(self.ROUNDS)]
+
+    def __len__(self):
+        """Get the number of pairs in the permutation."""
+        return self.size
+
+    @staticmethod
+    def _mix(value):
+        """Scramble a 64 bit integer (splitmix64 finaliser)."""
+        value = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return value ^ (value >> 31)
+
+    def _encrypt(self, value):
+        """Apply the Feistel network to a value of the (power of four) domain."""
+        left = value >> self._half_bits
+        right = value & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ (self._mix(right ^ key) & self._half_mask)
+        return (left << self._half_bits) | right
+
+    def pair_index(self, position):
+        """Get the pair index found at a position of the permutation.
+
+        Args:
+            position (int): Position in the permutation, from 0 to the number of pairs - 1
+
+        Returns:
+            int: Pair index in the same range
+        """
+        value = self._encrypt(position)
+        # Cycle walk until the value falls back inside the pair index space
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def pair(self, position):
+        """Get the pair of item positions found at a position of the permutation.
+
+        Args:
+            position (int): Position in the permutation, from 0 to the number of pairs - 1
+
+        Returns:
+            int: Position of the first item
+            int: Position of the second item, always greater than the first one
+        """
+        k = self.pair_index(position)
+        n = self.item_count
+        # Unrank the pair index in the row major order of the upper triangle of the n x n matrix
+        i = n - 2 - (math.isqrt(4 * n * (n - 1) - 8 * k - 7) - 1) // 2
+        j = k + i + 1 - self.size + (n - i) * (n - i - 1) // 2
+        return i, j
@@ -0,0 +1,67 @@
+"""Server side queue of the pairs prepared in advance for each participant."""
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import QueuedPair
+
+
+class PairQueue:
+    """Pairs of items waiting to be shown to a participant.
+
+    The pairs are selected in batches and stored in the database so that the rank page only needs to take the next
+    entry, whichever worker process serves the request.
+    """
+
+    def __init__(self, participant_id) -> None:
+        """Initialise the queue of a participant.
+
+        Args:
+            participant_id (int): Participant id
+        """
+        self.participant_id = participant_id
+
+    def pop(self):
+        """Take the next pair from the queue.
+
+        The pair is read and removed by a single statement, so two requests of the participant served at the same
+        time can't both take it.
+
+        Returns:
+            int: Id of the first item | None
+            int: Id of the second item | None
+        """
+        next_id = (
+            db.select(db.func.min(QueuedPair.queued_pair_id))
+            .where(QueuedPair.participant_id == self.participant_id)
+            .scalar_subquery()
+        )
+        statement = (
+            db.delete(QueuedPair)
+            .where(QueuedPair.queued_pair_id == next_id)
+            .returning(QueuedPair.item_1_id, QueuedPair.item_2_id)
+            .execution_options(synchronize_session=False)
+        )
+        entry = db.session.execute(statement).first()
+        db.session.commit()
+        if entry is None:
+            return None, None
+        return entry.item_1_id, entry.item_2_id
+
+    def push(self, pairs):
+        """Add pairs at the end of the queue.
+
+        Args:
+            pairs (list): Pairs of item ids, in the order they should be shown
+        """
+        if len(pairs) == 0:
+            return
+        rows = [
+            {'participant_id': self.participant_id, 'item_1_id': int(item_1_id), 'item_2_id': int(item_2_id)}
+            for item_1_id, item_2_id in pairs
+        ]
+        db.session.execute(db.insert(QueuedPair), rows)
+        db.session.commit()
+
+    def clear(self):
+        """Remove all of the pairs waiting in the queue."""
+        db.session.execute(db.delete(QueuedPair).where(QueuedPair.participant_id == self.participant_id))
+        db.session.commit()
@@ -0,0 +1,98 @@
+"""Base class for pair selection strategies which learn from the judgements made."""
+
+import threading
+from abc import ABC, abstractmethod
+
+from .catalogue import Catalogue
+from .judgements import ITEM_1_SELECTED, ITEM_2_SELECTED, NO_OUTCOME, TIED, JudgementLog
+
+
+class GroupScheduler(ABC):
+    """Per-process pair scheduler which keeps some incrementally updated state for each group of the study.
+
+    The state is seeded from the comparison table the first time it is needed and is then caught up incrementally with
+    the comparisons recorded or rejudged since, so judgements made through other worker processes are also taken into
+    account. Inheriting classes define the state kept for each group through `_create_group_state`, the state object
+    must provide `contains`, `update` and `select_pair` methods, where `update` removes a judgement added before when
+    its weight is -1.
+    """
+
+    # Name of the application attribute holding the scheduler of this kind
+    APP_ATTRIBUTE = None
+    # Outcome passed to the group states for each outcome code, from the point of view of the first item
+    OUTCOMES = {ITEM_1_SELECTED: 1.0, ITEM_2_SELECTED: 0.0, TIED: 0.5}
+
+    _lock = threading.Lock()
+
+    def __init__(self, catalogue) -> None:
+        """Build the initial state for each group of the catalogue.
+
+        Args:
+            catalogue (Catalogue): Catalogue of the study the scheduler belongs to
+        """
+        self.catalogue = catalogue
+        self.judgements = JudgementLog()
+        self.groups = {group_id: self._create_group_state(item_ids) for group_id, item_ids in catalogue.groups.items()}
+
+    @classmethod
+    def get(cls, app):
+        """Get the scheduler for the application, building it again if the study has been set up since.
+
+        Args:
+            app (Flask app): Flask application
+
+        Returns:
+            GroupScheduler: Scheduler for the current study, synchronised with the comparison table
+        """
+        catalogue = Catalogue.get(app)
+        with cls._lock:
+            scheduler = getattr(app, cls.APP_ATTRIBUTE, None)
+            if scheduler is None or scheduler.catalogue is not catalogue:
+                scheduler = cls(catalogue)
+                setattr(app, cls.APP_ATTRIBUTE, scheduler)
+            scheduler.sync()
+        return scheduler
+
+    @abstractmethod
+    def _create_group_state(self, item_ids):
+        """Create the initial state of a group.
+
+        Args:
+            item_ids (array(int)): Ids of the items in the group
+
+        Returns:
+            object: State of the group, without any judgement
+        """
+
+    def sync(self):
+        """Apply the comparisons recorded or rejudged since the last synchronisation to the group states."""
+        item_1_ids, item_2_ids, outcomes, previous = self.judgements.read()
+        changed = outcomes != previous
+        for item_1_id, item_2_id, outcome, previous_outcome in zip(
+            item_1_ids[changed].tolist(),
+            item_2_ids[changed].tolist(),
+            outcomes[changed].tolist(),
+            previous[changed].tolist(),
+        ):
+            for group_state in self.groups.values():
+                if group_state.contains(item_1_id, item_2_id):
+                    if previous_outcome != NO_OUTCOME:
+                        group_state.update(item_1_id, item_2_id, self.OUTCOMES[previous_outcome], weight=-1.0)
+                    if outcome != NO_OUTCOME:
+                        group_state.update(item_1_id, item_2_id, self.OUTCOMES[outcome])
+
+    def select_pair(self, group_id, rng):
+        """Select a pair of items for the group.
+
+        Args:
+            group_id (int): Group the pair should be selected from
+            rng (numpy.random.Generator): Random number generator
+
+        Returns:
+            int: Id of the first item | None
+            int: Id of the second item | None
+        """
+        group_state = self.groups.get(int(group_id))
+        if group_state is None:
+            return None, None
+        return group_state.select_pair(rng)
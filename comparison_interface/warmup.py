@@ -0,0 +1,71 @@
+"""Load the per-process caches of the website before the server forks its worker processes."""
+
+import gc
+import time
+
+from comparison_interface.configuration.integrity import IntegrityGuard
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import WebsiteControl
+from comparison_interface.main.views.rank import Rank
+from comparison_interface.main.views.request import Request
+from comparison_interface.scoring.online import ScoringEngine
+from comparison_interface.selection.catalogue import Catalogue
+
+
+def warm_up(app):
+    """Load the compiled configuration, the layout text, the item catalogue, the pair scheduler and the scores.
+
+    When this is run by the master process, e.g. by `create_app`, before uWSGI forks its workers, the workers share
+    all of these objects copy-on-write and don't need to build them on their first requests. The database connections
+    used are closed so they are not shared by the workers, and the objects loaded are moved out of the reach of the
+    garbage collector so their memory pages are not written to by its collections in the workers.
+
+    Args:
+        app (Flask app): Flask application
+
+    Returns:
+        dict: Number of seconds taken by each step, empty if the study has not been set up or is not healthy
+    """
+    timings = {}
+
+    def step(name, function):
+        start = time.perf_counter()
+        function()
+        timings[name] = time.perf_counter() - start
+
+    with app.app_context():
+        try:
+            if WebsiteControl().get_conf() is None:
+                app.logger.warning("Warm up skipped, the study has not been set up yet.")
+                return {}
+            step("configuration", lambda: IntegrityGuard.get(app).validate(app))
+        except Exception as e:
+            app.logger.warning("Warm up skipped: %s" % (e))
+            db.session.remove()
+            return {}
+
+        step("layout text", lambda: Request(app, None).get_layout_text())
+        step("templates", lambda: _compile_templates(app))
+        step("catalogue", lambda: Catalogue.get(app))
+        scheduler = Rank.SCHEDULERS.get(WebsiteControl().get_conf().weight_configuration)
+        if scheduler is not None:
+            step("scheduler", lambda: scheduler.get(app))
+        step("scores", lambda: ScoringEngine.get(app))
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    return timings
+
+
+def _compile_templates(app):
+    """Compile all of the html templates of the application into the cache of the Jinja environment.
+
+    Args:
+        app (Flask app): Flask application
+    """
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
@@ -68,6 +68,26 @@ def custom_weight_client(custom_weight_app):
         yield custom_weight_app.test_client()
 
 
+@pytest.fixture()
+def adaptive_weight_app():
+    """Set up the project for testing with adaptive pair selection."""
+    app = execute_setup("../tests/test_configurations/config-adaptive-item-weights.json")
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        os.unlink(os.path.join(os.path.join(app.instance_path), 'test_admin_database.db'))
+        os.unlink(os.path.join(os.path.join(app.instance_path), 'test_database.db'))
+
+
+@pytest.fixture()
+def adaptive_weight_client(adaptive_weight_app):
+    """Return the test client for the adaptive weight app."""
+    with adaptive_weight_app.app_context():
+        yield adaptive_weight_app.test_client()
+
+
 @pytest.fixture(scope='session')
 def participant_data():
     """Return some test participant data."""
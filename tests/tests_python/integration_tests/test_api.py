@@ -205,3 +205,31 @@ def test_outcomes_api_available_and_correct_when_switched_on_if_key_sent(equal_w
     response = equal_weight_client_api.get("/api/outcomes", headers={'x-api-key': 'test-key'})
     assert response.status_code == 200
     assert response.data == b'item_1_id,item_2_id,outcome\r\n1,2,0\r\n3,4,1\r\n1,3,2\r\n'
+
+
+@pytest.mark.usefixtures('key_file')
+def test_scores_api_available_when_switched_on_if_key_sent(equal_weight_client_api):
+    """
+    GIVEN a flask app configured for testing, with equal weights, API_ACCESS and a key file
+    WHEN the api scores url is requested and the api key is provided
+    THEN a 200 code is received and the items are listed from the strongest to the weakest in each group
+    """
+    for item_1_id, item_2_id in [(1, 2), (1, 3), (2, 3)]:
+        comparison = Comparison(
+            participant_id=1,
+            item_1_id=item_1_id,
+            item_2_id=item_2_id,
+            selected_item_id=item_1_id,
+            state='selected',
+            created=datetime.now(timezone.utc),
+            updated=datetime.now(timezone.utc),
+        )
+        db.session.add(comparison)
+    db.session.commit()
+    response = equal_weight_client_api.get("/api/scores", headers={'x-api-key': 'test-key'})
+    assert response.status_code == 200
+    lines = response.data.decode('utf-8').splitlines()
+    assert lines[0] == 'group_id,item_id,item_name,score,judgements'
+    item_ids = [line.split(',')[1] for line in lines[1:] if line.startswith('1,')]
+    assert item_ids[0] == '1'
+    assert item_ids[-1] == '3'
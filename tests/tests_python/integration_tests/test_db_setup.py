@@ -1,5 +1,10 @@
+import numpy as np
 from sqlalchemy import create_engine, text
 
+from comparison_interface.configuration.groups import GroupConfiguration, ItemConfiguration
+from comparison_interface.configuration.integrity import IntegrityGuard
+from comparison_interface.configuration.website import Settings as WS
+from comparison_interface.db.setup import Setup as DBSetup
 from tests.tests_python.conftest import execute_setup
 
 
@@ -13,11 +18,13 @@ def test_participant_setup(equal_weight_app):
     with engine.connect() as conn:
         sql = 'SELECT * FROM "participant"'
         participant_columns = conn.execute(text(sql)).keys()
-        assert len(participant_columns) == 9
+        assert len(participant_columns) == 11
         assert participant_columns == [
             'participant_id',
             'created_date',
             'completed_cycles',
+            'compared_count',
+            'skipped_count',
             'name',
             'country',
             'allergies',
@@ -140,3 +147,178 @@ def test_setup_items_without_ids(equal_weight_app):
         items = conn.execute(text(item_count_sql)).all()
         assert len(items) == 1
         assert items[0].name == "northern_ireland"
+
+
+def test_setup_increments_configuration_version(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN the database is initialised again
+    THEN the website control row has the next configuration version and the same configuration hash
+    """
+    engine = create_engine(equal_weight_app.config["SQLALCHEMY_BINDS"]["study_db"])
+    sql = 'SELECT configuration_version, configuration_hash FROM "website_control"'
+    with engine.connect() as conn:
+        version, configuration_hash = conn.execute(text(sql)).one()
+    DBSetup(equal_weight_app).exec()
+    with engine.connect() as conn:
+        assert conn.execute(text(sql)).one() == (version + 1, configuration_hash)
+
+
+def test_create_indexes(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing whose study database is missing its indexes
+    WHEN the missing indexes are created
+    THEN they are added without changing the data and the comparison counts are read from the participant index
+    """
+    engine = create_engine(equal_weight_app.config["SQLALCHEMY_BINDS"]["study_db"])
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX "_comparison_participant_state_idx"'))
+        conn.execute(text('DROP INDEX "_participant_item_known_idx"'))
+        items = conn.execute(text('SELECT COUNT(*) FROM "item"')).scalar()
+
+    assert DBSetup(equal_weight_app).create_indexes() == [
+        '_comparison_participant_state_idx',
+        '_participant_item_known_idx',
+    ]
+    assert DBSetup(equal_weight_app).create_indexes() == []
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM "item"')).scalar() == items
+        sql = (
+            'EXPLAIN QUERY PLAN SELECT state, COUNT(comparison_id) FROM comparison WHERE participant_id=1 '
+            'GROUP BY state'
+        )
+        plan = ' '.join(row[-1] for row in conn.execute(text(sql)).all())
+        assert 'COVERING INDEX _comparison_participant_state_idx' in plan
+
+
+def test_add_missing_columns(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing whose study database was set up before the latest tables and columns
+    WHEN the missing tables and columns are added
+    THEN they are filled from the existing rows and the study passes the configuration check
+    """
+    engine = create_engine(equal_weight_app.config["SQLALCHEMY_BINDS"]["study_db"])
+    with engine.begin() as conn:
+        conn.execute(
+            text('INSERT INTO "participant" (name, country, allergies, age, email) VALUES ("a", "b", "c", 1, "d")')
+        )
+        for state in ['selected', 'selected', 'tied', 'skipped']:
+            conn.execute(
+                text(
+                    'INSERT INTO "comparison" (participant_id, item_1_id, item_2_id, selected_item_id, state) '
+                    'VALUES (1, 1, 2, 1, :state)'
+                ),
+                {'state': state},
+            )
+        conn.execute(text('DROP TABLE "queued_pair"'))
+        conn.execute(text('DROP INDEX "ix_comparison_revision"'))
+        for table, column in [
+            ('comparison', 'revision'),
+            ('participant', 'compared_count'),
+            ('participant', 'skipped_count'),
+            ('website_control', 'configuration_hash'),
+            ('website_control', 'configuration_version'),
+        ]:
+            conn.execute(text('ALTER TABLE "{}" DROP COLUMN "{}"'.format(table, column)))
+
+    setup = DBSetup(equal_weight_app)
+    assert sorted(setup.add_missing_columns()) == [
+        'comparison.revision',
+        'participant.compared_count',
+        'participant.skipped_count',
+        'queued_pair',
+        'website_control.configuration_hash',
+        'website_control.configuration_version',
+    ]
+    assert setup.add_missing_columns() == []
+    assert setup.create_indexes() == ['ix_comparison_revision']
+    with engine.connect() as conn:
+        sql = 'SELECT compared_count, skipped_count FROM "participant"'
+        assert conn.execute(text(sql)).all() == [(3, 1)]
+        sql = 'SELECT configuration_version, configuration_hash FROM "website_control"'
+        version, configuration_hash = conn.execute(text(sql)).one()
+    assert version == 1
+    assert configuration_hash == WS.get_configuration_fingerprint(equal_weight_app)
+    IntegrityGuard.get(equal_weight_app).validate(equal_weight_app)
+    engine.dispose()
+
+
+def test_setup_bulk_insert_in_chunks(mocker, custom_weight_app):
+    """
+    GIVEN a flask app configured for testing and custom weights, with an item listed in both groups and an item id
+    WHEN the database is initialised with chunks of two rows
+    THEN the items are inserted once with the ids SQLite would give them and the weights are all saved
+    """
+    items = (
+        ItemConfiguration(None, 'a', 'A', 'item_1.png', None),
+        ItemConfiguration(10, 'b', 'B', 'item_2.png', None),
+        ItemConfiguration(None, 'c', 'C', 'item_3.png', 'C'),
+    )
+    pairs = np.array([[0, 1], [0, 2], [1, 2]], dtype=np.int32)
+    weights = np.array([0.1, 0.2, 0.7], dtype=np.float32)
+    groups = (
+        GroupConfiguration('first', 'First', items, pairs, weights),
+        GroupConfiguration('second', 'Second', items[2:] + items[:1]),
+    )
+    mocker.patch.object(WS, 'get_groups', return_value=groups)
+    mocker.patch.object(DBSetup, 'CHUNK_SIZE', 2)
+    setup = DBSetup(custom_weight_app)
+    setup.exec()
+
+    assert set(setup.timings) == {'groups', 'items', 'item groups', 'custom item pairs', 'commit', 'participant fields'}
+    engine = create_engine(custom_weight_app.config["SQLALCHEMY_BINDS"]["study_db"])
+    with engine.connect() as conn:
+        sql = 'SELECT item_id, name FROM "item" ORDER BY item_id'
+        assert conn.execute(text(sql)).all() == [(1, 'a'), (10, 'b'), (11, 'c')]
+        sql = 'SELECT group_id, item_id FROM "item_group" ORDER BY group_id, item_id'
+        assert conn.execute(text(sql)).all() == [(1, 1), (1, 10), (1, 11), (2, 1), (2, 11)]
+        sql = 'SELECT group_id, item_1_id, item_2_id, weight FROM "custom_item_pair" ORDER BY custom_item_pair_id'
+        assert conn.execute(text(sql)).all() == [(1, 1, 10, 0.1), (1, 1, 11, 0.2), (1, 10, 11, 0.7)]
+
+
+def test_setup_from_template(mocker, tmp_path, custom_weight_app):
+    """
+    GIVEN a flask app configured for testing and custom weights, with a folder for the template databases
+    WHEN the database is initialised twice, with a participant registered in between
+    THEN the second setup restores the template saved by the first one, without the participant and as a new version
+    """
+    custom_weight_app.config[DBSetup.TEMPLATE_DIRECTORY] = str(tmp_path)
+    DBSetup(custom_weight_app).exec()
+    assert len(list(tmp_path.glob('*.db'))) == 1
+
+    engine = create_engine(custom_weight_app.config["SQLALCHEMY_BINDS"]["study_db"])
+    control_sql = 'SELECT configuration_version, setup_exec_date FROM "website_control"'
+    with engine.begin() as conn:
+        conn.execute(
+            text('INSERT INTO "participant" (name, country, allergies, age, email) VALUES ("a", "b", "c", 1, "d")')
+        )
+        version, setup_date = conn.execute(text(control_sql)).one()
+
+    setup_group = mocker.spy(DBSetup, '_setup_group')
+    setup = DBSetup(custom_weight_app)
+    setup.exec()
+    assert setup_group.call_count == 0
+    assert list(setup.timings) == ['template restore']
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM "participant"')).scalar() == 0
+        assert conn.execute(text('SELECT COUNT(*) FROM "custom_item_pair"')).scalar() == 9
+        new_version, new_setup_date = conn.execute(text(control_sql)).one()
+        assert new_version == version + 1
+        assert new_setup_date > setup_date
+    engine.dispose()
+
+
+def test_setup_only_replaces_templates(tmp_path, custom_weight_app):
+    """
+    GIVEN a folder for the template databases holding another database and the template of another configuration
+    WHEN the database is initialised
+    THEN the template of the other configuration is replaced and the other database is kept
+    """
+    custom_weight_app.config[DBSetup.TEMPLATE_DIRECTORY] = str(tmp_path)
+    (tmp_path / 'study.db').write_bytes(b'')
+    (tmp_path / ('0' * 64 + '.db')).write_bytes(b'')
+    DBSetup(custom_weight_app).exec()
+    names = sorted(path.name for path in tmp_path.glob('*.db'))
+    assert len(names) == 2
+    assert names[1] == 'study.db'
+    assert DBSetup.TEMPLATE_NAME.fullmatch(names[0]) and names[0] != '0' * 64 + '.db'
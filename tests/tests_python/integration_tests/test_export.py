@@ -15,3 +15,37 @@ def test_export_equal_weights(equal_weight_client, equal_weight_app, participant
     runner.invoke(args=["export"])
 
     assert os.path.exists(os.path.join(WS.get_export_location(equal_weight_app), 'database_export.zip'))
+
+
+def test_fit_equal_weights(equal_weight_client, equal_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN the score fit is requested on the command line
+    THEN a scores file is generated in the export location
+    """
+    with equal_weight_client:
+        equal_weight_client.post("/register", data=participant_data)
+    runner = equal_weight_app.test_cli_runner()
+    runner.invoke(args=["fit"])
+
+    path = os.path.join(WS.get_export_location(equal_weight_app), 'scores.csv')
+    assert os.path.exists(path)
+    with open(path, encoding='utf-8') as scores_file:
+        assert scores_file.readline().strip() == 'group_id,item_id,item_name,score,standard_error,judgements'
+
+
+def test_fit_with_bootstrap(equal_weight_client, equal_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN the score fit with bootstrap intervals is requested on the command line
+    THEN the scores file includes the bounds of the intervals
+    """
+    with equal_weight_client:
+        equal_weight_client.post("/register", data=participant_data)
+    runner = equal_weight_app.test_cli_runner()
+    runner.invoke(args=["fit", "--format=tsv", "--bootstrap=10", "--workers=2", "--seed=1"])
+
+    path = os.path.join(WS.get_export_location(equal_weight_app), 'scores.tsv')
+    assert os.path.exists(path)
+    with open(path, encoding='utf-8') as scores_file:
+        assert scores_file.readline().strip().split('\t')[-2:] == ['lower', 'upper']
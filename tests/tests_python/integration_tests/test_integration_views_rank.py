@@ -86,6 +86,27 @@ def test_register_selected_rank_comparison(equal_weight_client, equal_weight_app
             assert comp.item_2_id == 2
 
 
+def test_scores_not_fitted_when_judging(equal_weight_client, equal_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN a ranking decision is posted to the rank url
+    THEN the item scores are not fitted, they are only synchronised when they are read
+    """
+    with equal_weight_client:
+        equal_weight_client.post("/register", data=participant_data)
+        response = equal_weight_client.post(
+            "/rank",
+            data={
+                'state': 'confirmed',
+                'item_1_id': '1',
+                'item_2_id': '2',
+                'selected_item_id': '1',
+            },
+        )
+        assert response.status_code == 302
+        assert getattr(equal_weight_app, 'scoring_engine', None) is None
+
+
 def test_register_skipped_rank_comparison(equal_weight_client, equal_weight_app, participant_data):
     """
     GIVEN a flask app configured for testing and with equal weights
@@ -176,6 +197,44 @@ def test_rejudging_a_comparison(equal_weight_client, equal_weight_app, participa
             assert comp.item_2_id == 2
 
 
+def test_comparison_counters(equal_weight_client, equal_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN comparisons are made, skipped and then rejudged
+    THEN the participant's comparison counters follow the state of their comparisons
+    """
+
+    def get_counters():
+        participant = db.session.get(Participant, session['participant_id'])
+        db.session.refresh(participant)
+        return participant.compared_count, participant.skipped_count
+
+    with equal_weight_client:
+        equal_weight_client.post("/register", data=participant_data)
+        assert get_counters() == (0, 0)
+        equal_weight_client.post(
+            "/rank", data={'state': 'confirmed', 'item_1_id': '1', 'item_2_id': '2', 'selected_item_id': '1'}
+        )
+        equal_weight_client.post("/rank", data={'state': 'skipped', 'item_1_id': '3', 'item_2_id': '4'})
+        equal_weight_client.post("/rank", data={'state': 'confirmed', 'item_1_id': '5', 'item_2_id': '6'})
+        assert get_counters() == (2, 1)
+
+        # From skipped to selected
+        rejudged = {'state': 'confirmed', 'item_1_id': 3, 'item_2_id': 4, 'selected_item_id': 4, 'comparison_id': 2}
+        equal_weight_client.post("/rank", data=rejudged)
+        assert get_counters() == (3, 0)
+        # From selected to tied
+        equal_weight_client.post(
+            "/rank", data={'state': 'confirmed', 'item_1_id': '1', 'item_2_id': '2', 'comparison_id': 1}
+        )
+        assert get_counters() == (3, 0)
+        # From tied to skipped
+        equal_weight_client.post(
+            "/rank", data={'state': 'skipped', 'item_1_id': '5', 'item_2_id': '6', 'comparison_id': 3}
+        )
+        assert get_counters() == (2, 1)
+
+
 def test_rejudging_request_with_an_invalid_comparison_id_raises_error(equal_weight_client, participant_data):
     """
     GIVEN a flask app configured for testing and with equal weights
@@ -343,6 +402,52 @@ def test_redirect_at_first_cycle_end(mocker, equal_weight_client, equal_weight_a
     assert b'id="continue_button"' in response.data
 
 
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_participant_is_loaded_once_at_cycle_end(mocker, equal_weight_client, equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights and basic data
+    WHEN a logged in participant who has made a full cycle of comparisons requests the rank page
+    THEN their row is only loaded once to read their progress and to complete the cycle
+    """
+    with equal_weight_client.session_transaction() as session:
+        session['participant_id'] = 1
+        session['group_ids'] = [1]
+        session['weight_conf'] = 'equal'
+        session['previous_comparison_id'] = None
+        session['comparison_ids'] = []
+    participant = db.session.get(Participant, session['participant_id'])
+    participant.compared_count = WS.get_behaviour_conf(WS.BEHAVIOUR_CYCLE_LENGTH, equal_weight_app)
+    db.session.commit()
+    get_participant = mocker.spy(rank.Rank, '_get_participant')
+    response = equal_weight_client.get("/rank")
+    assert response.status_code == 302
+    assert get_participant.call_count == 1
+    db.session.expire_all()
+    assert db.session.get(Participant, session['participant_id']).completed_cycles == 1
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_no_pair_selected_at_cycle_end(mocker, equal_weight_client, equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights and basic data
+    WHEN a logged in participant who has made a full cycle of comparisons requests the rank page
+    THEN they are redirected without a pair being selected for them
+    """
+    with equal_weight_client.session_transaction() as session:
+        session['participant_id'] = 1
+        session['group_ids'] = [1]
+        session['weight_conf'] = 'equal'
+        session['previous_comparison_id'] = None
+        session['comparison_ids'] = []
+    participant = db.session.get(Participant, session['participant_id'])
+    participant.compared_count = WS.get_behaviour_conf(WS.BEHAVIOUR_CYCLE_LENGTH, equal_weight_app)
+    db.session.commit()
+    get_items = mocker.spy(rank.Rank, '_get_items_to_compare')
+    response = equal_weight_client.get("/rank")
+    assert response.status_code == 302
+    assert get_items.call_count == 0
+
+
 @pytest.mark.usefixtures('add_basic_data_equal')
 def test_redirect_after_final_cycle_end(mocker, equal_weight_client, equal_weight_app):
     """
@@ -470,3 +575,30 @@ def test_no_previous_button_if_setting_false(participant_data):
     assert response.status_code == 200
     assert b'Comparison Software: Items Rank' in response.data
     assert b'<button id="previous-button"' not in response.data
+
+
+def test_adaptive_rank_comparison(adaptive_weight_client, adaptive_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and with adaptive weights
+    WHEN a participant makes a judgement and requests the next comparison
+    THEN the rank page is rendered and the running strength estimate includes the judgement
+    """
+    with adaptive_weight_client:
+        adaptive_weight_client.post("/register", data=participant_data)
+        response = adaptive_weight_client.get("/rank", follow_redirects=True)
+        assert response.status_code == 200
+        assert b'Comparison Software: Items Rank' in response.data
+
+        adaptive_weight_client.post(
+            "/rank",
+            data={
+                'state': 'confirmed',
+                'item_1_id': '12',
+                'item_2_id': '11',
+                'selected_item_id': '12',
+            },
+        )
+        response = adaptive_weight_client.get("/rank")
+        assert response.status_code == 200
+        strengths = adaptive_weight_app.adaptive_scheduler.groups[1]
+        assert strengths.scores[strengths.index[12]] > strengths.scores[strengths.index[11]]
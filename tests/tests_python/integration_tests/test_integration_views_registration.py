@@ -1,5 +1,13 @@
+import json
+import os
+
+import pytest
+
+from comparison_interface.configuration.website import Settings as WS
 from comparison_interface.db.connection import db
-from comparison_interface.db.models import Participant
+from comparison_interface.db.models import Participant, ParticipantGroup
+from comparison_interface.db.participant import ParticipantTable
+from comparison_interface.db.setup import Setup as DBSetup
 from comparison_interface.main.views import register
 
 
@@ -80,3 +88,67 @@ def test_register_participant_with_escape_route_off(mocker, equal_weight_client,
             assert participant.completed_cycles is None
             assert isinstance(participant.participant_id, int)
             assert participant.participant_id == session['participant_id']
+
+
+def test_register_participant_with_several_groups(mocker, equal_weight_client, equal_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN two participants register, the second one with two groups
+    THEN the participant table is only reflected once and each participant is saved with all of their groups
+    """
+    reflect = mocker.spy(ParticipantTable, '__init__')
+    with equal_weight_client:
+        equal_weight_client.post("/register", data=participant_data)
+        equal_weight_client.get("/logout")
+        response = equal_weight_client.post("/register", data={**participant_data, 'group_ids': [1, 2]})
+        assert response.status_code == 302
+        with equal_weight_client.session_transaction() as session:
+            participant_id = session['participant_id']
+        assert participant_id == 2
+        query = db.select(ParticipantGroup.group_id).where(ParticipantGroup.participant_id == participant_id)
+        assert sorted(db.session.scalars(query).all()) == [1, 2]
+    assert reflect.call_count == 1
+
+
+def test_register_participant_is_rolled_back(equal_weight_client, equal_weight_app, participant_data):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN a participant registers with a group listed twice, so their groups cannot be saved
+    THEN an error is raised and the participant is not saved either
+    """
+    with equal_weight_client:
+        with pytest.raises(RuntimeError):
+            equal_weight_client.post("/register", data={**participant_data, 'group_ids': [1, 1]})
+        assert db.session.scalars(db.select(Participant)).all() == []
+
+
+def test_setup_again_with_changed_configuration(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN the study is set up again from the same configuration location after the configuration file has changed
+    THEN the registration page shows the text of the changed configuration
+    """
+    location = '../tests/test_configurations/config-equal-item-weights-changed.json'
+    original = WS.get_configuration_location(equal_weight_app)
+    filepath = os.path.join(os.path.dirname(original), os.path.basename(location))
+    with open(original) as config_file:
+        configuration = json.load(config_file)
+    try:
+        with open(filepath, 'w') as config_file:
+            json.dump(configuration, config_file)
+        WS.set_configuration_location(equal_weight_app, location)
+        DBSetup(equal_weight_app).exec()
+        with equal_weight_app.test_client() as client:
+            assert b'Which of these boroughs are you familiar with?' in client.get("/register").data
+
+        configuration['websiteTextConfiguration']['userRegistrationGroupQuestionLabel'] = 'Which areas do you know?'
+        with open(filepath, 'w') as config_file:
+            json.dump(configuration, config_file)
+        WS.set_configuration_location(equal_weight_app, location)
+        DBSetup(equal_weight_app).exec()
+        with equal_weight_app.test_client() as client:
+            response = client.get("/register")
+            assert b'Which areas do you know?' in response.data
+            assert b'Which of these boroughs are you familiar with?' not in response.data
+    finally:
+        os.unlink(filepath)
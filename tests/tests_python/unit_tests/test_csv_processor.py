@@ -175,3 +175,19 @@ def test_maximal_csv_processed_correctly():
         "weightConfiguration": "equal",
     }
     assert data == expected_data
+
+
+def test_csv_items_read_in_chunks():
+    """
+    GIVEN a csv file with the minimum required columns
+    WHEN the items are read in chunks
+    THEN the chunks hold at most the chunk size items, with the line number of each row and the optional columns filled
+    """
+    processor = CsvProcessor(chunk_size=4)
+    chunks = list(processor.iter_chunks('../tests/test_configurations/csv_example_1/example_1.csv'))
+    assert [len(c) for c in chunks] == [4, 4, 1]
+    first = chunks[0][0]
+    assert first.line == 2
+    assert first.name == "north_east"
+    assert first.group_name == "default"
+    assert chunks[-1][-1].line == 10
@@ -111,3 +111,79 @@ def test_group_configuration_with_inconsistent_item_ids():
     with pytest.raises(ValidationError):
         group_schema = Group()
         group_schema.load(test_group_schema)
+
+
+def _custom_weight_group(item_count):
+    """Build a group chunk with equal custom weights for all of the item pairs."""
+    names = [f"item_{i}" for i in range(item_count)]
+    pair_count = item_count * (item_count - 1) // 2
+    return {
+        "name": "group1",
+        "displayName": "Group 1",
+        "items": [{"name": name, "displayName": name, "imageName": "item_1.png"} for name in names],
+        "weight": [
+            {"item_1": names[j], "item_2": names[i], "weight": 1 / pair_count}
+            for i in range(item_count)
+            for j in range(i + 1, item_count)
+        ],
+    }
+
+
+def test_group_configuration_with_complete_custom_weights():
+    """
+    GIVEN a group chunk with a custom weight for every item pair, in either order and some given as strings
+    WHEN the group chunk is validated using the Group schema class
+    THEN no Validation Error is raised and the weights are loaded as columns
+    """
+    test_group_schema = _custom_weight_group(50)
+    test_group_schema["weight"][0]["weight"] = str(test_group_schema["weight"][0]["weight"])
+    data = Group().load(test_group_schema)
+    assert len(data["weight"].item_1) == 1225
+    assert data["weight"].weight.sum() == pytest.approx(1.0)
+
+
+def test_group_configuration_with_missing_custom_weights():
+    """
+    GIVEN a group chunk where the weights of several item pairs are missing
+    WHEN the group chunk is validated using the Group schema class
+    THEN a Validation Error listing the first missing pairs is raised
+    """
+    test_group_schema = _custom_weight_group(50)
+    del test_group_schema["weight"][:8]
+    with pytest.raises(ValidationError) as err:
+        Group().load(test_group_schema)
+    message = err.value.messages_dict["_schema"][0]
+    assert message.startswith("Custom weights for item pairs ('item_0', 'item_1'), ('item_0', 'item_2')")
+    assert message.endswith(" and 3 more need to be defined.")
+
+
+def test_group_configuration_with_duplicated_custom_weights():
+    """
+    GIVEN a group chunk where the weight of an item pair is defined twice, once in each order
+    WHEN the group chunk is validated using the Group schema class
+    THEN a Validation Error is raised for the duplicated pair
+    """
+    test_group_schema = _custom_weight_group(3)
+    test_group_schema["weight"][0] = {"item_1": "item_1", "item_2": "item_2", "weight": 1 / 3}
+    with pytest.raises(ValidationError) as err:
+        Group().load(test_group_schema)
+    assert err.value.messages_dict["_schema"] == [
+        "Custom weight for item pair ('item_1', 'item_2') is defined more than once."
+    ]
+
+
+def test_group_configuration_with_invalid_custom_weights():
+    """
+    GIVEN a group chunk with invalid weight entries
+    WHEN the group chunk is validated using the Group schema class
+    THEN the Validation Error describes each invalid entry as the Weight schema does
+    """
+    test_group_schema = _custom_weight_group(3)
+    test_group_schema["weight"][1]["weight"] = 2
+    test_group_schema["weight"][2] = {"item_1": "Item 1"}
+    with pytest.raises(ValidationError) as err:
+        Group().load(test_group_schema)
+    errors = err.value.messages_dict["weight"]
+    assert list(errors) == [1, 2]
+    assert list(errors[1]) == ["weight"]
+    assert set(errors[2]) == {"item_1", "item_2", "weight"}
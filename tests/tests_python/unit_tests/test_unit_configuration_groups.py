@@ -0,0 +1,48 @@
+import numpy as np
+
+from comparison_interface.configuration.groups import GroupConfiguration
+from comparison_interface.configuration.website import Settings as WS
+
+
+def test_group_from_config_with_weights():
+    """
+    GIVEN the configuration of a group with custom weights
+    WHEN the compact group is built from it
+    THEN the weights are held in arrays and iterating through them gives back the configured pairs and weights
+    """
+    group = GroupConfiguration.from_config(
+        {
+            "name": "group_1",
+            "displayName": "Group 1",
+            "items": [
+                {"name": "a", "displayName": "A", "imageName": "a.png"},
+                {"name": "b", "displayName": "B", "imageName": "b.png", "imageDescription": "B"},
+                {"name": "c", "displayName": "C", "imageName": "c.png"},
+            ],
+            "weight": [
+                {"item_1": "a", "item_2": "b", "weight": 0.1},
+                {"item_1": "c", "item_2": "a", "weight": 0.3},
+                {"item_1": "b", "item_2": "c", "weight": 0.6},
+            ],
+        }
+    )
+    assert group.has_custom_weights()
+    assert group.weight_pairs.dtype == np.int32
+    assert group.weights.dtype == np.float32
+    assert group.weight_pairs.tolist() == [[0, 1], [2, 0], [1, 2]]
+    assert list(group.iter_weight_positions()) == [(0, 1, 0.1), (2, 0, 0.3), (1, 2, 0.6)]
+    assert list(group.iter_weight_positions(1, 2)) == [(2, 0, 0.3)]
+    assert group.items[1].image_description == "B"
+    assert group.items[0].item_id is None
+
+
+def test_compiled_configuration_holds_compact_groups(custom_weight_app):
+    """
+    GIVEN a flask app configured for testing and with custom weights
+    WHEN the groups are requested
+    THEN compact groups are returned and the groups are not kept in the configuration object
+    """
+    groups = WS.get_groups(custom_weight_app)
+    assert all(isinstance(g, GroupConfiguration) and g.has_custom_weights() for g in groups)
+    assert WS.GROUPS not in WS.get_configuration(custom_weight_app)[WS.CONFIGURATION_COMPARISON]
+    assert WS.GROUPS in WS.reload_configuration(custom_weight_app)[WS.CONFIGURATION_COMPARISON]
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from flask import Flask
+from PIL import Image
+
+from comparison_interface.configuration.images import ImageChecks
+
+
+def test_image_checks_are_cached(tmp_path):
+    """
+    GIVEN the images of the test configurations
+    WHEN the images are checked in parallel, checked again and then checked by a process loading the saved results
+    THEN each image is only opened once and the missing image is reported
+    """
+    names = ['item_1.png', 'item_2.png', 'item_3.png', 'item_1.png', 'missing.png']
+    cache_filepath = str(tmp_path / ImageChecks.CACHE_FILE)
+    open_patch = patch('comparison_interface.configuration.images.Image.open', wraps=Image.open)
+    with open_patch as mock_open:
+        checks = ImageChecks(cache_filepath)
+        errors = checks.check_all(names, workers=2)
+        assert list(errors) == ['missing.png']
+        assert mock_open.call_count == 3
+        assert checks.error('item_2.png') is None
+        assert mock_open.call_count == 3
+        checks.save()
+
+        assert ImageChecks(cache_filepath).check_all(names) == errors
+        assert mock_open.call_count == 3
+
+
+def test_image_checks_replaced_image():
+    """
+    GIVEN an image which has already been checked
+    WHEN the cached result no longer matches the modification time of the image
+    THEN the image is opened and checked again
+    """
+    checks = ImageChecks()
+    assert checks.error('item_1.png') is None
+    checks._results[ImageChecks.image_path('item_1.png')] = [0, 0, 'stale error']
+    assert checks.error('item_1.png') is None
+
+
+def test_image_checks_too_small():
+    """
+    GIVEN an image smaller than the minimum size
+    WHEN the image is checked
+    THEN the size error is returned
+    """
+    with patch.object(ImageChecks, 'MIN_WIDTH', 100000):
+        assert ImageChecks().error('item_1.png') == "All item images must be at least 300x100000px"
+
+
+def test_image_checks_kept_per_app(tmp_path):
+    """
+    GIVEN two applications with their own instance folders
+    WHEN the image checks of each application are used
+    THEN each application keeps its own results, saved to its own instance folder
+    """
+    app_1 = Flask(__name__, instance_path=str(tmp_path / 'instance_1'))
+    app_2 = Flask(__name__, instance_path=str(tmp_path / 'instance_2'))
+    checks = ImageChecks.get(app_1)
+    assert ImageChecks.get(app_1) is checks
+    assert ImageChecks.get(app_2) is not checks
+
+    checks.error('item_1.png')
+    checks.save()
+    assert (tmp_path / 'instance_1' / ImageChecks.CACHE_FILE).exists()
+    assert ImageChecks.get(app_2)._results == {}
+    assert not (tmp_path / 'instance_2' / ImageChecks.CACHE_FILE).exists()
@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+import pytest
+
+from comparison_interface.configuration.integrity import IntegrityGuard
+from comparison_interface.configuration.website import Settings as WS
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import WebsiteControl
+
+
+def test_integrity_check_is_cached(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN the integrity of the app is validated several times and the configuration version is then changed
+    THEN the configuration files are only hashed again when the version has changed or the guard is invalidated
+    """
+    fingerprint = WS.get_configuration_fingerprint
+    with patch.object(WS, 'get_configuration_fingerprint', side_effect=fingerprint) as mock_fingerprint:
+        guard = IntegrityGuard.get(equal_weight_app)
+        for _ in range(3):
+            guard.validate(equal_weight_app)
+        assert mock_fingerprint.call_count == 1
+        assert IntegrityGuard.get(equal_weight_app) is guard
+
+        equal_weight_app.config[IntegrityGuard.CHECK_INTERVAL] = 0
+        guard.validate(equal_weight_app)
+        assert mock_fingerprint.call_count == 1
+
+        with equal_weight_app.app_context():
+            conf = WebsiteControl().get_conf()
+            conf.configuration_version += 1
+            db.session.commit()
+        guard.validate(equal_weight_app)
+        assert mock_fingerprint.call_count == 2
+
+        IntegrityGuard.invalidate(equal_weight_app)
+        IntegrityGuard.get(equal_weight_app).validate(equal_weight_app)
+        assert mock_fingerprint.call_count == 3
+
+
+def test_integrity_check_fails_after_modification(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and with equal weights which has passed the integrity check
+    WHEN the content of the configuration file changes and the check is run again after the guard is invalidated
+    THEN the check fails on every request until the content matches the setup again
+    """
+    IntegrityGuard.get(equal_weight_app).validate(equal_weight_app)
+    with patch.object(WS, 'get_configuration_fingerprint', return_value='modified'):
+        IntegrityGuard.invalidate(equal_weight_app)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                IntegrityGuard.get(equal_weight_app).validate(equal_weight_app)
+    IntegrityGuard.get(equal_weight_app).validate(equal_weight_app)
+
+
+def test_configuration_fingerprint(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN the fingerprint of the configuration is requested
+    THEN it is the hash recorded by the setup
+    """
+    with equal_weight_app.app_context():
+        conf = WebsiteControl().get_conf()
+        assert WS.get_configuration_fingerprint(equal_weight_app) == conf.configuration_hash
+        assert conf.configuration_version >= 1
@@ -1,3 +1,8 @@
+import os
+from unittest.mock import patch
+
+from app import create_app
+from comparison_interface.configuration.csv_processor import CsvProcessor
 from comparison_interface.configuration.website import Settings
 
 
@@ -10,7 +15,7 @@ def test_set_configuration_location(equal_weight_app):
     settings = Settings()
     settings.set_configuration_location(equal_weight_app, 'test_location.json')
     location = equal_weight_app.config[settings.CONFIGURATION_LOCATION]
-    configuration = settings.configuration
+    configuration = getattr(equal_weight_app, settings.APP_ATTRIBUTE)
     assert location == 'test_location.json'
     assert configuration is None
 
@@ -49,6 +54,38 @@ def test_get_comparison_conf(equal_weight_app):
     assert result == 'equal'
 
 
+def test_get_comparison_conf_csv_is_parsed_once():
+    """
+    GIVEN a flask app configured with a csv file
+    WHEN the comparison configuration is requested several times and the csv file is then modified
+    THEN the csv file is only parsed again after it has been modified or the location has been set again
+    """
+    app = create_app(testing=True)
+    settings = Settings()
+    location = '../tests/test_configurations/csv_example_1'
+    settings.set_configuration_location(app, location)
+    filepath = os.path.join(settings.get_configuration_location(app), 'example_1.csv')
+    parse = CsvProcessor.iter_items
+    with patch.object(CsvProcessor, 'iter_items', autospec=True, side_effect=parse) as mock_parse:
+        groups = settings.get_comparison_conf(settings.GROUPS, app)
+        assert settings.get_comparison_conf(settings.GROUP_WEIGHT_CONFIGURATION, app) == 'equal'
+        assert settings.get_comparison_conf(settings.GROUPS, app) is groups
+        assert mock_parse.call_count == 1
+
+        stat = os.stat(filepath)
+        try:
+            os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert [g.items for g in settings.get_comparison_conf(settings.GROUPS, app)] == [g.items for g in groups]
+            assert mock_parse.call_count == 2
+        finally:
+            os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        settings.set_configuration_location(app, 'test_location.json')
+        settings.set_configuration_location(app, location)
+        settings.get_comparison_conf(settings.GROUPS, app)
+        assert mock_parse.call_count == 3
+
+
 def test_get_user_conf(equal_weight_app):
     """
     GIVEN a flask app configured for testing and with equal weights
@@ -81,3 +118,40 @@ def test_should_render(equal_weight_app):
     settings = Settings()
     result = settings.should_render('renderUserItemPreferencePage', equal_weight_app)
     assert result is True
+
+
+def test_compiled_configuration_is_reused(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN the compiled configuration is requested several times, then after the same location is set again
+    THEN the configuration is only compiled again once the location is set, with the behaviour flags as booleans and
+        the text tables merged
+    """
+    settings = Settings()
+    compiled = settings.get_compiled_configuration(equal_weight_app)
+    assert settings.get_compiled_configuration(equal_weight_app) is compiled
+    settings.set_configuration_location(equal_weight_app, compiled.location)
+    assert settings.get_compiled_configuration(equal_weight_app) is not compiled
+    compiled = settings.get_compiled_configuration(equal_weight_app)
+    assert compiled.flags['renderUserItemPreferencePage'] is True
+    assert (
+        compiled.text['pageTitleEthicsAgreement']
+        == equal_weight_app.language_config['websiteTextConfiguration']['pageTitleEthicsAgreement']
+    )
+    assert 'pageTitleEthicsAgreement' not in compiled.project_text
+    assert settings.get_compiled_configuration(equal_weight_app, True) is not compiled
+
+
+def test_memoise(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN a value derived from the configuration is memoised and the configuration is then reloaded
+    THEN the value is only built once per configuration load
+    """
+    settings = Settings()
+    calls = []
+    for _ in range(3):
+        settings.memoise(equal_weight_app, 'test', lambda: calls.append(1) or len(calls))
+    assert len(calls) == 1
+    settings.get_compiled_configuration(equal_weight_app, True)
+    assert settings.memoise(equal_weight_app, 'test', lambda: calls.append(1) or len(calls)) == 2
@@ -0,0 +1,76 @@
+from sqlalchemy import text
+
+from app import create_app
+from comparison_interface.db.connection import db
+from comparison_interface.db.sqlite import DEFAULT_PRAGMAS, run_maintenance
+
+
+def sqlite_app(tmp_path, pragmas=DEFAULT_PRAGMAS):
+    """Create an app whose databases are in a temporary folder.
+
+    The other tests keep the rollback journal as their databases are deleted while connections to them are open.
+    """
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'admin.db'}",
+        "SQLALCHEMY_BINDS": {"study_db": f"sqlite:///{tmp_path / 'study.db'}"},
+        "SQLITE_PRAGMAS": pragmas,
+    }
+    return create_app(testing=True, test_config=test_config)
+
+
+def get_pragma(name):
+    """Get the value of a pragma on a connection to the study database."""
+    with db.engines['study_db'].connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_default_pragmas(tmp_path):
+    """
+    GIVEN a flask app with the default SQLITE_PRAGMAS setting
+    WHEN a connection to the study database is opened
+    THEN the default pragmas have been run on it
+    """
+    app = sqlite_app(tmp_path)
+    with app.app_context():
+        assert get_pragma("journal_mode") == "wal"
+        assert get_pragma("busy_timeout") == DEFAULT_PRAGMAS["busy_timeout"]
+        assert get_pragma("synchronous") == 1
+        assert get_pragma("cache_size") == DEFAULT_PRAGMAS["cache_size"]
+        assert get_pragma("temp_store") == 2
+        db.engines['study_db'].dispose()
+
+
+def test_empty_pragmas(tmp_path):
+    """
+    GIVEN a flask app with an empty SQLITE_PRAGMAS setting
+    WHEN a connection to the study database is opened
+    THEN the SQLite defaults are kept
+    """
+    app = sqlite_app(tmp_path, pragmas={})
+    with app.app_context():
+        assert get_pragma("journal_mode") == "delete"
+        assert get_pragma("synchronous") == 2
+
+
+def test_run_maintenance(tmp_path):
+    """
+    GIVEN a flask app with rows written to the write-ahead log of its study database
+    WHEN the maintenance is run with a vacuum
+    THEN the log is copied back into the database and emptied and the planner statistics are created
+    """
+    app = sqlite_app(tmp_path)
+    with app.app_context():
+        with db.engines['study_db'].begin() as connection:
+            connection.execute(text("CREATE TABLE example (value INTEGER)"))
+            connection.execute(text("CREATE INDEX example_idx ON example (value)"))
+            connection.execute(text("INSERT INTO example VALUES (1), (2)"))
+        assert (tmp_path / 'study.db-wal').stat().st_size > 0
+
+        checkpointed = run_maintenance(app, vacuum=True)
+        assert set(checkpointed) == {"main", "study_db"}
+        assert checkpointed["study_db"] >= 0
+        assert (tmp_path / 'study.db-wal').stat().st_size == 0
+        with db.engines['study_db'].connect() as connection:
+            assert connection.execute(text("SELECT COUNT(*) FROM sqlite_stat1")).scalar() > 0
+        for engine in db.engines.values():
+            engine.dispose()
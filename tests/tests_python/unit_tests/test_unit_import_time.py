@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+# Modules only needed by the commands and the admin pages, which the web server processes should not load
+COMMAND_ONLY_MODULES = [
+    'PIL',
+    'marshmallow',
+    'multiprocessing',
+    'flask_security',
+    'comparison_interface.configuration.images',
+    'comparison_interface.configuration.schema',
+    'comparison_interface.configuration.validation',
+    'comparison_interface.db.setup',
+    'comparison_interface.scoring.batch',
+    'comparison_interface.warmup',
+]
+# Generous limit on the time taken to create the application, several times what it takes on a development machine.
+# It can be raised on slower machines with the IMPORT_TIME_BUDGET_SECONDS environment variable.
+IMPORT_TIME_BUDGET_SECONDS = float(os.environ.get('IMPORT_TIME_BUDGET_SECONDS', 5))
+
+
+def get_import_times():
+    """Create the application in a new interpreter and get the cumulative import time of each module in seconds."""
+    root = os.path.join(os.path.dirname(__file__), '..', '..', '..')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app(testing=True)'],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_web_server_imports():
+    """
+    GIVEN the application package
+    WHEN a web server process imports it and creates the application
+    THEN the modules only used by the commands and the admin pages are not imported and the import time is in budget
+    """
+    times = get_import_times()
+    assert 'comparison_interface' in times
+    assert [name for name in COMMAND_ONLY_MODULES if name in times] == []
+    assert times['comparison_interface'] < IMPORT_TIME_BUDGET_SECONDS
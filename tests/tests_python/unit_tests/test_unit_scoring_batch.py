@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from numpy.random import default_rng
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import Comparison
+from comparison_interface.scoring import davidson
+from comparison_interface.scoring.batch import BatchFit
+from comparison_interface.scoring.online import GroupScores
+from comparison_interface.selection.judgements import ITEM_1_SELECTED, ITEM_2_SELECTED, TIED
+
+
+def test_summarise_counts_points_and_pairs():
+    """
+    GIVEN comparisons between the items of a group and an item from another group
+    WHEN they are summarised for the group
+    THEN the points, pair counts and ties only include the comparisons within the group
+    """
+    item_ids = np.array([2, 5, 9])
+    item_1_ids = np.array([2, 5, 9, 2, 7])
+    item_2_ids = np.array([5, 2, 2, 9, 2])
+    outcomes = np.array([ITEM_1_SELECTED, ITEM_2_SELECTED, TIED, ITEM_2_SELECTED, ITEM_1_SELECTED])
+    points, pair_a, pair_b, pair_counts, ties = BatchFit.summarise(item_ids, item_1_ids, item_2_ids, outcomes)
+    assert list(points) == [5, 0, 3]
+    assert list(zip(pair_a, pair_b, pair_counts)) == [(0, 1, 2), (0, 2, 2)]
+    assert ties == 1
+
+
+def test_online_scores_converge_to_the_batch_fit():
+    """
+    GIVEN random judgements including ties recorded by the online scores
+    WHEN the online scores take many full MM steps
+    THEN the strengths and tie parameter match the batch fit of the same judgements
+    """
+    rng = default_rng(3)
+    scores = GroupScores([1, 2, 3, 4, 5])
+    item_1_ids, item_2_ids = [], []
+    outcomes = rng.choice([ITEM_1_SELECTED, ITEM_2_SELECTED, TIED], size=400, p=[0.5, 0.3, 0.2])
+    for outcome in outcomes:
+        i, j = rng.choice(5, 2, replace=False) + 1
+        scores.update(int(i), int(j), outcome)
+        item_1_ids.append(i)
+        item_2_ids.append(j)
+    for _ in range(2000):
+        scores.sweep()
+
+    points, pair_a, pair_b, pair_counts, ties = BatchFit.summarise(
+        np.arange(1, 6), np.array(item_1_ids), np.array(item_2_ids), outcomes
+    )
+    strengths, tie_parameter, _ = davidson.fit(points, pair_a, pair_b, pair_counts, ties, GroupScores.PRIOR_WEIGHT)
+    assert np.allclose(scores.strengths, strengths, rtol=1e-5)
+    assert scores.tie_parameter == pytest.approx(tie_parameter, rel=1e-5)
+
+
+def test_standard_errors_shrink_with_more_judgements():
+    """
+    GIVEN the same balanced judgements (each item beating one other) between three items repeated once and ten times
+    WHEN the Bradley-Terry model is fitted to both
+    THEN all of the scores are 0 and the standard errors are smaller with more judgements
+    """
+    pair_a = np.array([0, 0, 1])
+    pair_b = np.array([1, 2, 2])
+    errors = []
+    for repeats in [1, 10]:
+        points = np.array([2.0, 2.0, 2.0]) * repeats
+        pair_counts = np.ones(3) * repeats
+        strengths, tie_parameter, _ = davidson.fit(points, pair_a, pair_b, pair_counts, 0, 1.0, fit_ties=False)
+        assert tie_parameter == 0
+        assert np.allclose(np.log(strengths), 0)
+        errors.append(davidson.standard_errors(strengths, pair_a, pair_b, pair_counts, tie_parameter, 1.0))
+    assert np.all(errors[1] < errors[0])
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_fit_reads_the_comparison_table(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing with selected, tied and skipped comparisons recorded
+    WHEN the batch fit is run
+    THEN the outcomes are loaded without the skipped comparison and the winning item has the highest score
+    """
+    for item_1_id, item_2_id, state, selected_item_id in [
+        (1, 2, 'selected', 1),
+        (3, 1, 'selected', 1),
+        (2, 3, 'tied', None),
+        (2, 3, 'skipped', None),
+    ]:
+        db.session.add(
+            Comparison(
+                participant_id=1,
+                item_1_id=item_1_id,
+                item_2_id=item_2_id,
+                selected_item_id=selected_item_id,
+                state=state,
+                created=datetime.now(timezone.utc),
+                updated=datetime.now(timezone.utc),
+            )
+        )
+    db.session.commit()
+
+    batch_fit = BatchFit(equal_weight_app)
+    item_1_ids, item_2_ids, outcomes, participant_ids = batch_fit.load_outcomes()
+    assert list(zip(item_1_ids, item_2_ids, outcomes, participant_ids)) == [
+        (1, 2, ITEM_1_SELECTED, 1),
+        (3, 1, ITEM_2_SELECTED, 1),
+        (2, 3, TIED, 1),
+    ]
+    data_list = [entry for entry in batch_fit.fit() if entry['group_id'] == 1]
+    assert data_list[0]['item_id'] == 1
+    assert data_list[0]['judgements'] == 2
+    assert all(entry['standard_error'] > 0 for entry in data_list)
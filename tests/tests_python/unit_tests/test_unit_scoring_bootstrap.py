@@ -0,0 +1,62 @@
+import numpy as np
+from numpy.random import default_rng
+
+from comparison_interface.scoring import davidson
+from comparison_interface.scoring.batch import BatchFit
+from comparison_interface.scoring.bootstrap import RESAMPLE_PARTICIPANTS, Bootstrap
+from comparison_interface.selection.judgements import ITEM_1_SELECTED, ITEM_2_SELECTED, TIED
+
+
+def simulated_comparisons(seed, count=300):
+    """Simulate comparisons between four items of increasing strength made by ten participants."""
+    rng = default_rng(seed)
+    strengths = np.exp(np.array([-1.0, 0.0, 0.5, 1.5]))
+    i, j = np.array([rng.choice(4, 2, replace=False) for _ in range(count)]).T
+    p, q = strengths[i], strengths[j]
+    tie = 0.3 * np.sqrt(p * q)
+    draw = rng.random(count) * (p + q + tie)
+    outcomes = np.where(draw < p, ITEM_1_SELECTED, np.where(draw < p + q, ITEM_2_SELECTED, TIED))
+    participants = rng.integers(10, size=count)
+    return i, j, outcomes, participants
+
+
+def bootstrap_intervals(bootstrap, i, j, outcomes, participants):
+    """Fit the comparisons and get the bootstrap intervals of the scores."""
+    item_ids = np.arange(4)
+    points, pair_a, pair_b, pair_counts, ties = BatchFit.summarise(item_ids, i, j, outcomes)
+    strengths, tie_parameter, _ = davidson.fit(points, pair_a, pair_b, pair_counts, ties, 1.0)
+    pair_index = np.searchsorted(pair_a * 4 + pair_b, np.minimum(i, j) * 4 + np.maximum(i, j))
+    with bootstrap:
+        lower, upper = bootstrap.intervals(
+            i, j, outcomes, participants, pair_a, pair_b, pair_index, strengths, tie_parameter, 1.0, True
+        )
+    return np.log(strengths), lower, upper
+
+
+def test_intervals_contain_the_scores():
+    """
+    GIVEN simulated comparisons between four items
+    WHEN bootstrap intervals are computed by two worker processes resampling the comparisons
+    THEN each interval contains the fitted score and the intervals of the weakest and strongest items don't overlap
+    """
+    scores, lower, upper = bootstrap_intervals(Bootstrap(200, workers=2, seed=1), *simulated_comparisons(5))
+    assert np.all(lower < scores)
+    assert np.all(scores < upper)
+    assert upper[0] < lower[3]
+
+
+def test_intervals_are_reproducible_with_a_seed():
+    """
+    GIVEN simulated comparisons between four items
+    WHEN bootstrap intervals resampling the participants are computed twice with the same seed
+    THEN the intervals are the same
+    """
+    comparisons = simulated_comparisons(6)
+    _, lower_1, upper_1 = bootstrap_intervals(
+        Bootstrap(40, resample=RESAMPLE_PARTICIPANTS, workers=2, seed=3), *comparisons
+    )
+    _, lower_2, upper_2 = bootstrap_intervals(
+        Bootstrap(40, resample=RESAMPLE_PARTICIPANTS, workers=2, seed=3), *comparisons
+    )
+    assert np.array_equal(lower_1, lower_2)
+    assert np.array_equal(upper_1, upper_2)
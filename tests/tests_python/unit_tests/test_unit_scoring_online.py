@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+from numpy.random import default_rng
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import Comparison
+from comparison_interface.scoring import davidson
+from comparison_interface.scoring.online import GroupScores, ScoringEngine
+from comparison_interface.selection.judgements import ITEM_1_SELECTED, ITEM_2_SELECTED, NO_OUTCOME, TIED
+
+
+def test_scores_recover_simulated_strengths():
+    """
+    GIVEN judgements simulated from a Davidson model with known strengths and tie parameter
+    WHEN the judgements are recorded one at a time
+    THEN the scores order the items as the true strengths and the tie parameter is close to the true one
+    """
+    rng = default_rng(7)
+    true_strengths = np.exp(np.linspace(-1.5, 1.5, 6))
+    true_tie_parameter = 0.4
+    scores = GroupScores(list(range(1, 7)))
+    for _ in range(3000):
+        i, j = rng.choice(6, 2, replace=False)
+        p, q = true_strengths[i], true_strengths[j]
+        tie = true_tie_parameter * np.sqrt(p * q)
+        outcome = rng.choice([ITEM_1_SELECTED, ITEM_2_SELECTED, TIED], p=np.array([p, q, tie]) / (p + q + tie))
+        scores.update(int(i) + 1, int(j) + 1, outcome)
+
+    item_ids, values, judgements = scores.scores()
+    assert list(item_ids[np.argsort(values)]) == [1, 2, 3, 4, 5, 6]
+    assert judgements.sum() == 6000
+    assert abs(scores.tie_parameter - true_tie_parameter) < 0.1
+
+
+def test_removing_a_judgement_restores_the_statistics():
+    """
+    GIVEN scores with a few judgements recorded
+    WHEN a judgement is recorded and then removed again
+    THEN the points, judgement counts and tie count are the same as before
+    """
+    scores = GroupScores([1, 2, 3])
+    scores.update(1, 2, ITEM_1_SELECTED)
+    scores.update(2, 3, TIED)
+    points, judgements, ties = scores.points.copy(), scores.judgements.copy(), scores.ties
+    scores.update(1, 3, TIED)
+    scores.update(1, 3, TIED, weight=-1.0)
+    assert list(scores.points) == list(points)
+    assert list(scores.judgements) == list(judgements)
+    assert scores.ties == ties
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_engine_applies_rejudged_comparisons(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing with some comparisons already recorded
+    WHEN the scoring engine is requested, one comparison is rejudged and the engine is requested again
+    THEN the old outcome of the rejudged comparison is replaced by the new one and skipped comparisons are ignored
+    """
+    for state, selected_item_id in [('selected', 1), ('selected', 1), ('skipped', None)]:
+        db.session.add(
+            Comparison(
+                participant_id=1,
+                item_1_id=1,
+                item_2_id=2,
+                selected_item_id=selected_item_id,
+                state=state,
+                created=datetime.now(timezone.utc),
+                updated=datetime.now(timezone.utc),
+            )
+        )
+    db.session.commit()
+
+    engine = ScoringEngine.get(equal_weight_app)
+    group_scores = engine.groups[1]
+    assert group_scores.points[group_scores.index[1]] == 4
+    assert group_scores.judgements[group_scores.index[2]] == 2
+    assert engine.scores(1)[0]['item_id'] == 1
+
+    # The update time is not used, a rejudge is told by its revision whatever the clock of the process that made it
+    comparison = db.session.get(Comparison, 2)
+    comparison.selected_item_id = 2
+    comparison.updated = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    comparison.revision = Comparison.next_revision()
+    db.session.commit()
+
+    engine = ScoringEngine.get(equal_weight_app)
+    assert engine.groups[1] is group_scores
+    assert group_scores.points[group_scores.index[1]] == 2
+    assert group_scores.points[group_scores.index[2]] == 2
+    assert group_scores.judgements[group_scores.index[2]] == 2
+    assert list(engine.judgements.outcomes[1:4]) == [ITEM_1_SELECTED, ITEM_2_SELECTED, NO_OUTCOME]
+    assert engine.judgements.last_revision == 1
+
+
+def test_seeding_matches_recording_one_at_a_time():
+    """
+    GIVEN judgements simulated from a Davidson model
+    WHEN they are recorded at once in new scores
+    THEN the statistics are the same as when they are recorded one at a time and the strengths are the full fit
+    """
+    rng = default_rng(11)
+    item_ids = np.array([3, 1, 2, 5, 4])
+    item_1_ids, item_2_ids = rng.choice(item_ids, (2, 500)).astype(np.int64)
+    keep = item_1_ids != item_2_ids
+    item_1_ids, item_2_ids = item_1_ids[keep], item_2_ids[keep]
+    outcomes = rng.choice([ITEM_1_SELECTED, ITEM_2_SELECTED, TIED], len(item_1_ids))
+
+    recorded = GroupScores(item_ids)
+    for item_1_id, item_2_id, outcome in zip(item_1_ids.tolist(), item_2_ids.tolist(), outcomes.tolist()):
+        recorded.update(item_1_id, item_2_id, outcome)
+    seeded = GroupScores(item_ids)
+    seeded.seed(item_1_ids, item_2_ids, outcomes)
+
+    assert list(seeded.points) == list(recorded.points)
+    assert list(seeded.judgements) == list(recorded.judgements)
+    assert seeded.ties == recorded.ties
+    assert {key: seeded._edge_counts[e] for key, e in seeded._edges.items()} == {
+        key: recorded._edge_counts[e] for key, e in recorded._edges.items()
+    }
+    m = len(seeded._edges)
+    strengths, tie_parameter, _ = davidson.fit(
+        seeded.points,
+        seeded._edge_items[:m, 0],
+        seeded._edge_items[:m, 1],
+        seeded._edge_counts[:m],
+        seeded.ties,
+        GroupScores.PRIOR_WEIGHT,
+    )
+    assert np.allclose(seeded.strengths, strengths)
+    assert np.isclose(seeded.tie_parameter, tie_parameter)
@@ -0,0 +1,87 @@
+from numpy.random import default_rng
+
+from comparison_interface.selection.adaptive import GroupStrengths
+
+
+def test_update_moves_scores_towards_the_winner():
+    """
+    GIVEN a running strength estimate for three items
+    WHEN the first item is selected over the second
+    THEN the first item's score increases, the second decreases and the third is unchanged
+    """
+    strengths = GroupStrengths([1, 2, 3])
+    strengths.update(1, 2, 1.0)
+    assert strengths.scores[0] > 0
+    assert strengths.scores[1] < 0
+    assert strengths.scores[2] == 0
+    assert strengths.information[0] > GroupStrengths.PRIOR_INFORMATION
+
+
+def test_update_with_tie_keeps_equal_scores():
+    """
+    GIVEN a running strength estimate where both items have the same score
+    WHEN a tie between them is recorded
+    THEN the scores do not move but the information about them increases
+    """
+    strengths = GroupStrengths([1, 2])
+    strengths.update(1, 2, 0.5)
+    assert strengths.scores[0] == 0
+    assert strengths.scores[1] == 0
+    assert strengths.information[1] > GroupStrengths.PRIOR_INFORMATION
+
+
+def test_rejudged_outcome_moves_scores_towards_the_new_winner():
+    """
+    GIVEN a running strength estimate where the first item was selected over the second
+    WHEN the judgement is removed and the second item is recorded as selected instead
+    THEN the second item's score is above the first's and the information is not counted twice
+    """
+    strengths = GroupStrengths([1, 2])
+    strengths.update(1, 2, 1.0)
+    information = strengths.information.copy()
+    strengths.update(1, 2, 1.0, weight=-1.0)
+    strengths.update(1, 2, 0.0)
+    assert strengths.scores[1] > strengths.scores[0]
+    assert all(abs(strengths.information - information) < 0.1)
+
+
+def test_select_pair_returns_two_different_items_from_the_group():
+    """
+    GIVEN a running strength estimate for a group
+    WHEN a pair is selected many times
+    THEN each pair contains two different items from the group
+    """
+    strengths = GroupStrengths([4, 5, 6, 7])
+    rng = default_rng(1)
+    for _ in range(50):
+        item_1_id, item_2_id = strengths.select_pair(rng)
+        assert item_1_id != item_2_id
+        assert item_1_id in [4, 5, 6, 7]
+        assert item_2_id in [4, 5, 6, 7]
+
+
+def test_select_pair_avoids_pairs_with_a_known_outcome():
+    """
+    GIVEN a running strength estimate where one item has lost every comparison many times
+    WHEN pairs are selected
+    THEN that item is rarely chosen because its comparisons tell us very little
+    """
+    strengths = GroupStrengths([1, 2, 3, 4])
+    for _ in range(50):
+        for winner in [1, 2, 3]:
+            strengths.update(winner, 4, 1.0)
+        strengths.update(1, 2, 0.5)
+        strengths.update(2, 3, 0.5)
+    rng = default_rng(2)
+    selected = [strengths.select_pair(rng) for _ in range(200)]
+    assert sum(1 for pair in selected if 4 in pair) < 20
+
+
+def test_select_pair_with_a_single_item():
+    """
+    GIVEN a running strength estimate for a group with only one item
+    WHEN a pair is selected
+    THEN two None values are returned
+    """
+    strengths = GroupStrengths([1])
+    assert strengths.select_pair(default_rng()) == (None, None)
@@ -0,0 +1,48 @@
+import numpy as np
+from numpy.random import default_rng
+
+from comparison_interface.selection.alias import AliasTable
+
+
+def test_alias_table_matches_the_weights():
+    """
+    GIVEN an alias table built from a set of weighted pairs
+    WHEN a large number of pairs are drawn
+    THEN the observed frequencies match the weights
+    """
+    weights = [0.1, 0.2, 0.2, 0.3, 0.1, 0.1]
+    table = AliasTable([1, 1, 1, 2, 2, 3], [2, 3, 4, 3, 4, 4], weights)
+    # the probability of each pair is its own share of the column plus any share aliased to it
+    implied = table.probability.copy()
+    np.add.at(implied, table.alias, 1.0 - table.probability)
+    assert np.allclose(implied / len(table), weights)
+
+    rng = default_rng(3)
+    counts = {}
+    for _ in range(20000):
+        pair = table.sample(rng)
+        counts[pair] = counts.get(pair, 0) + 1
+    assert abs(counts[(2, 3)] / 20000 - 0.3) < 0.02
+    assert abs(counts[(1, 2)] / 20000 - 0.1) < 0.02
+
+
+def test_alias_table_normalises_the_weights():
+    """
+    GIVEN weights which do not sum to one
+    WHEN the alias table is built
+    THEN the implied probabilities are normalised
+    """
+    table = AliasTable([1, 1], [2, 3], [2.0, 6.0])
+    implied = table.probability.copy()
+    np.add.at(implied, table.alias, 1.0 - table.probability)
+    assert np.allclose(implied / len(table), [0.25, 0.75])
+
+
+def test_empty_alias_table():
+    """
+    GIVEN an alias table without any pairs
+    WHEN a pair is drawn
+    THEN two None values are returned
+    """
+    table = AliasTable([], [], [])
+    assert table.sample(default_rng()) == (None, None)
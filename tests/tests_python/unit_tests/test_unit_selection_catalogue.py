@@ -0,0 +1,36 @@
+from comparison_interface.configuration.integrity import IntegrityGuard
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import WebsiteControl
+from comparison_interface.selection.catalogue import Catalogue
+
+
+def test_catalogue_group_item_ids(equal_weight_client, equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN the item ids for one or several groups are requested from the catalogue
+    THEN the unique item ids of those groups are returned
+    """
+    catalogue = Catalogue.get(equal_weight_app)
+    assert list(catalogue.group_item_ids([1])) == [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert list(catalogue.group_item_ids(['1', '2'])) == list(range(1, 13))
+    assert len(catalogue.group_item_ids([3])) == 0
+    assert catalogue.get_item(10).name == 'wales'
+
+
+def test_catalogue_is_rebuilt_after_setup(equal_weight_client, equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights
+    WHEN the catalogue is requested twice and then again after the configuration version changes
+    THEN the same catalogue is reused until the integrity guard checks the configuration version again
+    """
+    catalogue = Catalogue.get(equal_weight_app)
+    assert Catalogue.get(equal_weight_app) is catalogue
+
+    conf = WebsiteControl().get_conf()
+    conf.configuration_version += 1
+    db.session.commit()
+    assert Catalogue.get(equal_weight_app) is catalogue
+
+    equal_weight_app.config[IntegrityGuard.CHECK_INTERVAL] = 0
+    assert Catalogue.get(equal_weight_app) is not catalogue
+    assert Catalogue.get(equal_weight_app).configuration_version == conf.configuration_version
@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+
+import pytest
+from numpy.random import default_rng
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import Comparison
+from comparison_interface.selection.coverage import CoverageScheduler, GroupCoverage
+
+
+def test_update_counts_items_and_pairs():
+    """
+    GIVEN judgement counts for three items
+    WHEN a judgement between the first two items is recorded
+    THEN the counts of both items and of the pair in both directions are incremented
+    """
+    coverage = GroupCoverage([1, 2, 3])
+    coverage.update(1, 2)
+    assert list(coverage.item_counts) == [1, 1, 0]
+    assert coverage.pair_counts[0, 1] == 1
+    assert coverage.pair_counts[1, 0] == 1
+    assert coverage.pair_counts[0, 2] == 0
+
+
+def test_select_pair_favours_unjudged_items():
+    """
+    GIVEN judgement counts where two of four items have been judged many times
+    WHEN pairs are selected
+    THEN the unjudged items appear in most of the pairs
+    """
+    coverage = GroupCoverage([1, 2, 3, 4])
+    for _ in range(20):
+        coverage.update(1, 2)
+    rng = default_rng(4)
+    selected = [coverage.select_pair(rng) for _ in range(200)]
+    assert sum(1 for pair in selected if 3 in pair or 4 in pair) > 190
+    assert all(pair[0] != pair[1] for pair in selected)
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_scheduler_is_seeded_from_the_comparison_table(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing with some comparisons already recorded
+    WHEN the coverage scheduler is requested and a further comparison is recorded
+    THEN the counts include the existing judgements, ignore skipped ones and catch up with the new judgement
+    """
+    for state, selected_item_id in [('selected', 1), ('tied', None), ('skipped', None)]:
+        db.session.add(
+            Comparison(
+                participant_id=1,
+                item_1_id=1,
+                item_2_id=2,
+                selected_item_id=selected_item_id,
+                state=state,
+                created=datetime.now(timezone.utc),
+                updated=datetime.now(timezone.utc),
+            )
+        )
+    db.session.commit()
+
+    coverage = CoverageScheduler.get(equal_weight_app).groups[1]
+    assert coverage.pair_counts[coverage.index[1], coverage.index[2]] == 2
+
+    db.session.add(Comparison(participant_id=1, item_1_id=2, item_2_id=3, selected_item_id=3, state='selected'))
+    db.session.commit()
+    assert CoverageScheduler.get(equal_weight_app).groups[1] is coverage
+    assert coverage.item_counts[coverage.index[2]] == 3
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_scheduler_applies_rejudged_comparisons(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing with two comparisons recorded
+    WHEN the coverage scheduler is requested, one comparison is rejudged as skipped and the scheduler requested again
+    THEN the rejudged comparison is no longer counted
+    """
+    for _ in range(2):
+        db.session.add(Comparison(participant_id=1, item_1_id=1, item_2_id=2, selected_item_id=1, state='selected'))
+    db.session.commit()
+    coverage = CoverageScheduler.get(equal_weight_app).groups[1]
+    assert coverage.pair_counts[coverage.index[1], coverage.index[2]] == 2
+
+    comparison = db.session.get(Comparison, 2)
+    comparison.state = Comparison.SKIPPED
+    comparison.selected_item_id = None
+    comparison.revision = Comparison.next_revision()
+    db.session.commit()
+    assert CoverageScheduler.get(equal_weight_app).groups[1] is coverage
+    assert coverage.pair_counts[coverage.index[1], coverage.index[2]] == 1
+    assert coverage.item_counts[coverage.index[1]] == 1
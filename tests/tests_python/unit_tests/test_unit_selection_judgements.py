@@ -0,0 +1,47 @@
+import pytest
+
+from comparison_interface.db.connection import db
+from comparison_interface.db.models import Comparison
+from comparison_interface.selection.judgements import (
+    ITEM_1_SELECTED,
+    ITEM_2_SELECTED,
+    NO_OUTCOME,
+    TIED,
+    JudgementLog,
+)
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_read_returns_new_and_rejudged_comparisons(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing with some comparisons recorded
+    WHEN the log is read, a comparison is rejudged, another one is recorded and the log is read again
+    THEN the first read returns all of the comparisons and the second one only the changed comparisons, with the
+        outcome applied before for the rejudged one
+    """
+    for state, selected_item_id in [('selected', 1), ('tied', None), ('skipped', None)]:
+        db.session.add(
+            Comparison(participant_id=1, item_1_id=1, item_2_id=2, selected_item_id=selected_item_id, state=state)
+        )
+    db.session.commit()
+
+    log = JudgementLog()
+    assert log.is_empty()
+    item_1_ids, item_2_ids, outcomes, previous = log.read()
+    assert list(outcomes) == [ITEM_1_SELECTED, TIED, NO_OUTCOME]
+    assert list(previous) == [NO_OUTCOME] * 3
+    assert not log.is_empty()
+
+    comparison = db.session.get(Comparison, 1)
+    comparison.selected_item_id = 2
+    comparison.revision = Comparison.next_revision()
+    db.session.add(Comparison(participant_id=1, item_1_id=2, item_2_id=3, selected_item_id=2, state='selected'))
+    db.session.commit()
+    item_1_ids, item_2_ids, outcomes, previous = log.read()
+    assert list(item_1_ids) == [1, 2]
+    assert list(item_2_ids) == [2, 3]
+    assert list(outcomes) == [ITEM_2_SELECTED, ITEM_1_SELECTED]
+    assert list(previous) == [ITEM_1_SELECTED, NO_OUTCOME]
+    assert (log.last_comparison_id, log.last_revision) == (4, 1)
+
+    assert [len(values) for values in log.read()] == [0, 0, 0, 0]
@@ -0,0 +1,28 @@
+import pytest
+
+from comparison_interface.selection.permutation import PairPermutation
+
+
+@pytest.mark.parametrize('item_count', [2, 3, 9, 50])
+def test_permutation_visits_every_pair_once(item_count):
+    """
+    GIVEN a pair permutation for a number of items
+    WHEN every position of the permutation is read
+    THEN each unordered pair of item positions is returned exactly once
+    """
+    permutation = PairPermutation(item_count, seed=7)
+    pairs = [permutation.pair(k) for k in range(len(permutation))]
+    assert len(pairs) == item_count * (item_count - 1) // 2
+    assert len(set(pairs)) == len(pairs)
+    assert all(0 <= i < j < item_count for i, j in pairs)
+
+
+def test_permutation_depends_on_the_seed():
+    """
+    GIVEN two pair permutations of the same items
+    WHEN they are built with the same or a different seed
+    THEN the same seed gives the same order and a different seed a different one
+    """
+    first = [PairPermutation(20, seed=1).pair(k) for k in range(190)]
+    assert first == [PairPermutation(20, seed=1).pair(k) for k in range(190)]
+    assert first != [PairPermutation(20, seed=2).pair(k) for k in range(190)]
@@ -0,0 +1,33 @@
+from sqlalchemy import event
+
+from comparison_interface.db.connection import db
+from comparison_interface.selection.queue import PairQueue
+
+
+def test_pop_takes_the_pairs_in_order(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing with pairs queued for two participants
+    WHEN the pairs of the first participant are taken one at a time
+    THEN each one is read and removed by a single statement, in order, and the other participant's pairs are kept
+    """
+    with equal_weight_app.app_context():
+        PairQueue(1).push([(1, 2), (3, 4)])
+        PairQueue(2).push([(5, 6)])
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engines['study_db']
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            assert PairQueue(1).pop() == (1, 2)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        assert len(statements) == 1
+        assert 'RETURNING' in statements[0]
+
+        assert PairQueue(1).pop() == (3, 4)
+        assert PairQueue(1).pop() == (None, None)
+        assert PairQueue(2).pop() == (5, 6)
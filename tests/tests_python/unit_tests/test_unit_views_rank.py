@@ -6,7 +6,7 @@ from sqlalchemy import MetaData, create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
 from comparison_interface.db.connection import db
-from comparison_interface.db.models import Comparison, Group, Item, ItemGroup, ParticipantGroup
+from comparison_interface.db.models import Comparison, Group, Item, ItemGroup, ParticipantGroup, QueuedPair
 from comparison_interface.main.views import rank
 from comparison_interface.main.views.register import Request
 
@@ -73,6 +73,26 @@ def test_item_retrieval_function_choice_with_custom_weights(mocker, custom_weigh
     comparison_function.assert_called_once_with()
 
 
+def test_item_retrieval_function_choice_with_adaptive_weights(mocker, adaptive_weight_app):
+    """
+    GIVEN a flask app configured for testing and adaptive weights
+    WHEN a comparison pair is requested
+    THEN the correct function runs
+    """
+    request = Request(adaptive_weight_app, {})
+    request._session['participant_id'] = 1
+    request._session['group_ids'] = [1]
+    request._session['weight_conf'] = 'adaptive'
+    request._session['previous_comparison_id'] = None
+    request._session['comparison_ids'] = []
+    ranker = rank.Rank(request, request._session)
+    should_render = mocker.patch.object(rank.WS, 'should_render')
+    should_render.side_effect = [False]
+    comparison_function = mocker.patch.object(rank.Rank, '_get_scheduled_items')
+    ranker._get_items_to_compare()
+    comparison_function.assert_called_once_with()
+
+
 def test_item_retrieval_function_choice_with_preference(mocker, equal_weight_app):
     """
     GIVEN a flask app configured for testing and equal weights
@@ -171,7 +191,7 @@ def test_get_comparison_items_normal_order(equal_weight_app):
     request._session['weight_conf'] = 'equal'
     request._session['previous_comparison_id'] = 1
     request._session['comparison_ids'] = [1, 2]
-    ranker = rank.Rank(request, request._session)
+    ranker = rank.Rank(equal_weight_app, request._session)
     items = ranker._get_comparison_items(1)
     assert items[0].item_id == 1
     assert items[1].item_id == 2
@@ -215,7 +235,7 @@ def test_get_comparison_items_different_order(equal_weight_app):
     request._session['weight_conf'] = 'equal'
     request._session['previous_comparison_id'] = 1
     request._session['comparison_ids'] = [1, 2]
-    ranker = rank.Rank(request, request._session)
+    ranker = rank.Rank(equal_weight_app, request._session)
     items = ranker._get_comparison_items(2)
     assert items[0].item_id == 4
     assert items[1].item_id == 3
@@ -454,11 +474,6 @@ def test_comparison_stats_retrieval(equal_weight_app):
             'updated': datetime.now(timezone.utc),
         },
     ]
-    for comparison_data in comparison_data_list:
-        comparison = Comparison(**comparison_data)
-        db.session.add(comparison)
-    db.session.commit()
-
     request = Request(equal_weight_app, {})
     request._session['participant_id'] = 1
     request._session['group_ids'] = [1]
@@ -466,6 +481,12 @@ def test_comparison_stats_retrieval(equal_weight_app):
     request._session['previous_comparison_id'] = 1
     request._session['comparison_ids'] = [1, 2]
     ranker = rank.Rank(request, request._session)
+    for comparison_data in comparison_data_list:
+        comparison = Comparison(**comparison_data)
+        db.session.add(comparison)
+        ranker._count_comparison(None, comparison_data['state'])
+    db.session.commit()
+
     counts = ranker._get_comparison_stats()
     assert counts[0] == 8
     assert counts[1] == 3
@@ -495,7 +516,7 @@ def test_custom_item_retrieval(mocker, custom_weight_app):
     """
     GIVEN a flask app configured for testing and custom weights and with basic data added for user and group preference
     WHEN a user has an active session specifying a group_id and _get_custom_items is called
-    THEN the correct group ids and weightings are supplied to the random generator function and two items are returned
+    THEN the pair drawn from the group's alias table is returned
     """
     request = Request(custom_weight_app, {})
     request._session['participant_id'] = 1
@@ -507,10 +528,34 @@ def test_custom_item_retrieval(mocker, custom_weight_app):
     mock_rng = mocker.Mock(spec=random.Generator)
     custom_weight_app.rng = mock_rng
     ranker._app = custom_weight_app
-    mock_rng.choice.return_value = [4, 8]
-    ranker._get_custom_items()
-    # check that we feed the correct data to the random item generator
-    mock_rng.choice.assert_called_once_with([4, 5, 6, 7, 8, 9], 1, p=[0.1, 0.2, 0.2, 0.3, 0.1, 0.1], replace=False)
+    # the fourth pair of the group (yorkshire/east_midlands) has a weight above the average so it is never aliased
+    mock_rng.integers.return_value = 3
+    mock_rng.random.return_value = 0.0
+    items = ranker._get_custom_items()
+    mock_rng.integers.assert_called_once_with(6)
+    assert items[0].name == 'yorkshire'
+    assert items[1].name == 'east_midlands'
+
+
+@pytest.mark.usefixtures('add_basic_data_custom')
+def test_custom_item_retrieval_respects_group(custom_weight_app):
+    """
+    GIVEN a flask app configured for testing and custom weights and with basic data added for user and group preference
+    WHEN _get_custom_items is called repeatedly with the real random number generator
+    THEN every pair returned belongs to the participant's group
+    """
+    request = Request(custom_weight_app, {})
+    request._session['participant_id'] = 1
+    request._session['group_ids'] = [2]
+    request._session['weight_conf'] = 'manual'
+    request._session['previous_comparison_id'] = None
+    request._session['comparison_ids'] = []
+    ranker = rank.Rank(request, request._session)
+    ranker._app = custom_weight_app
+    for _ in range(20):
+        items = ranker._get_custom_items()
+        assert {items[0].name, items[1].name} <= {'wales', 'yorkshire', 'east_midlands', 'eastern'}
+        assert items[0].name != items[1].name
 
 
 @pytest.mark.usefixtures('add_basic_data_equal')
@@ -578,9 +623,43 @@ def test_random_item_retrieval(mocker, equal_weight_app):
     equal_weight_app.rng = mock_rng
     ranker._app = equal_weight_app
     mock_rng.choice.return_value = [1, 8]
-    ranker._get_random_items()
+    items = ranker._get_random_items()
     # check that we feed the correct data to the random item generator
-    mock_rng.choice.assert_called_once_with([1, 2, 3, 4, 5, 6, 7, 8, 9], 2, replace=False)
+    mock_rng.choice.assert_called_once()
+    args, kwargs = mock_rng.choice.call_args
+    assert list(args[0]) == [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert args[1] == 2
+    assert kwargs == {'replace': False}
+    assert items[0].item_id == 1
+    assert items[1].item_id == 8
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_random_item_retrieval_without_repeats(mocker, equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights with the noRepeatPairs behaviour enabled
+    WHEN a participant requests a random pair more times than there are pairs available
+    THEN every pair is shown once before any pair is repeated
+    """
+    request = Request(equal_weight_app, {})
+    request._session['participant_id'] = 1
+    request._session['group_ids'] = [1]
+    request._session['weight_conf'] = 'equal'
+    request._session['previous_comparison_id'] = None
+    request._session['comparison_ids'] = []
+    ranker = rank.Rank(request, request._session)
+    ranker._app = equal_weight_app
+    optional_conf = mocker.patch.object(rank.WS, 'get_optional_behaviour_conf')
+    optional_conf.return_value = True
+    pairs = []
+    for _ in range(36):
+        items = ranker._get_random_items()
+        pairs.append(frozenset([items[0].item_id, items[1].item_id]))
+    assert len(set(pairs)) == 36
+    assert ranker._session['pair_sequence']['cursor'] == 36
+
+    ranker._get_random_items()
+    assert ranker._session['pair_sequence']['cursor'] == 1
 
 
 @pytest.mark.usefixtures('add_basic_data_equal')
@@ -649,9 +728,50 @@ def test_random_item_retrieval_only_one_item(equal_weight_app):
     request._session['weight_conf'] = 'equal'
     request._session['previous_comparison_id'] = None
     request._session['comparison_ids'] = []
-    ranker = rank.Rank(request, request._session)
+    ranker = rank.Rank(equal_weight_app, request._session)
     items = ranker._get_random_items()
     # check that we get two None entries because there is only 1
     assert len(items) == 2
     assert items[0] is None
     assert items[1] is None
+
+
+@pytest.mark.usefixtures('add_basic_data_equal')
+def test_queued_item_retrieval(mocker, equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and equal weights with a pair queue of length 5
+    WHEN a participant with an empty queue requests pairs to compare and then finishes a cycle
+    THEN a batch of pairs is selected once, the pairs are served in order from the queue and the queue is discarded
+        at the end of the cycle
+    """
+    request = Request(equal_weight_app, {})
+    request._session['participant_id'] = 1
+    request._session['group_ids'] = [1]
+    request._session['weight_conf'] = 'equal'
+    request._session['previous_comparison_id'] = None
+    request._session['comparison_ids'] = []
+    request._session['pair_queue_length'] = 5
+    ranker = rank.Rank(request, request._session)
+    ranker._app = equal_weight_app
+    should_render = mocker.patch.object(rank.WS, 'should_render')
+    should_render.return_value = False
+    select_items = mocker.spy(ranker, '_select_items')
+
+    items = ranker._get_items_to_compare()
+    assert select_items.call_count == 5
+    queued = db.session.execute(
+        db.select(QueuedPair.item_1_id, QueuedPair.item_2_id).order_by(QueuedPair.queued_pair_id)
+    ).all()
+    assert len(queued) == 4
+    assert items[0].item_id != items[1].item_id
+
+    for item_1_id, item_2_id in queued:
+        items = ranker._get_items_to_compare()
+        assert (items[0].item_id, items[1].item_id) == (item_1_id, item_2_id)
+    assert select_items.call_count == 5
+
+    ranker._get_items_to_compare()
+    assert select_items.call_count == 10
+    assert len(db.session.scalars(db.select(QueuedPair)).all()) == 4
+    ranker._increment_cycle_count()
+    assert len(db.session.scalars(db.select(QueuedPair)).all()) == 0
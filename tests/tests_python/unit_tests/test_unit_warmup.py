@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from app import create_app
+from comparison_interface.configuration.website import Settings as WS
+from comparison_interface.warmup import warm_up
+
+
+def test_warm_up(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing and with equal weights
+    WHEN the caches are warmed up
+    THEN the configuration, layout text, templates, catalogue and scores are loaded and the time of each step reported
+    """
+    with patch('comparison_interface.warmup.gc.freeze') as mock_freeze:
+        timings = warm_up(equal_weight_app)
+    assert list(timings) == ["configuration", "layout text", "templates", "catalogue", "scores"]
+    assert mock_freeze.call_count == 1
+    compiled = getattr(equal_weight_app, WS.APP_ATTRIBUTE)
+    assert ('layout_text', equal_weight_app.language_code) in compiled.memo
+    assert equal_weight_app.item_catalogue is not None
+    assert equal_weight_app.scoring_engine is not None
+    assert len(equal_weight_app.jinja_env.cache) > 0
+
+
+def test_warm_up_before_setup(equal_weight_app):
+    """
+    GIVEN a flask app configured for testing whose study database has no website control row
+    WHEN the caches are warmed up
+    THEN the warm up is skipped without an error
+    """
+    with patch('comparison_interface.warmup.WebsiteControl.get_conf', return_value=None):
+        assert warm_up(equal_weight_app) == {}
+
+
+def test_create_app_warm_up_flag():
+    """
+    GIVEN the flask application factory
+    WHEN an application is created with and without the warm up flag
+    THEN the caches are only warmed up when requested
+    """
+    with patch('comparison_interface.warmup.warm_up') as mock_warm_up:
+        create_app(testing=True)
+        assert mock_warm_up.call_count == 0
+        app = create_app(testing=True, warm_up=True)
+        mock_warm_up.assert_called_once_with(app)
@@ -36,6 +36,43 @@ def test_validate_csv_structure_valid_csv(equal_weight_app, tmp_path):
         assert False, f'ValidationError raised: {err}'
 
 
+def test_validate_csv_content_valid_csv(equal_weight_app, tmp_path):
+    """
+    GIVEN the path to a csv file with valid items in two groups, read in chunks smaller than the file
+    WHEN the csv file content is validated
+    THEN no ValidationError is raised
+    """
+    csv_path = tmp_path / "valid.csv"
+    rows = [f'Item {i},item_{i}.png,Group {i % 2}' for i in range(1, 11)]
+    csv_path.write_text('\n'.join(['Item Display Name,Image,Group Display Name'] + rows))
+    Validation(equal_weight_app).validate_csv_content(csv_path, chunk_size=3)
+
+
+def test_validate_csv_content_errors_have_line_numbers(equal_weight_app, tmp_path):
+    """
+    GIVEN the path to a csv file with an invalid name, a repeated name, a missing image and a short row
+    WHEN the csv file content is validated
+    THEN a ValidationError is raised with the errors keyed by the line number of each row
+    """
+    csv_path = tmp_path / "invalid.csv"
+    csv_path.write_text(
+        'Item Display Name,Item Name,Image\n'
+        'North East,north_east,item_1.png\n'
+        'North West,North West,item_2.png\n'
+        'Again,north_east,item_3.png\n'
+        'Missing,missing,missing.png\n'
+        'Short,short\n'
+    )
+    with pytest.raises(ValidationError) as err:
+        Validation(equal_weight_app).validate_csv_content(csv_path, chunk_size=2)
+    errors = err.value.messages_dict["csvFile"]
+    assert sorted(errors) == [3, 4, 5, 6]
+    assert list(errors[3]) == ["name"]
+    assert errors[4]["name"] == ["All items in the same group must have an unique name. Repeated name north_east"]
+    assert errors[5]["imageName"] == ["Image missing.png not found in static/images/ folder."]
+    assert errors[6]["imageName"] == ["Missing data for required field."]
+
+
 def test_setup_works_for_directory_with_csv():
     """
     GIVEN a flask application set up for testing